@@ -1,24 +1,31 @@
 from .collectionmodel import CollectionModel, CollectionModelException, \
     CollectionModelMementoErrorException, CollectionModelTimeMapErrorException, \
     CollectionModelNoSuchMementoException, CollectionModelNoSuchTimeMapException
+from .sqlite_collectionmodel import SQLiteCollectionModel
 from .input_types import get_collection_model, supported_input_types, \
-    discover_raw_urims, working_directory_default
+    discover_raw_urims, working_directory_default, create_collection_model
 from .argument_processing import process_collection_similarity_measure_inputs, \
     process_timemap_similarity_measure_inputs, process_input_types, \
     get_logger, calculate_loglevel, process_output_types
 from .output_types import supported_output_types
 from .archive_information import generate_raw_urim, archive_mappings
+from .fetcher import AsyncFetcher
 from .timemap_measures import compute_bytecount_across_TimeMap, \
     compute_wordcount_across_TimeMap, compute_jaccard_across_TimeMap, \
     compute_cosine_across_TimeMap, compute_sorensen_across_TimeMap, \
     compute_levenshtein_across_TimeMap, compute_nlevenshtein_across_TimeMap, \
     compute_tfintersection_across_TimeMap, supported_timemap_measures, \
     compute_rawsimhash_across_TimeMap, compute_tfsimhash_across_TimeMap, \
-    compute_gensim_lsi_across_TimeMap, compute_gensim_lda_across_TimeMap
+    compute_gensim_lsi_across_TimeMap, compute_gensim_lda_across_TimeMap, \
+    compute_measures_across_TimeMap, compute_measures_for_TimeMap
 from .collection_measures import compute_jaccard_accross_collection, \
     compute_sorensen_accross_collection, supported_collection_measures
 from .measuremodel import MeasureModel, MeasureModelNoSuchMemento, \
-    MeasureModelNoSuchTimeMap, MeasureModelNoSuchMeasure, MeasureModelNoSuchMeasureType
+    MeasureModelNoSuchTimeMap, MeasureModelNoSuchMeasure, MeasureModelNoSuchMeasureType, \
+    read_output_records
+from .columnar_measuremodel import ColumnarMeasureModel
+from .tokenization import TokenizationPipeline
+from .pipeline import MementoPipeline
 from .metadata_calcluations import compute_Simhashes, compute_raw_content_lengths, \
     detect_languages, extract_memento_datetimes
 
@@ -28,12 +35,13 @@ from .metadata_calcluations import compute_Simhashes, compute_raw_content_length
 __all__ = ["CollectionModel", "CollectionModelException",
     "CollectionModelMementoErrorException", 
     "CollectionModelTimeMapErrorException", 
-    "CollectionModelNoSuchMementoException",
+    "CollectionModelNoSuchMementoException", "SQLiteCollectionModel",
+    "create_collection_model",
     "get_collection_model", "process_collection_similarity_measure_inputs",
     "process_timemap_similarity_measure_inputs",
     "process_input_types", "get_logger", "calculate_loglevel", 
     "supported_input_types", "supported_output_types",
-    "generate_raw_urim", "archive_mappings",
+    "generate_raw_urim", "archive_mappings", "AsyncFetcher",
     "working_directory_default", "process_output_types",
     "compute_bytecount_across_TimeMap",
     "compute_wordcount_across_TimeMap", "compute_jaccard_across_TimeMap",
@@ -41,11 +49,14 @@ __all__ = ["CollectionModel", "CollectionModelException",
     "compute_levenshtein_across_TimeMap", "compute_nlevenshtein_across_TimeMap",
     "compute_tfintersection_across_TimeMap", "supported_timemap_measures",
     "compute_rawsimhash_across_TimeMap", "compute_tfsimhash_across_TimeMap",
+    "compute_measures_across_TimeMap", "compute_measures_for_TimeMap",
     "MeasureModel", "MeasureModelNoSuchMemento",
     "MeasureModelNoSuchTimeMap", "MeasureModelNoSuchMeasure",
+    "ColumnarMeasureModel", "read_output_records",
     "compute_Simhashes", "compute_raw_content_lengths",
     "compute_jaccard_accross_collection", "compute_sorensen_accross_collection",
-    "supported_collection_measures", "detect_languages", "extract_memento_datetimes"
+    "supported_collection_measures", "detect_languages", "extract_memento_datetimes",
+    "TokenizationPipeline", "MementoPipeline"
     ]
 
 import logging
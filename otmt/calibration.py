@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.calibration
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module finds the thresholds of the TimeMap measures that best
+separate on-topic from off-topic mementos in gold standard data. Scores
+are measured once and stored in a MeasureModel, so each threshold only
+costs a comparison against the stored scores.
+"""
+
+import csv
+import itertools
+import logging
+
+import numpy
+
+logger = logging.getLogger(__name__)
+
+default_threshold_count = 101
+
+performance_names = [
+    "true positives", "false positives", "false negatives", "true negatives",
+    "precision", "recall", "F1", "accuracy"
+]
+
+def read_gold_standard(filename):
+    """Reads the tab-delimited gold standard data in `filename`, as written
+    by `MeasureModel.save_as_goldstandard` or used by the goldtest input
+    type, returning a dict that maps each URI-M to True if it is labeled
+    off-topic and False if it is labeled on-topic. Mementos with any other
+    label, such as ERROR, are left out.
+    """
+
+    labels = {}
+
+    with open(filename) as tsvfile:
+
+        reader = csv.DictReader(tsvfile, delimiter='\t')
+
+        for row in reader:
+
+            if row["label"] == "0":
+                labels[row["URI"]] = True
+            elif row["label"] == "1":
+                labels[row["URI"]] = False
+
+    return labels
+
+def calculate_performance(predicted, actual):
+    """Compares `predicted`, a boolean numpy array with a row for each
+    threshold marking the mementos predicted to be off-topic, against
+    `actual`, a boolean numpy array marking the mementos that are.
+
+    Returns a dict mapping each name in `performance_names` to a numpy
+    array with a value for each threshold. Off-topic mementos are the
+    positives.
+    """
+
+    true_positives = (predicted & actual).sum(axis=-1)
+    predicted_positives = predicted.sum(axis=-1)
+    actual_positives = actual.sum()
+
+    false_positives = predicted_positives - true_positives
+    false_negatives = actual_positives - true_positives
+    true_negatives = len(actual) - true_positives - false_positives - false_negatives
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+
+        precision = numpy.where(predicted_positives > 0,
+            true_positives / predicted_positives, 0.0)
+        recall = numpy.where(actual_positives > 0,
+            true_positives / actual_positives, 0.0)
+        f1 = numpy.where(precision + recall > 0,
+            2 * precision * recall / (precision + recall), 0.0)
+        accuracy = numpy.where(len(actual) > 0,
+            (true_positives + true_negatives) / len(actual), 0.0)
+
+    return {
+        "true positives": true_positives,
+        "false positives": false_positives,
+        "false negatives": false_negatives,
+        "true negatives": true_negatives,
+        "precision": precision,
+        "recall": recall,
+        "F1": f1,
+        "accuracy": accuracy
+    }
+
+def get_labeled_predictions(measuremodel, measuretype, measurename,
+    thresholds, comparison, gold_labels):
+    """Evaluates `thresholds` against the scores stored in `measuremodel`
+    for `measuretype` and `measurename`, keeping only the mementos with a
+    label in `gold_labels`.
+
+    Returns the boolean numpy array of predictions with a row for each
+    threshold, a boolean numpy array marking the mementos that have a
+    score, and a boolean numpy array of their labels.
+    """
+
+    mementos, offtopic, measured = measuremodel.evaluate_thresholds(
+        measuretype, measurename, thresholds, comparison)
+
+    labeled = numpy.array(
+        [ urim in gold_labels for urit, urim in mementos ], dtype=bool)
+
+    actual = numpy.array(
+        [ gold_labels[urim] for urit, urim in mementos if urim in gold_labels ],
+        dtype=bool)
+
+    return offtopic[:, labeled], measured[labeled], actual
+
+def get_score_range(measuremodel, measuretype, measurename,
+    threshold_count=default_threshold_count):
+    """Returns `threshold_count` evenly spaced thresholds spanning the
+    scores stored in `measuremodel` for `measuretype` and `measurename`.
+    """
+
+    mementos, scores, status_codes, measured = \
+        measuremodel.get_measure_data(measuretype, measurename)
+
+    if not measured.any():
+        return numpy.array([])
+
+    return numpy.linspace(scores[measured].min(), scores[measured].max(),
+        threshold_count)
+
+def sweep_thresholds(measuremodel, measuretype, measurename, thresholds,
+    comparison, gold_labels):
+    """Evaluates each of `thresholds` for `measuretype` and `measurename`
+    against the scores stored in `measuremodel`, using `comparison` as
+    `calculate_offtopic_by_measure` does, and measures the performance
+    of each against the mementos labeled in `gold_labels`. Mementos
+    without a score are left out.
+
+    Returns a dict with the `thresholds` and, for each name in
+    `performance_names`, a numpy array with a value for each threshold.
+    """
+
+    predicted, measured, actual = get_labeled_predictions(measuremodel,
+        measuretype, measurename, thresholds, comparison, gold_labels)
+
+    results = calculate_performance(predicted[:, measured], actual[measured])
+    results["thresholds"] = numpy.asarray(thresholds, dtype=numpy.float64)
+
+    return results
+
+def sweep_threshold_combinations(measuremodel, measuretype, measures, gold_labels):
+    """Evaluates every combination of thresholds for the measures of
+    `measuretype` in `measures`, a dict mapping each measure name to a
+    pair of its thresholds and comparison. As with
+    `calculate_overall_offtopic_status`, a memento is predicted to be
+    off-topic if it is off-topic for any of the measures. Mementos
+    without a score for any of the measures are left out.
+
+    Each combination of thresholds for all but the last measure is
+    evaluated against all of the thresholds of the last at once.
+
+    Measures without thresholds, such as those `get_score_range` returns
+    for measures without scores, are left out of the combinations.
+
+    Returns a dict whose "thresholds" entry is a numpy array with a row
+    for each combination and a column for each measure, which is NaN for
+    measures left out, and, for each name in `performance_names`, a numpy
+    array with a value for each combination.
+    """
+
+    measurenames = [ measurename for measurename in measures
+        if len(measures[measurename][0]) > 0 ]
+
+    if len(measurenames) == 0:
+        results = { name: numpy.array([]) for name in performance_names }
+        results["thresholds"] = numpy.empty((0, len(measures)))
+        return results
+
+    all_predicted = []
+    any_measured = None
+
+    for measurename in measurenames:
+
+        thresholds, comparison = measures[measurename]
+
+        predicted, measured, actual = get_labeled_predictions(measuremodel,
+            measuretype, measurename, thresholds, comparison, gold_labels)
+
+        all_predicted.append(predicted)
+
+        if any_measured is None:
+            any_measured = measured
+        else:
+            any_measured = any_measured | measured
+
+    actual = actual[any_measured]
+    all_predicted = [ predicted[:, any_measured] for predicted in all_predicted ]
+
+    last_predicted = all_predicted[-1]
+    last_thresholds = numpy.asarray(measures[measurenames[-1]][0], dtype=numpy.float64)
+
+    results = { name: [] for name in performance_names }
+    results["thresholds"] = []
+
+    for indexes in itertools.product(
+        *[ range(0, len(predicted)) for predicted in all_predicted[:-1] ]):
+
+        combined = numpy.zeros(len(actual), dtype=bool)
+
+        for predicted, index in zip(all_predicted, indexes):
+            combined |= predicted[index]
+
+        performance = calculate_performance(
+            last_predicted | combined[numpy.newaxis, :], actual)
+
+        for name in performance_names:
+            results[name].append(performance[name])
+
+        prefix_thresholds = [ numpy.asarray(measures[measurename][0])[index]
+            for measurename, index in zip(measurenames, indexes) ]
+
+        results["thresholds"].append(numpy.column_stack(
+            [ numpy.full(len(last_thresholds), threshold)
+                for threshold in prefix_thresholds ] + [ last_thresholds ]))
+
+    for name in results:
+        results[name] = numpy.concatenate(results[name])
+
+    if len(measurenames) < len(measures):
+
+        thresholds = numpy.full((len(results["thresholds"]), len(measures)), numpy.nan)
+        columns = [ index for index, measurename in enumerate(measures)
+            if measurename in measurenames ]
+
+        thresholds[:, columns] = results["thresholds"]
+        results["thresholds"] = thresholds
+
+    return results
+
+def find_best_thresholds(results, metric="F1"):
+    """Returns the index of the thresholds in `results`, as produced by
+    `sweep_thresholds` or `sweep_threshold_combinations`, with the best
+    value of `metric`, or None if no thresholds were evaluated.
+    """
+
+    if len(results[metric]) == 0:
+        return None
+
+    return int(numpy.argmax(results[metric]))
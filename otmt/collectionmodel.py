@@ -18,18 +18,34 @@ provided that such a subclass has the same methods and parameters.
 
 import copy
 import os
+import sys
+import gzip
 import hashlib
 import json
 import csv
+import time
 import logging
+import struct
+import threading
+import multiprocessing
+import concurrent.futures
+
+from array import array
 
 import lxml.etree
 
 from datetime import datetime
 from datetime import date
+from datetime import timedelta
+from collections.abc import Sequence
 
 from justext import justext, get_stoplist
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from .timemap import convert_LinkTimeMap_to_dict
 
 logger = logging.getLogger(__name__)
@@ -46,6 +62,96 @@ def json_serial(obj):
         return obj.isoformat()
     raise TypeError ("Type %s not serializable" % type(obj))
 
+token_cache_header = b"OTMT-TOKENS-1\n"
+
+# the suffix of memento content and header files stored with each compression
+compression_suffixes = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst"
+}
+
+# zstd dictionaries are trained on the first mementos stored, using at most
+# this many bytes from each
+compression_dictionary_sample_count = 256
+compression_dictionary_sample_size = 65536
+compression_dictionary_size = 112640
+
+# the number of contents waiting for each worker of precomputeBoilerplate
+precompute_queue_size = 4
+
+def serialize_tokens(tokens):
+    """Converts the list of strings in `tokens` into a compact binary form.
+    Each distinct token is stored once and the token sequence is stored as
+    an array of integer identifiers into that vocabulary.
+    """
+
+    vocabulary = {}
+    token_ids = []
+
+    for token in tokens:
+        token_ids.append( vocabulary.setdefault(token, len(vocabulary)) )
+
+    encoded_vocabulary = [ bytes(token, "utf8") for token in vocabulary ]
+
+    if len(vocabulary) < 2**8:
+        typecode = 'B'
+    elif len(vocabulary) < 2**16:
+        typecode = 'H'
+    else:
+        typecode = 'I'
+
+    lengths = array('I', [ len(token) for token in encoded_vocabulary ])
+    token_ids = array(typecode, token_ids)
+
+    # always store little endian so the files are portable
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+        token_ids.byteswap()
+
+    return b"".join([
+        token_cache_header,
+        struct.pack("<cII", bytes(typecode, "ascii"), len(lengths), len(token_ids)),
+        lengths.tobytes(),
+        b"".join(encoded_vocabulary),
+        token_ids.tobytes()
+    ])
+
+def deserialize_tokens(data):
+    """Converts the output of `serialize_tokens` back into a list of tokens.
+    """
+
+    if not data.startswith(token_cache_header):
+        raise CollectionModelException("Unrecognized token cache format")
+
+    offset = len(token_cache_header)
+
+    typecode, vocabulary_count, token_count = struct.unpack_from("<cII", data, offset)
+    typecode = typecode.decode("ascii")
+    offset += struct.calcsize("<cII")
+
+    lengths = array('I')
+    lengths.frombytes(data[offset:offset + vocabulary_count * lengths.itemsize])
+    offset += vocabulary_count * lengths.itemsize
+
+    token_ids = array(typecode)
+
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+
+    vocabulary = []
+
+    for length in lengths:
+        vocabulary.append( str(data[offset:offset + length], "utf8") )
+        offset += length
+
+    token_ids.frombytes(data[offset:offset + token_count * token_ids.itemsize])
+
+    if sys.byteorder == 'big':
+        token_ids.byteswap()
+
+    return [ vocabulary[token_id] for token_id in token_ids ]
+
 class CollectionModelException(Exception):
     """An exception class to be used by the functions in this file so that the
     source of error can be detected.
@@ -79,6 +185,296 @@ class CollectionModelBoilerPlateRemovalFailureException(CollectionModelException
     """
     pass
 
+class ReadOnlyDict(dict):
+    """A dict that cannot be modified. Copies made with `copy.deepcopy`
+    are ordinary dicts.
+    """
+
+    def refuse_modification(self, *args, **kwargs):
+        raise TypeError("'{}' object does not support modification".format(
+            type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = \
+        setdefault = update = refuse_modification
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+class ReadOnlyList(list):
+    """A list that cannot be modified. Copies made with `copy.deepcopy`
+    are ordinary lists.
+    """
+
+    def refuse_modification(self, *args, **kwargs):
+        raise TypeError("'{}' object does not support modification".format(
+            type(self).__name__))
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = clear = \
+        extend = insert = pop = remove = reverse = sort = refuse_modification
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+class CompactMementoList(Sequence):
+    """A read-only list of the mementos of a TimeMap, each a dict with the
+    keys "datetime" and "uri", that keeps memento-datetimes as an array of
+    microseconds and URI-Ms in a tuple instead of a dict and datetime
+    object per memento. Each memento is returned as a ReadOnlyDict made
+    when it is accessed. Copies made with `copy.deepcopy` are ordinary
+    lists of dicts.
+    """
+
+    epoch = datetime(1970, 1, 1)
+    microsecond = timedelta(microseconds=1)
+
+    def __init__(self, memento_list):
+
+        self.memento_datetimes = array('q', [
+            (memento["datetime"] - self.epoch) // self.microsecond
+            for memento in memento_list ])
+        self.memento_uris = tuple( memento["uri"] for memento in memento_list )
+
+    @classmethod
+    def can_hold(cls, memento_list):
+        """Returns True if every memento in `memento_list` can be kept in a
+        CompactMementoList without changing it.
+        """
+
+        if type(memento_list) != list:
+            return False
+
+        for memento in memento_list:
+
+            if type(memento) != dict or len(memento) != 2:
+                return False
+
+            memento_datetime = memento.get("datetime")
+
+            if type(memento_datetime) != datetime or \
+                memento_datetime.tzinfo is not None or \
+                type(memento.get("uri")) != str:
+                return False
+
+        return True
+
+    def make_memento(self, index):
+        return ReadOnlyDict((
+            ("datetime", self.epoch + self.memento_datetimes[index] * self.microsecond),
+            ("uri", self.memento_uris[index])
+        ))
+
+    def __len__(self):
+        return len(self.memento_uris)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [ self.make_memento(i)
+                for i in range(*index.indices(len(self))) ]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+
+        return self.make_memento(index)
+
+    def __iter__(self):
+
+        for index in range(0, len(self)):
+            yield self.make_memento(index)
+
+    def __eq__(self, other):
+
+        if isinstance(other, CompactMementoList):
+            return self.memento_datetimes == other.memento_datetimes and \
+                self.memento_uris == other.memento_uris
+
+        if isinstance(other, list):
+            return list(self) == other
+
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def refuse_modification(self, *args, **kwargs):
+        raise TypeError("'{}' object does not support modification".format(
+            type(self).__name__))
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = clear = \
+        extend = insert = pop = remove = reverse = sort = refuse_modification
+
+    def __reduce__(self):
+        return (list, ([ dict(memento) for memento in self ],))
+
+def make_read_only(data):
+    """Returns a read-only copy of `data`, replacing every dict and list
+    within it by a ReadOnlyDict or ReadOnlyList. These still compare equal
+    to, and serialize like, the dicts and lists they were made from.
+    """
+
+    if isinstance(data, dict):
+        return ReadOnlyDict(
+            (key, make_read_only(value)) for key, value in data.items() )
+
+    if isinstance(data, list):
+        return ReadOnlyList( make_read_only(value) for value in data )
+
+    return data
+
+def make_read_only_timemap(timemap):
+    """Returns a read-only copy of the dict form of a TimeMap, `timemap`,
+    as `make_read_only` does, but with its list of mementos held in a
+    CompactMementoList if possible.
+    """
+
+    mementos = timemap.get("mementos")
+
+    if not isinstance(mementos, dict) or \
+        not CompactMementoList.can_hold(mementos.get("list")):
+        return make_read_only(timemap)
+
+    read_only_mementos = ReadOnlyDict(
+        (key, CompactMementoList(value) if key == "list" else make_read_only(value))
+        for key, value in mementos.items() )
+
+    return ReadOnlyDict(
+        (key, read_only_mementos if key == "mementos" else make_read_only(value))
+        for key, value in timemap.items() )
+
+def calculate_content_digest(content):
+    """Returns the digest identifying the memento `content`, which is the
+    same for every memento with the same content.
+    """
+
+    return hashlib.sha3_256(content).hexdigest()
+
+def remove_boilerplate_from_content(content):
+    """Returns the text of the HTML in `content` with all boilerplate
+    removed by justext, one paragraph per line.
+
+    If justext cannot parse `content`, then
+    CollectionModelBoilerPlateRemovalFailureException is thrown.
+    """
+
+    try:
+        paragraphs = justext(content, get_stoplist('English'))
+
+    except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError) as e:
+        raise CollectionModelBoilerPlateRemovalFailureException(repr(e))
+
+    return b"".join(
+        bytes("{}\n".format(paragraph.text), "utf8") for paragraph in paragraphs
+    )
+
+def remove_boilerplate_in_worker(task):
+    """Removes the boilerplate from the content in `task`, returning the
+    content without boilerplate, or the error message if its removal fails,
+    along with the content digest in `task`.
+
+    This function runs inside the worker processes of
+    `CollectionModel.precomputeBoilerplate`.
+    """
+
+    content_digest, content = task
+
+    try:
+        return content_digest, remove_boilerplate_from_content(content), None
+    except CollectionModelBoilerPlateRemovalFailureException as e:
+        return content_digest, None, str(e)
+
+def convert_timemap_content_to_dict(content):
+    """Returns the dict form of the TimeMap in `content`, which is either
+    JSON or link-format. Memento-Datetimes are converted to datetime objects.
+    """
+
+    try:
+        json_timemap = json.loads(content)
+        fdt = datetime.strptime(
+            json_timemap["mementos"]["first"]["datetime"],
+            "%Y-%m-%dT%H:%M:%S"
+        )
+        ldt = datetime.strptime(
+            json_timemap["mementos"]["last"]["datetime"],
+            "%Y-%m-%dT%H:%M:%S"
+        )
+
+        json_timemap["mementos"]["first"]["datetime"] = fdt
+        json_timemap["mementos"]["last"]["datetime"] = ldt
+
+        updated_memlist = []
+
+        for mem in json_timemap["mementos"]["list"]:
+            mdt = datetime.strptime(
+                mem["datetime"],
+                "%Y-%m-%dT%H:%M:%S"
+            )
+
+            uri = mem["uri"]
+            updated_memlist.append({
+                "datetime": mdt,
+                "uri": uri
+            })
+
+        json_timemap["mementos"]["list"] = updated_memlist
+
+    except json.JSONDecodeError:
+        json_timemap = convert_LinkTimeMap_to_dict(content, skipErrors=True)
+
+    return json_timemap
+
+def parse_stored_datetime(value):
+    """Returns the datetime object for `value`, a datetime written to JSON
+    by `json_serial`.
+    """
+
+    # slicing is much faster than strptime for the usual format
+    if len(value) == 19 and value[10] == 'T':
+        return datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19])
+        )
+
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+def convert_stored_timemap_to_dict(timemap_json):
+    """Returns the read-only dict form of a TimeMap stored as `timemap_json`
+    by `addTimeMap`, restoring its datetime objects and filling in its
+    first and last mementos if they are missing.
+    """
+
+    timemap = json.loads(timemap_json)
+
+    mementos = timemap.get("mementos", {})
+    memento_list = mementos.get("list", [])
+
+    entries = memento_list + \
+        [ mementos[key] for key in ("first", "last") if key in mementos ]
+
+    for entry in entries:
+
+        if type(entry.get("datetime")) == str:
+            entry["datetime"] = parse_stored_datetime(entry["datetime"])
+
+    if len(memento_list) > 0:
+
+        sorted_mementos = sorted(
+            (memento["datetime"], memento["uri"]) for memento in memento_list
+        )
+
+        for key, (mdt, urim) in [
+            ("first", sorted_mementos[0]), ("last", sorted_mementos[-1]) ]:
+
+            mementos.setdefault(key, {})
+            mementos[key].setdefault("datetime", mdt)
+            mementos[key].setdefault("uri", urim)
+
+    return make_read_only_timemap(timemap)
+
 class CollectionModel:
     """
         This class exists because the dict for keeping track of
@@ -87,11 +483,24 @@ class CollectionModel:
 
         This class can also be subclassed to store memento data in
         another way, such as a database or WARC.
+
+        Memento content is stored once per distinct content, under its
+        digest, and each URI-M refers to the content it was stored with.
+        The content without boilerplate and the tokens are derived from,
+        and stored alongside, that content, so they are only generated
+        once for all of the mementos that share it.
+
+        If `compression` is gzip or zstd, memento content, content without
+        boilerplate, and memento headers are stored compressed. The
+        compression is recorded in the working directory and used by every
+        later CollectionModel opened against it, and files stored with
+        another compression remain readable. With zstd, a dictionary is
+        trained on the first mementos stored and used for the rest.
     """
 
     # TODO: add functions for storing metadata, like for saving a collection id, name, etc.
 
-    def __init__(self, working_directory):
+    def __init__(self, working_directory, compression=None):
 
         self.working_directory = working_directory
         self.timemap_directory = "{}/timemaps".format(working_directory)
@@ -105,9 +514,13 @@ class CollectionModel:
         self.urimap = {
             "timemaps": {},
             "mementos": {},
+            "memento-contents": {},
             "memento-errors": {}
         }
 
+        # the boilerplate removal error for each content digest
+        self.boilerplate_failures = {}
+
         if not os.path.exists(working_directory):
             os.makedirs(self.working_directory)
             os.makedirs(self.timemap_directory)
@@ -134,11 +547,283 @@ class CollectionModel:
 
         self.memento_errors_csvwriter = csv.writer(self.memento_errors_metadatafile)
 
+        self.boilerplate_failures_file = open("{}/boilerplate_failures.csv".format(
+            self.memento_directory
+        ), 'a')
+
+        self.boilerplate_failures_csvwriter = csv.writer(self.boilerplate_failures_file)
+
+        self.configure_compression(compression)
+
     def __del__(self):
 
         self.timemap_metadatafile.close()
         self.memento_metadatafile.close()
         self.memento_errors_metadatafile.close()
+        self.boilerplate_failures_file.close()
+
+    def flush(self):
+        """Writes any buffered metadata to disk so that other processes
+        opening the same working directory see everything stored so far.
+        """
+
+        self.timemap_metadatafile.flush()
+        self.memento_metadatafile.flush()
+        self.memento_errors_metadatafile.flush()
+        self.boilerplate_failures_file.flush()
+
+    def deferWrites(self):
+        """Asks this object to keep what it would store for
+        `takeDeferredWrites` rather than storing it, so that only one
+        process writes to the collection. Several processes can safely store
+        files in the same working directory, so this object keeps storing
+        everything at once.
+        """
+
+        pass
+
+    def takeDeferredWrites(self):
+        """Returns, and forgets, the writes kept since `deferWrites` was
+        called, in a form that `applyWrites` accepts.
+        """
+
+        return []
+
+    def applyWrites(self, writes):
+        """Stores the `writes` returned by `takeDeferredWrites` of another
+        copy of this collection model, such as one in a worker process.
+        """
+
+        pass
+
+    def checkpoint(self, progress=None):
+        """Forces all metadata stored so far onto disk, so that a later run
+        against the same working directory resumes from this point, and
+        records the dict `progress`, along with counts of what is stored,
+        in the checkpoint file of the working directory.
+        """
+
+        self.flush()
+
+        os.fsync(self.timemap_metadatafile.fileno())
+        os.fsync(self.memento_metadatafile.fileno())
+        os.fsync(self.memento_errors_metadatafile.fileno())
+        os.fsync(self.boilerplate_failures_file.fileno())
+
+        checkpoint_data = {
+            "checkpoint time": datetime.utcnow(),
+            "timemaps": len(self.urimap["timemaps"]),
+            "mementos": len(self.urimap["mementos"]),
+            "memento errors": len(self.urimap["memento-errors"])
+        }
+
+        if progress is not None:
+            checkpoint_data.update(progress)
+
+        checkpoint_filename = "{}/checkpoint.json".format(self.working_directory)
+        temporary_filename = "{}.{}.tmp".format(checkpoint_filename, os.getpid())
+
+        with open(temporary_filename, 'w') as out:
+            json.dump(checkpoint_data, out, default=json_serial, indent=4)
+
+        os.replace(temporary_filename, checkpoint_filename)
+
+    def getCheckpoint(self):
+        """Returns the data recorded by the last call to `checkpoint` against
+        this working directory, or None if there was none.
+        """
+
+        try:
+            with open("{}/checkpoint.json".format(
+                self.working_directory)) as checkpointinput:
+                return json.load(checkpointinput)
+
+        except FileNotFoundError:
+            return None
+
+    def configure_compression(self, compression):
+        """Sets the `compression` used for memento files, recording it in
+        the working directory, or uses the compression recorded by an
+        earlier run if `compression` is None.
+        """
+
+        settings_filename = "{}/compression.json".format(self.working_directory)
+
+        if compression is None:
+
+            try:
+                with open(settings_filename) as settingsinput:
+                    compression = json.load(settingsinput)["compression"]
+            except FileNotFoundError:
+                pass
+
+        elif compression not in compression_suffixes:
+            raise CollectionModelException(
+                "Unsupported compression {}, must be one of {}".format(
+                    compression, ", ".join(
+                        name for name in compression_suffixes if name)))
+
+        else:
+
+            with open(settings_filename, 'w') as out:
+                json.dump({ "compression": compression }, out)
+
+        self.compression = compression
+        self.dictionary_filename = "{}/compression.dict".format(
+            self.memento_directory)
+        self.dictionary_samples = []
+
+        # zstd compressors and decompressors are not safe to share between
+        # threads, such as those of the pipeline and of acquisition
+        self.zstd_lock = threading.RLock()
+        self.zstd_compressor = None
+        self.zstd_decompressor = None
+
+        if compression == "zstd" and self.load_zstd_dictionary():
+            self.dictionary_samples = None
+
+    def load_zstd_dictionary(self):
+        """Prepares the zstd compressor and decompressor, using the
+        dictionary trained for this working directory if there is one.
+        """
+
+        if zstandard is None:
+            raise CollectionModelException(
+                "zstd compression requires zstandard, "
+                "install it with 'pip install otmt[zstd]'")
+
+        try:
+            with open(self.dictionary_filename, 'rb') as dictionaryinput:
+                dictionary = zstandard.ZstdCompressionDict(dictionaryinput.read())
+
+        except FileNotFoundError:
+            self.zstd_compressor = zstandard.ZstdCompressor()
+            self.zstd_decompressor = zstandard.ZstdDecompressor()
+            return False
+
+        self.zstd_compressor = zstandard.ZstdCompressor(dict_data=dictionary)
+        self.zstd_decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+        return True
+
+    def train_zstd_dictionary(self, content):
+        """Keeps `content` as a sample for the zstd dictionary, training and
+        storing the dictionary once enough samples are kept.
+        """
+
+        if self.dictionary_samples is None:
+            return
+
+        self.dictionary_samples.append(content[0:compression_dictionary_sample_size])
+
+        if len(self.dictionary_samples) < compression_dictionary_sample_count:
+            return
+
+        samples = self.dictionary_samples
+        self.dictionary_samples = None
+
+        if os.path.exists(self.dictionary_filename):
+            self.load_zstd_dictionary()
+            return
+
+        try:
+            dictionary = zstandard.train_dictionary(
+                compression_dictionary_size, samples)
+
+        except zstandard.ZstdError:
+            logger.warning("Failed to train a zstd dictionary, "
+                "compressing without one")
+            return
+
+        temporary_filename = "{}.{}.tmp".format(
+            self.dictionary_filename, os.getpid())
+
+        with open(temporary_filename, 'wb') as out:
+            out.write(dictionary.as_bytes())
+
+        os.replace(temporary_filename, self.dictionary_filename)
+
+        self.load_zstd_dictionary()
+
+    def write_memento_file(self, filename, data):
+        """Stores the bytes in `data` as the memento file `filename`,
+        compressed as this object is configured to do.
+        """
+
+        if self.compression == "gzip":
+            data = gzip.compress(data, compresslevel=6)
+        elif self.compression == "zstd":
+            with self.zstd_lock:
+                data = self.zstd_compressor.compress(data)
+
+        filename += compression_suffixes[self.compression]
+
+        # write and rename so that concurrent readers never see partial data
+        temporary_filename = "{}.{}.tmp".format(filename, os.getpid())
+
+        with open(temporary_filename, 'wb') as out:
+            out.write(data)
+
+        os.replace(temporary_filename, filename)
+
+    def memento_file_exists(self, filename):
+        """Returns True if the memento file `filename` was stored with any
+        compression.
+        """
+
+        return any( os.path.exists(filename + suffix)
+            for suffix in compression_suffixes.values() )
+
+    def read_memento_file(self, filename):
+        """Returns the bytes stored as the memento file `filename`,
+        decompressing them while reading if they were stored compressed.
+
+        If no such file was stored, then FileNotFoundError is thrown.
+        """
+
+        compressions = [ self.compression ] + [ compression
+            for compression in compression_suffixes
+            if compression != self.compression ]
+
+        for compression in compressions:
+
+            try:
+                fileinput = open(filename + compression_suffixes[compression], 'rb')
+            except FileNotFoundError:
+                continue
+
+            with fileinput:
+
+                if compression is None:
+                    return fileinput.read()
+
+                if compression == "gzip":
+                    with gzip.GzipFile(fileobj=fileinput) as reader:
+                        return reader.read()
+
+                with self.zstd_lock:
+
+                    if self.zstd_decompressor is None:
+                        self.load_zstd_dictionary()
+
+                    try:
+                        with self.zstd_decompressor.stream_reader(
+                            fileinput, closefd=False) as reader:
+                            return reader.readall()
+
+                    except zstandard.ZstdError:
+
+                        # another process may have trained a dictionary since
+                        if not self.load_zstd_dictionary():
+                            raise
+
+                        fileinput.seek(0)
+
+                        with self.zstd_decompressor.stream_reader(
+                            fileinput, closefd=False) as reader:
+                            return reader.readall()
+
+        raise FileNotFoundError(filename)
 
     def load_data_from_directory(self):
         """
@@ -165,6 +850,7 @@ class CollectionModel:
         memento_reader = csv.reader(memento_metadatafile)
         memento_error_reader = csv.reader(memento_errors_metadatafile)
 
+        # TimeMaps are only read from disk when getTimeMap first asks for them
         for row in timemap_reader:
 
             logger.debug("reading TimeMap data row {}".format(row))
@@ -174,55 +860,18 @@ class CollectionModel:
 
             self.urimap["timemaps"][urit] = filename_digest
 
-            with open("{}/timemaps/{}.json".format(
-                self.working_directory, filename_digest)) as jsonin:
-
-                tmdata = json.load(jsonin)
-                mementolist = None # so it fails if something goes wrong
-
-                try:
-                    mementolist = copy.deepcopy(tmdata['mementos']['list'])
-                except KeyError:
-                    logger.exception("failed to acquire a list of mementos from TimeMap for URI-T {}, skipping...".format(urit))
-
-                mementos_to_sort = []
-
-                for memento in mementolist:
-                    mdt = datetime.strptime(
-                        memento['datetime'],
-                        '%Y-%m-%dT%H:%M:%S'
-                    )
-                    urim = memento['uri']
-                    mementos_to_sort.append((mdt, urim))
-
-                sorted_mementos = sorted(mementos_to_sort)
-
-                tmdata['mementos'].setdefault('first', {})
-                tmdata['mementos'].setdefault('last', {})
-                tmdata['mementos']['first'].setdefault('datetime', sorted_mementos[0][0])
-                tmdata['mementos']['first'].setdefault('uri', sorted_mementos[0][1])
-                tmdata['mementos']['last'].setdefault('datetime', sorted_mementos[-1][0])
-                tmdata['mementos']['last'].setdefault('uri', sorted_mementos[-1][1])
-
-                tmdata['mementos']['list'] = []
-
-                for entry in mementolist:
-
-                    tmdata['mementos']['list'].append(
-                        {
-                        "uri": entry['uri'],
-                        "datetime": datetime.strptime( entry['datetime'], "%Y-%m-%dT%H:%M:%S" )
-                        }
-                    )
-
-                self.collection_timemaps[urit] = tmdata
-
         for row in memento_reader:
             urim = row[0]
             filename_digest = row[1]
 
             self.urimap["mementos"][urim] = filename_digest
 
+            # earlier versions stored the content under the URI-M digest
+            if len(row) > 2:
+                self.urimap["memento-contents"][urim] = row[2]
+            else:
+                self.urimap["memento-contents"][urim] = filename_digest
+
         for row in memento_error_reader:
             urim = row[0]
             filename_digest = row[1]
@@ -233,51 +882,35 @@ class CollectionModel:
         memento_metadatafile.close()
         memento_errors_metadatafile.close()
 
-    def addTimeMap(self, urit, content, headers):
+        try:
+            with open("{}/boilerplate_failures.csv".format(
+                self.memento_directory)) as boilerplate_failures_file:
+
+                for row in csv.reader(boilerplate_failures_file):
+                    self.boilerplate_failures[row[0]] = row[1]
+
+        except FileNotFoundError:
+            pass
+
+    def addTimeMap(self, urit, content, headers, timemap=None):
         """Adds a TimeMap to the object, parsing it if it is in link-format
         and then stores the TimeMap as a dict in memory and JSON on disk.
 
         If JSON is given as `content`, then it is just converted to a dict.
+        If the dict form of `content` is already known, it can be given as
+        `timemap` so that `content` is not parsed again.
         """
 
         filename_digest = hashlib.sha3_256(bytes(urit, "utf8")).hexdigest()
 
         if type(content) == str:
 
-            try:
-                json_timemap = json.loads(content)
-                fdt = datetime.strptime(
-                    json_timemap["mementos"]["first"]["datetime"],
-                    "%Y-%m-%dT%H:%M:%S"
-                )
-                ldt = datetime.strptime(
-                    json_timemap["mementos"]["last"]["datetime"],
-                    "%Y-%m-%dT%H:%M:%S"
-                )
-
-                json_timemap["mementos"]["first"]["datetime"] = fdt
-                json_timemap["mementos"]["last"]["datetime"] = ldt
-
-                updated_memlist = []
-
-                for mem in json_timemap["mementos"]["list"]:
-                    mdt = datetime.strptime(
-                        mem["datetime"],
-                        "%Y-%m-%dT%H:%M:%S"
-                    )
-
-                    uri = mem["uri"]
-                    updated_memlist.append({
-                        "datetime": mdt,
-                        "uri": uri
-                    })
-
-                json_timemap["mementos"]["list"] = updated_memlist
-
-            except json.JSONDecodeError:
-                json_timemap = convert_LinkTimeMap_to_dict(content, skipErrors=True)
+            if timemap is None:
+                json_timemap = convert_timemap_content_to_dict(content)
+            else:
+                json_timemap = timemap
 
-            self.collection_timemaps[urit] = json_timemap
+            self.collection_timemaps[urit] = make_read_only_timemap(json_timemap)
 
             with open("{}/{}_headers.json".format(
                 self.timemap_directory, filename_digest), 'w') as out:
@@ -285,7 +918,9 @@ class CollectionModel:
                 
             with open("{}/{}.json".format(
                 self.timemap_directory, filename_digest), 'w') as out:
-                json.dump(json_timemap, out, default=json_serial, indent=4)
+                # TimeMaps can list millions of mementos, so no whitespace
+                json.dump(json_timemap, out, default=json_serial,
+                    separators=(',', ':'))
 
             with open("{}/{}.orig".format(
                 self.timemap_directory, filename_digest), 'w') as out:
@@ -304,10 +939,25 @@ class CollectionModel:
         """
             Returns the dict form of TimeMap at `urit` provided that it
             was previously stored via `addTimeMap`.
+
+            The TimeMap is read from disk on first access and the same
+            read-only object is returned on every later call, so callers
+            that need to modify it must copy it with `copy.deepcopy`.
         """
 
+        try:
+            return self.collection_timemaps[urit]
+        except KeyError:
+            filename_digest = self.urimap["timemaps"][urit]
+
+        with open("{}/{}.json".format(
+            self.timemap_directory, filename_digest)) as jsonin:
+            timemap = convert_stored_timemap_to_dict(jsonin.read())
+
         # TODO: there may be too much data for low memory systems
-        return copy.deepcopy( self.collection_timemaps[urit] )
+        self.collection_timemaps[urit] = timemap
+
+        return timemap
 
     def addMemento(self, urim, content, headers):
         """Adds Memento `content` specified by `urim` to the object, along 
@@ -315,18 +965,28 @@ class CollectionModel:
         """
 
         filename_digest = hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
+        content_digest = calculate_content_digest(content)
 
-        with open("{}/{}_headers.json".format(
-            self.memento_directory, filename_digest), 'w') as out:
-            json.dump(headers, out, default=json_serial)
+        self.write_memento_file("{}/{}_headers.json".format(
+            self.memento_directory, filename_digest),
+            bytes(json.dumps(headers, default=json_serial), "utf8"))
 
-        with open("{}/{}.orig".format(
-            self.memento_directory, filename_digest), 'wb') as out:
-            out.write(content)
+        content_filename = "{}/{}.orig".format(
+            self.memento_directory, content_digest)
+
+        # content already stored for another URI-M is shared with it
+        if not self.memento_file_exists(content_filename):
+
+            if self.compression == "zstd":
+                with self.zstd_lock:
+                    self.train_zstd_dictionary(content)
+
+            self.write_memento_file(content_filename, content)
 
         self.urimap["mementos"][urim] = filename_digest
+        self.urimap["memento-contents"][urim] = content_digest
 
-        self.memento_csvwriter.writerow([urim, filename_digest])
+        self.memento_csvwriter.writerow([urim, filename_digest, content_digest])
 
     def addMementoError(self, urim, content, headers, errorinformation):
         """Associates `errorinformation` with memento specified by `urim` to
@@ -353,6 +1013,52 @@ class CollectionModel:
 
         self.memento_errors_csvwriter.writerow([urim, filename_digest])
 
+    def clearMementoErrors(self, urims):
+        """Forgets the errors stored via `addMementoError` for each memento
+        in `urims`, so that they can be acquired again via `addMemento`.
+        """
+
+        cleared = False
+
+        for urim in urims:
+
+            filename_digest = self.urimap["memento-errors"].pop(urim, None)
+
+            if filename_digest is None:
+                continue
+
+            cleared = True
+
+            for suffix in [ "_headers.json", ".orig", "_error_info.txt" ]:
+
+                try:
+                    os.remove("{}/{}{}".format(
+                        self.memento_errors_directory, filename_digest, suffix))
+                except FileNotFoundError:
+                    pass
+
+        if not cleared:
+            return
+
+        # the metadata file only supports appending, so it is rewritten
+        # without the cleared URI-Ms
+        metadata_filename = "{}/metadata.csv".format(self.memento_errors_directory)
+        temporary_filename = "{}.{}.tmp".format(metadata_filename, os.getpid())
+
+        self.memento_errors_metadatafile.close()
+
+        with open(temporary_filename, 'w') as out:
+
+            csvwriter = csv.writer(out)
+
+            for urim in self.urimap["memento-errors"]:
+                csvwriter.writerow([urim, self.urimap["memento-errors"][urim]])
+
+        os.replace(temporary_filename, metadata_filename)
+
+        self.memento_errors_metadatafile = open(metadata_filename, 'a')
+        self.memento_errors_csvwriter = csv.writer(self.memento_errors_metadatafile)
+
     def getMementoContent(self, urim):
         """Returns the HTTP entity of memento at `urim` provided that it
         was previously stored via `addMemento`.
@@ -364,16 +1070,28 @@ class CollectionModel:
         `CollectionModelMementoErrorException` is thrown.
         """
 
+        content_digest = self.getMementoContentDigest(urim)
+
+        return self.read_memento_file("{}/{}.orig".format(
+            self.memento_directory, content_digest))
+
+    def getMementoContentDigest(self, urim):
+        """Returns the digest of the HTTP entity of memento at `urim`,
+        which is shared by all mementos stored with the same content,
+        provided that it was previously stored via `addMemento`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+        """
+
         if urim in self.urimap["memento-errors"]:
             raise CollectionModelMementoErrorException
 
         try:
-
-            filename_digest = self.urimap["mementos"][urim]
-
-            with open("{}/{}.orig".format(
-                self.memento_directory, filename_digest), 'rb') as fileinput:
-                data = fileinput.read()
+            return self.urimap["memento-contents"][urim]
 
         except KeyError:
             err_msg = "The URI-M [{}] is not saved in this " \
@@ -383,8 +1101,6 @@ class CollectionModel:
 
             raise CollectionModelNoSuchMementoException(err_msg)
 
-        return data
-
     def getMementoErrorInformation(self, urim):
         """Returns the error information associated with `urim`, provided that
         it was previously stored via `addMementoError`.
@@ -427,6 +1143,8 @@ class CollectionModel:
 
         If the boilerplate removal process produces an error for `urim`,
         then CollectionModelBoilerPlateRemovalFailureException is thrown.
+        The error is recorded via `addBoilerplateRemovalFailure`, so later
+        calls, in this run or later ones, throw it again without parsing.
         """
 
         if urim in self.urimap["memento-errors"]:
@@ -439,34 +1157,38 @@ class CollectionModel:
 
         try:
 
-            filename_digest = self.urimap["mementos"][urim]
+            content_digest = self.urimap["memento-contents"][urim]
+
+            errormsg = self.boilerplate_failures.get(content_digest)
+
+            if errormsg is not None:
+                raise CollectionModelBoilerPlateRemovalFailureException(errormsg)
 
             boilerplate_filename = "{}/{}.orig.noboilerplate".format(
-                self.memento_directory, filename_digest)
+                self.memento_directory, content_digest)
 
-            if not os.path.exists(boilerplate_filename):
+            try:
+                content_without_boilerplate = \
+                    self.read_memento_file(boilerplate_filename)
+
+            except FileNotFoundError:
 
                 logger.debug("Boilerplate content has not yet been "
                     "generated, generating...")
 
-                with open("{}/{}.orig".format(
-                    self.memento_directory, filename_digest), 'rb') as fileinput:
-                    data = fileinput.read()
+                data = self.read_memento_file("{}/{}.orig".format(
+                    self.memento_directory, content_digest))
 
                 try:
-                    paragraphs = justext(data, get_stoplist('English'))
-
+                    content_without_boilerplate = \
+                        remove_boilerplate_from_content(data)
 
-                    with open(boilerplate_filename, 'wb') as bpfile:
-                        
-                        for paragraph in paragraphs:
-                            bpfile.write(bytes("{}\n".format(paragraph.text), "utf8"))
+                except CollectionModelBoilerPlateRemovalFailureException as e:
+                    self.addBoilerplateRemovalFailure(urim, str(e))
+                    raise
 
-                except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError) as e:
-                    raise CollectionModelBoilerPlateRemovalFailureException(repr(e))
-
-            with open(boilerplate_filename, 'rb') as bpfile:
-                content_without_boilerplate = bpfile.read()
+                self.addMementoContentWithoutBoilerplate(
+                    urim, content_without_boilerplate)
                     
         except KeyError:
 
@@ -481,6 +1203,236 @@ class CollectionModel:
 
         return content_without_boilerplate
 
+    def addMementoContentWithoutBoilerplate(self, urim, content):
+        """Stores `content`, the HTTP entity of the memento at `urim` with
+        all boilerplate removed, so that `getMementoContentWithoutBoilerplate`
+        need not generate it.
+        """
+
+        try:
+            content_digest = self.urimap["memento-contents"][urim]
+
+        except KeyError:
+            raise CollectionModelNoSuchMementoException(
+                "The URI-M [{}] is not saved in this collection model".format(
+                    urim))
+
+        self.write_memento_file("{}/{}.orig.noboilerplate".format(
+            self.memento_directory, content_digest), content)
+
+    def hasMementoContentWithoutBoilerplate(self, urim):
+        """Returns True if the content without boilerplate of the memento
+        at `urim` is stored, so `getMementoContentWithoutBoilerplate` need
+        not generate it.
+        """
+
+        content_digest = self.urimap["memento-contents"].get(urim)
+
+        if content_digest is None or urim in self.urimap["memento-errors"]:
+            return False
+
+        return self.memento_file_exists("{}/{}.orig.noboilerplate".format(
+            self.memento_directory, content_digest))
+
+    def addBoilerplateRemovalFailure(self, urim, errormsg):
+        """Records `errormsg`, the reason boilerplate could not be removed
+        from the memento at `urim`, so that later attempts can be skipped.
+        """
+
+        try:
+            content_digest = self.urimap["memento-contents"][urim]
+
+        except KeyError:
+            raise CollectionModelNoSuchMementoException(
+                "The URI-M [{}] is not saved in this collection model".format(
+                    urim))
+
+        self.boilerplate_failures[content_digest] = errormsg
+
+        self.boilerplate_failures_csvwriter.writerow([content_digest, errormsg])
+
+        # worker processes append to the same file, so each row is
+        # written whole as soon as it is known
+        self.boilerplate_failures_file.flush()
+
+    def getBoilerplateRemovalFailure(self, urim):
+        """Returns the error message recorded via
+        `addBoilerplateRemovalFailure` for the memento at `urim`, or None if
+        no failure was recorded.
+        """
+
+        content_digest = self.urimap["memento-contents"].get(urim)
+
+        return self.boilerplate_failures.get(content_digest)
+
+    def precomputeBoilerplate(self, workers=None):
+        """Removes the boilerplate from the content of every memento stored
+        in this object on a pool of `workers` processes, storing the results
+        so that `getMementoContentWithoutBoilerplate` need not generate them.
+
+        Content whose boilerplate was removed before is skipped, as is
+        content that failed before, and failures are recorded via
+        `addBoilerplateRemovalFailure`. Each distinct content is only
+        processed once.
+
+        Returns a dict with the number of contents processed, failed, and
+        skipped, and the seconds taken.
+        """
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        start = time.perf_counter()
+
+        urims_by_content_digest = {}
+        skipped_content_digests = set()
+
+        for urim in self.getMementoURIList():
+
+            try:
+                content_digest = self.getMementoContentDigest(urim)
+            except CollectionModelException:
+                continue
+
+            if content_digest in urims_by_content_digest or \
+                content_digest in skipped_content_digests:
+                continue
+
+            if self.hasMementoContentWithoutBoilerplate(urim) or \
+                self.getBoilerplateRemovalFailure(urim) is not None:
+                skipped_content_digests.add(content_digest)
+            else:
+                urims_by_content_digest[content_digest] = urim
+
+        logger.info("Removing boilerplate from {} memento contents with {} "
+            "workers, {} were done before".format(len(urims_by_content_digest),
+            workers, len(skipped_content_digests)))
+
+        failed = 0
+
+        def store_result(result):
+
+            content_digest, content_without_boilerplate, errormsg = result
+            urim = urims_by_content_digest[content_digest]
+
+            if errormsg is None:
+                self.addMementoContentWithoutBoilerplate(
+                    urim, content_without_boilerplate)
+                return 0
+
+            logger.warning("Failed to remove boilerplate from URI-M {}: "
+                "{}".format(urim, errormsg))
+
+            self.addBoilerplateRemovalFailure(urim, errormsg)
+            return 1
+
+        tasks = ( (content_digest, self.getMementoContent(urim))
+            for content_digest, urim in urims_by_content_digest.items() )
+
+        if workers > 1:
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+
+                # only a few contents per worker are read ahead of the workers
+                futures = set()
+
+                for task in tasks:
+
+                    if len(futures) >= workers * precompute_queue_size:
+
+                        done, futures = concurrent.futures.wait(futures,
+                            return_when=concurrent.futures.FIRST_COMPLETED)
+
+                        for future in done:
+                            failed += store_result(future.result())
+
+                    futures.add(executor.submit(remove_boilerplate_in_worker, task))
+
+                for future in concurrent.futures.as_completed(futures):
+                    failed += store_result(future.result())
+
+        else:
+
+            for task in tasks:
+                failed += store_result(remove_boilerplate_in_worker(task))
+
+        self.flush()
+
+        elapsed = time.perf_counter() - start
+        processed = len(urims_by_content_digest)
+
+        logger.info("Removed boilerplate from {} memento contents in {:.2f} "
+            "seconds, {:.1f} per second, {} failed".format(processed, elapsed,
+            processed / elapsed if elapsed > 0 else 0, failed))
+
+        return {
+            "processed": processed,
+            "failed": failed,
+            "skipped": len(skipped_content_digests),
+            "seconds": elapsed
+        }
+
+    def getTokenCacheFilename(self, urim, stemming, remove_boilerplate):
+        """Returns the name of the file holding the tokens of the memento
+        at `urim` for the given `stemming` and `remove_boilerplate` settings.
+        Mementos with the same content share this file.
+        """
+
+        filename = "{}/{}.orig".format(
+            self.memento_directory, self.urimap["memento-contents"][urim])
+
+        if remove_boilerplate:
+            filename += ".noboilerplate"
+
+        if stemming:
+            filename += ".stemmed"
+
+        return filename + ".tokens"
+
+    def getMementoTokens(self, urim, stemming=True, remove_boilerplate=True):
+        """Returns the tokens of the memento at `urim` produced with the 
+        given `stemming` and `remove_boilerplate` settings, provided that
+        they were previously stored via `addMementoTokens`.
+
+        Returns None if no such tokens are stored.
+        """
+
+        if urim in self.urimap["memento-errors"] or \
+            urim not in self.urimap["mementos"]:
+            return None
+
+        try:
+            with open(self.getTokenCacheFilename(
+                urim, stemming, remove_boilerplate), 'rb') as tokeninput:
+                data = tokeninput.read()
+
+        except FileNotFoundError:
+            return None
+
+        return deserialize_tokens(data)
+
+    def addMementoTokens(self, urim, tokens, stemming=True, remove_boilerplate=True):
+        """Stores the `tokens` produced from the memento at `urim` with the
+        given `stemming` and `remove_boilerplate` settings so that later 
+        runs need not tokenize the memento again.
+        """
+
+        try:
+            filename = self.getTokenCacheFilename(urim, stemming, remove_boilerplate)
+
+        except KeyError:
+            raise CollectionModelNoSuchMementoException(
+                "The URI-M [{}] is not saved in this collection model".format(
+                    urim))
+
+        # write and rename so that concurrent readers never see partial data
+        temporary_filename = "{}.{}.tmp".format(filename, os.getpid())
+
+        with open(temporary_filename, 'wb') as tokenoutput:
+            tokenoutput.write(serialize_tokens(tokens))
+
+        os.replace(temporary_filename, filename)
+
     def getHeaders(self, objecttype, uri):
         """Returns the headers associated with URI `uri`.
         `objecttype` must be set to timemaps if headers
@@ -496,9 +1448,8 @@ class CollectionModel:
 
             filename_digest = self.urimap[objecttype][uri]
 
-            with open("{}/{}_headers.json".format(
-                directory, filename_digest)) as fileinput:
-                data = json.load(fileinput)
+            data = json.loads(self.read_memento_file("{}/{}_headers.json".format(
+                directory, filename_digest)))
 
         except KeyError:
             raise CollectionModelException(
@@ -530,6 +1481,13 @@ class CollectionModel:
             list(self.urimap["mementos"].keys())
         )
 
+    def getMementoErrorURIList(self):
+        """Returns a list of all URI-Ms with errors stored in this object."""
+
+        return copy.deepcopy(
+            list(self.urimap["memento-errors"].keys())
+        )
+
     def getTimeMapURIList(self):
         """Returns a list of all URI-Ts stored in this object."""
 
@@ -0,0 +1,752 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.columnar_measuremodel
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module stores the results of the measures in columns of numbers
+rather than in nested dicts, which needs far less memory for collections
+with hundreds of thousands of mementos.
+"""
+
+from array import array
+
+import numpy
+
+from .measuremodel import MeasureModel, MeasureModelException, \
+    MeasureModelNoSuchMemento, MeasureModelNoSuchTimeMap, \
+    MeasureModelNoSuchMeasure, MeasureModelNoSuchMeasureType, \
+    topic_statuses, topic_status_codes, compare_scores, combine_topic_statuses
+
+# flags kept for each memento
+ROW_INITIALIZED = 1
+ROW_MEASURED = 2
+ROW_SIMHASH = 4
+
+# flags kept for each memento and measure
+MEASURE_INITIALIZED = 1
+SCORE_SET = 2
+SCORE_INTEGER = 4
+STEMMED_SET = 8
+STEMMED = 16
+TOKENIZED_SET = 32
+TOKENIZED = 64
+REMOVED_BOILERPLATE_SET = 128
+REMOVED_BOILERPLATE = 256
+TOPIC_STATUS_SHIFT = 9
+TOPIC_STATUS_MASK = 3 << TOPIC_STATUS_SHIFT
+
+class ColumnarMeasureModel(MeasureModel):
+    """
+        This class stores the same data as MeasureModel and has the same
+        methods, so that it can be used with the measurement functions of
+        timemap_measures and the output functions of MeasureModel.
+
+        Each memento stored under a URI-T is given a row number. Memento
+        data, such as content lengths and simhashes, are kept in one
+        array per field, indexed by row. Each measure has an array of
+        scores and an array of flags, indexed by row, whose bits record
+        whether the content was stemmed, tokenized, or had its boilerplate
+        removed, as well as the topic status. Error messages, including
+        those stored in place of a simhash, are kept in dicts, as they are
+        rare.
+
+        The thresholds are applied to these arrays directly with numpy.
+
+        The `scoremodel` attribute of MeasureModel is generated on demand.
+    """
+
+    def __init__(self):
+
+        # URI-T -> { URI-M -> row }, in the order they were stored
+        self.timemap_rows = {}
+
+        # URI-M -> row of the TimeMap the memento was last stored under
+        self.memento_rows = {}
+
+        self.row_flags = array('B')
+        self.overall_topic_statuses = array('B')
+        self.content_lengths = []
+        self.simhashes = array('Q')
+
+        # row -> values stored as a simhash that are not one, such as the
+        # messages of metadata_calcluations for mementos with errors
+        self.simhash_errors = {}
+        self.language_codes = array('H')
+        self.memento_datetimes = []
+
+        # languages are stored as their index in this list
+        self.languages = [ None ]
+        self.language_indexes = { None: 0 }
+
+        # (measuretype, measure) -> column, including those with only errors
+        self.measure_columns = {}
+        self.scores = []
+        self.flags = []
+
+        self.timemap_access_errors = {}
+        self.memento_access_errors = {}
+        self.memento_measurement_errors = {}
+
+        self.measures = []
+
+    @property
+    def scoremodel(self):
+        """Generates the nested dict that MeasureModel stores its scores in."""
+
+        scoremodel = {}
+
+        for urit, rows in self.timemap_rows.items():
+
+            scoremodel[urit] = {}
+
+            for urim, row in rows.items():
+
+                mementodata = {}
+
+                if self.row_flags[row] & ROW_INITIALIZED:
+                    mementodata["raw simhash value"] = self.get_row_simhash(row)
+                    mementodata["content length"] = self.content_lengths[row]
+
+                if self.memento_datetimes[row] is not None:
+                    mementodata["memento-datetime"] = self.memento_datetimes[row]
+
+                if self.language_codes[row] != 0:
+                    mementodata["language"] = self.languages[self.language_codes[row]]
+
+                for measuretype, measure in self.measure_columns:
+
+                    column = self.measure_columns[(measuretype, measure)]
+
+                    if not self.get_flags(column, row) & MEASURE_INITIALIZED:
+                        continue
+
+                    mementodata.setdefault(measuretype, {})
+                    mementodata[measuretype][measure] = {
+                        "comparison score": self.get_column_score(column, row),
+                        "stemmed": self.get_column_flag(
+                            column, row, STEMMED_SET, STEMMED),
+                        "tokenized": self.get_column_flag(
+                            column, row, TOKENIZED_SET, TOKENIZED),
+                        "removed boilerplate": self.get_column_flag(
+                            column, row, REMOVED_BOILERPLATE_SET, REMOVED_BOILERPLATE),
+                        "topic status": topic_statuses[
+                            (self.get_flags(column, row) & TOPIC_STATUS_MASK) >> TOPIC_STATUS_SHIFT]
+                    }
+
+                if self.row_flags[row] & ROW_MEASURED:
+                    mementodata["overall topic status"] = \
+                        topic_statuses[self.overall_topic_statuses[row]]
+
+                scoremodel[urit][urim] = mementodata
+
+        return scoremodel
+
+    def get_row(self, urit, urim):
+        """Returns the row of `urim`, belonging to a given `urit`, adding
+        it if it is not stored yet.
+        """
+
+        rows = self.timemap_rows.setdefault(urit, {})
+
+        try:
+            row = rows[urim]
+        except KeyError:
+            row = len(self.row_flags)
+            rows[urim] = row
+
+            self.row_flags.append(0)
+            self.overall_topic_statuses.append(0)
+            self.content_lengths.append(None)
+            self.simhashes.append(0)
+            self.language_codes.append(0)
+            self.memento_datetimes.append(None)
+
+        self.memento_rows[urim] = row
+
+        return row
+
+    def find_row(self, urit, urim):
+        """Returns the row of `urim`, belonging to a given `urit`, raising
+        an exception if either is not stored.
+        """
+
+        try:
+            rows = self.timemap_rows[urit]
+        except KeyError:
+            raise MeasureModelNoSuchTimeMap(urit)
+
+        try:
+            return rows[urim]
+        except KeyError:
+            raise MeasureModelNoSuchMemento(urim)
+
+    def find_memento_row(self, urim):
+        """Returns the row of `urim` for the TimeMap it was last stored
+        under, raising an exception if it is not stored.
+        """
+
+        try:
+            return self.memento_rows[urim]
+        except KeyError:
+            raise MeasureModelNoSuchMemento(urim)
+
+    def get_column(self, measuretype, measure):
+        """Returns the column of `measuretype` and `measure`, adding it if
+        it is not stored yet.
+        """
+
+        try:
+            return self.measure_columns[(measuretype, measure)]
+        except KeyError:
+            column = len(self.scores)
+            self.measure_columns[(measuretype, measure)] = column
+            self.scores.append(array('d'))
+            self.flags.append(array('H'))
+
+            return column
+
+    def find_column(self, row, measuretype, measure):
+        """Returns the column of `measuretype` and `measure`, raising an
+        exception if it has not been stored for `row`.
+        """
+
+        column = self.measure_columns.get((measuretype, measure))
+
+        if column is not None and self.get_flags(column, row) & MEASURE_INITIALIZED:
+            return column
+
+        for (stored_measuretype, stored_measure), stored_column in \
+            self.measure_columns.items():
+
+            if stored_measuretype == measuretype and \
+                self.get_flags(stored_column, row) & MEASURE_INITIALIZED:
+                raise MeasureModelNoSuchMeasure(measure)
+
+        raise MeasureModelNoSuchMeasureType(measuretype)
+
+    def get_flags(self, column, row):
+
+        flags = self.flags[column]
+
+        if row < len(flags):
+            return flags[row]
+
+        return 0
+
+    def update_flags(self, column, row, clear, set_bits):
+        """Clears the bits in `clear` and then sets the bits in `set_bits`
+        for `row` in `column`.
+        """
+
+        flags = self.flags[column]
+
+        if row >= len(flags):
+            missing = len(self.row_flags) - len(flags)
+            flags.extend([0] * missing)
+            self.scores[column].extend([0.0] * missing)
+
+        flags[row] = (flags[row] & ~clear) | set_bits
+
+    def get_column_flag(self, column, row, set_bit, value_bit):
+
+        flags = self.get_flags(column, row)
+
+        if not flags & set_bit:
+            return None
+
+        return bool(flags & value_bit)
+
+    def set_column_flag(self, column, row, set_bit, value_bit, value):
+
+        if value is None:
+            self.update_flags(column, row, set_bit | value_bit, 0)
+        elif value:
+            self.update_flags(column, row, 0, set_bit | value_bit)
+        else:
+            self.update_flags(column, row, value_bit, set_bit)
+
+    def get_column_score(self, column, row):
+
+        flags = self.get_flags(column, row)
+
+        if not flags & SCORE_SET:
+            return None
+
+        score = self.scores[column][row]
+
+        if flags & SCORE_INTEGER:
+            return int(score)
+
+        return score
+
+    def get_row_simhash(self, row):
+
+        if self.row_flags[row] & ROW_SIMHASH:
+            return self.simhashes[row]
+
+        return self.simhash_errors.get(row)
+
+    def initialize_scoremodel_for_urit_urim(self, urit, urim):
+        """Sets up the row for scores of URI-Ts and URI-Ms."""
+
+        row = self.get_row(urit, urim)
+
+        self.row_flags[row] |= ROW_INITIALIZED
+        self.timemap_access_errors.pop(urit, None)
+
+        return row
+
+    def initialize_scoremodel_for_keys(self, urit, urim, measuretype, measure):
+        """Sets up the row and column for scores and errors of
+         URI-Ts and URI-Ms."""
+
+        row = self.initialize_scoremodel_for_urit_urim(urit, urim)
+        column = self.get_column(measuretype, measure)
+
+        self.update_flags(column, row, 0, MEASURE_INITIALIZED)
+
+        self.row_flags[row] |= ROW_MEASURED
+        self.overall_topic_statuses[row] = 0
+
+        if (measuretype, measure) not in self.measures:
+            self.measures.append( (measuretype, measure) )
+
+        return row, column
+
+    def set_score(self, urit, urim, measuretype, measure, score):
+        """Sets the `score` for a given `urim`, belonging to a given `urit`,
+        associated with a given `measuretype` and `measure`.
+        """
+
+        row, column = self.initialize_scoremodel_for_keys(
+            urit, urim, measuretype, measure)
+
+        if score is None:
+            self.update_flags(column, row, SCORE_SET | SCORE_INTEGER, 0)
+
+        else:
+            self.scores[column][row] = score
+
+            if isinstance(score, int) and not isinstance(score, bool):
+                self.update_flags(column, row, 0, SCORE_SET | SCORE_INTEGER)
+            else:
+                self.update_flags(column, row, SCORE_INTEGER, SCORE_SET)
+
+    def get_score(self, urit, urim, measuretype, measure):
+        """Gets the `score` for a given `urim`, belonging to a given `urit`,
+        associated with a given `measuretype` and `measure`.
+        """
+
+        row = self.find_row(urit, urim)
+        column = self.find_column(row, measuretype, measure)
+
+        return self.get_column_score(column, row)
+
+    def set_content_length(self, urit, urim, content_length):
+        """Sets the `content_length` for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        row = self.initialize_scoremodel_for_urit_urim(urit, urim)
+        self.content_lengths[row] = content_length
+
+    def get_content_length(self, urit, urim):
+        """Gets the content length for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        return self.content_lengths[self.find_row(urit, urim)]
+
+    def set_simhash(self, urit, urim, simhash_value):
+        """Sets the `simhash_value` for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        row = self.initialize_scoremodel_for_urit_urim(urit, urim)
+
+        self.simhash_errors.pop(row, None)
+
+        if isinstance(simhash_value, int) and not isinstance(simhash_value, bool):
+            self.simhashes[row] = simhash_value
+            self.row_flags[row] |= ROW_SIMHASH
+        else:
+            self.row_flags[row] &= ~ROW_SIMHASH
+
+            if simhash_value is not None:
+                self.simhash_errors[row] = simhash_value
+
+    def set_memento_datetime(self, urit, urim, memento_datetime):
+        """Sets the `memento-datetime` value for a given `urim`, belonging to
+        a given `urit`.
+        """
+
+        row = self.initialize_scoremodel_for_urit_urim(urit, urim)
+        self.memento_datetimes[row] = memento_datetime
+
+    def set_language(self, urit, urim, language):
+        """Sets the `language` for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        row = self.initialize_scoremodel_for_urit_urim(urit, urim)
+
+        if language not in self.language_indexes:
+            self.language_indexes[language] = len(self.languages)
+            self.languages.append(language)
+
+        self.language_codes[row] = self.language_indexes[language]
+
+    def get_simhash(self, urit, urim):
+        """Gets the simhash value for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        return self.get_row_simhash(self.find_row(urit, urim))
+
+    def get_language(self, urit, urim):
+        """Gets the language value for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        return self.languages[self.language_codes[self.find_row(urit, urim)]]
+
+    def get_memento_datetime(self, urit, urim):
+        """Gets the memento-datetime for a given `urim`, belonging to a given
+        `urit`.
+        """
+
+        return self.memento_datetimes[self.find_row(urit, urim)]
+
+    def set_TimeMap_access_error(self, urit, errormsg):
+        """Associates `errormsg` with a given `urit` when the error involves
+        failure to access (i.e., download) a TimeMap.
+        """
+
+        self.timemap_access_errors[urit] = errormsg
+
+        # make sure there is an entry for get_TimeMap_URIs
+        self.timemap_rows.setdefault(urit, {})
+
+    def get_TimeMap_access_error_message(self, urit):
+        """Gets the error message associated with a given `urit` when the
+        error involves failure to access (i.e., download) a TimeMap.
+
+        Returns None if no error association exists.
+        """
+
+        if urit not in self.timemap_rows:
+            raise KeyError(urit)
+
+        return self.timemap_access_errors.get(urit)
+
+    def set_Memento_access_error(self, urit, urim, errormsg):
+        """Associates `errormsg` with a given `urit` and `urim` when the
+        error involves failure to access (i.e., download) a memento.
+        """
+
+        row = self.get_row(urit, urim)
+
+        self.memento_access_errors[row] = errormsg
+
+        # there can be an access error or a measurement error, not both
+        for column in range(0, len(self.scores)):
+            self.memento_measurement_errors.pop((column, row), None)
+
+        # because we set an error on the memento,
+        # there cannot be errors on the timemap
+        self.timemap_access_errors.pop(urit, None)
+
+    def get_Memento_access_error_message(self, urim):
+        """Gets the error message associated with a given `urim` when the
+        error involves failure to access (i.e., download) a memento.
+
+        Returns None if no error association exists.
+        """
+
+        return self.memento_access_errors.get(self.memento_rows[urim])
+
+    def set_Memento_measurement_error(self, urit, urim, measuretype, measurename, errormsg):
+        """Associates `errormsg` with a given `urim`, `measuretype`,
+        and `measurename` when the error involves failure of one of the
+        measures when processing a memento.
+        """
+
+        row = self.get_row(urit, urim)
+        column = self.get_column(measuretype, measurename)
+
+        self.memento_measurement_errors[(column, row)] = errormsg
+
+        # there can be an access error or a measurement error, not both
+        self.memento_access_errors.pop(row, None)
+
+        # because we set an error on the memento,
+        # there cannot be errors on the timemap
+        self.timemap_access_errors.pop(urit, None)
+
+    def get_Memento_measurement_error_message(self, urim, measuretype, measurename):
+        """Gets the error message associated with a given `urim`, `measuretype`,
+        and `measurename` when the error involves failure of one of the
+        measures when processing a memento.
+
+        Returns None if no error association exists.
+        """
+
+        row = self.memento_rows[urim]
+        column = self.measure_columns.get((measuretype, measurename))
+
+        return self.memento_measurement_errors.get((column, row))
+
+    def set_stemmed(self, urit, urim, measuretype, measure, stemmed):
+        """Sets that a given `urit`, `urim` was `stemmed` while using
+        `measuretype` and `measure`.
+        """
+
+        row, column = self.initialize_scoremodel_for_keys(
+            urit, urim, measuretype, measure)
+        self.set_column_flag(column, row, STEMMED_SET, STEMMED, stemmed)
+
+    def get_stemmed(self, urit, urim, measuretype, measure):
+        """Gets that a given `urit`, `urim` was `stemmed` while using
+        `measuretype` and `measure`.
+
+        Returns None if not set.
+        """
+
+        row = self.find_row(urit, urim)
+        column = self.find_column(row, measuretype, measure)
+
+        return self.get_column_flag(column, row, STEMMED_SET, STEMMED)
+
+    def set_tokenized(self, urit, urim, measuretype, measure, tokenized):
+        """Sets that a given `urit`, `urim` was `tokenized` while using
+        `measuretype` and `measure`.
+        """
+
+        row, column = self.initialize_scoremodel_for_keys(
+            urit, urim, measuretype, measure)
+        self.set_column_flag(column, row, TOKENIZED_SET, TOKENIZED, tokenized)
+
+    def get_tokenized(self, urit, urim, measuretype, measure):
+        """Gets that a given `urit`, `urim` was `tokenized` while using
+        `measuretype` and `measure`.
+
+        Returns None if not set.
+        """
+
+        row = self.find_row(urit, urim)
+        column = self.find_column(row, measuretype, measure)
+
+        return self.get_column_flag(column, row, TOKENIZED_SET, TOKENIZED)
+
+    def set_removed_boilerplate(self, urit, urim, measuretype, measure, removed_boilerplate):
+        """Sets that a given `urit`, `urim` was had its boilerplate removed
+        while using `measuretype` and `measure`.
+        """
+
+        row, column = self.initialize_scoremodel_for_keys(
+            urit, urim, measuretype, measure)
+        self.set_column_flag(column, row, REMOVED_BOILERPLATE_SET,
+            REMOVED_BOILERPLATE, removed_boilerplate)
+
+    def get_removed_boilerplate(self, urit, urim, measuretype, measure):
+        """Gets that a given `urit`, `urim` was had its boilerplate removed
+        while using `measuretype` and `measure`.
+
+        Returns None if not set.
+        """
+
+        row = self.find_row(urit, urim)
+        column = self.find_column(row, measuretype, measure)
+
+        return self.get_column_flag(column, row,
+            REMOVED_BOILERPLATE_SET, REMOVED_BOILERPLATE)
+
+    def get_TimeMap_URIs(self):
+        """Returns the list of TimeMap URIs (URI-Ts) that have been stored
+        in this object.
+        """
+
+        return list(self.timemap_rows.keys())
+
+    def get_Memento_URIs_in_TimeMap(self, urit):
+        """Returns the list of memento URIs (URI-Ms) that have been stored
+        in this object and associated with TimeMap `urit`.
+        """
+
+        return list(self.timemap_rows[urit].keys())
+
+    def get_off_topic_status_by_measure(self, urim, measuretype, measurename):
+        """Returns the off-topic status of `urim` for `measuretype` and
+        `measurename`.
+
+        Returns None if no off-topic status has been associated.
+        """
+
+        row = self.find_memento_row(urim)
+        column = self.find_column(row, measuretype, measurename)
+
+        return topic_statuses[
+            (self.get_flags(column, row) & TOPIC_STATUS_MASK) >> TOPIC_STATUS_SHIFT]
+
+    def set_off_topic_status_by_measure(self, urit, urim, measuretype, measurename, status):
+        """Sets the off-topic `status` of `urim`, belonging to a given `urit`,
+        for `measuretype` and `measurename`.
+        """
+
+        try:
+            code = topic_status_codes[status]
+        except KeyError:
+            raise MeasureModelException("Unsupported topic status {}".format(status))
+
+        row = self.find_row(urit, urim)
+        column = self.find_column(row, measuretype, measurename)
+
+        self.update_flags(column, row, TOPIC_STATUS_MASK,
+            code << TOPIC_STATUS_SHIFT)
+
+    def set_overall_off_topic_status(self, urit, urim, status):
+        """Sets the off-topic `status` of `urim`, belonging to a given `urit`,
+        for all measures.
+        """
+
+        try:
+            code = topic_status_codes[status]
+        except KeyError:
+            raise MeasureModelException("Unsupported topic status {}".format(status))
+
+        self.overall_topic_statuses[self.find_row(urit, urim)] = code
+
+    def get_overall_off_topic_status(self, urim):
+        """Returns the off-topic status of `urim` for all measures.
+
+        Returns None if no off-topic status has been associated.
+        """
+
+        return topic_statuses[self.overall_topic_statuses[self.memento_rows[urim]]]
+
+    def get_row_mementos(self):
+        """Returns the (URI-T, URI-M) of each row, in row order."""
+
+        row_mementos = [ None ] * len(self.row_flags)
+
+        for urit, rows in self.timemap_rows.items():
+            for urim, row in rows.items():
+                row_mementos[row] = (urit, urim)
+
+        return row_mementos
+
+    def get_error_free_rows(self, column):
+        """Returns a boolean numpy array marking the rows without access
+        errors or measurement errors for `column`.
+        """
+
+        error_free = numpy.ones(len(self.row_flags), dtype=bool)
+
+        for urit, errormsg in self.timemap_access_errors.items():
+            if errormsg:
+                error_free[list(self.timemap_rows[urit].values())] = False
+
+        for row, errormsg in self.memento_access_errors.items():
+            if errormsg:
+                error_free[row] = False
+
+        for (error_column, row), errormsg in self.memento_measurement_errors.items():
+            if error_column == column and errormsg:
+                error_free[row] = False
+
+        return error_free
+
+    def get_column_data(self, column):
+        """Returns numpy arrays of the scores and topic status codes of
+        every row for `column`, along with a boolean numpy array marking
+        the rows that have a score and no errors.
+        """
+
+        rowcount = len(self.row_flags)
+
+        scores = numpy.full(rowcount, numpy.nan)
+        status_codes = numpy.zeros(rowcount, dtype=numpy.uint8)
+        measured = numpy.zeros(rowcount, dtype=bool)
+
+        if column is None:
+            return scores, status_codes, measured
+
+        flags = numpy.frombuffer(self.flags[column], dtype=numpy.uint16)
+        stored = len(flags)
+        has_score = (flags & SCORE_SET) != 0
+
+        scores[:stored] = numpy.where(has_score,
+            numpy.frombuffer(self.scores[column], dtype=numpy.float64), numpy.nan)
+        status_codes[:stored] = (flags & TOPIC_STATUS_MASK) >> TOPIC_STATUS_SHIFT
+        measured[:stored] = has_score
+
+        measured &= self.get_error_free_rows(column)
+
+        return scores, status_codes, measured
+
+    def get_measure_data(self, measuretype, measurename):
+        """Returns the (URI-T, URI-M) of each memento, a numpy array of their
+        scores for `measuretype` and `measurename`, a numpy array of their
+        topic status codes for that measure, and a boolean numpy array
+        marking the mementos that have a score and no errors.
+        """
+
+        column = self.measure_columns.get((measuretype, measurename))
+
+        return (self.get_row_mementos(),) + self.get_column_data(column)
+
+    def calculate_offtopic_by_measure(self, measuretype, measurename, threshold, comparison):
+        """Determines, for all TimeMaps and mementos at once, if the
+        resulting scores for `measuretype` and `measurename` exceed the
+        numeric value stored in `threshold` as indicated by `comparison`.
+
+        Valid values of `comparison` are <, >, ==, or !=.
+        """
+
+        column = self.measure_columns.get((measuretype, measurename))
+
+        if column is None:
+            return super().calculate_offtopic_by_measure(
+                measuretype, measurename, threshold, comparison)
+
+        scores, status_codes, measured = self.get_column_data(column)
+
+        offtopic = compare_scores(scores, threshold, comparison)
+
+        status_codes = numpy.where(offtopic,
+            topic_status_codes["off-topic"], topic_status_codes["on-topic"])
+
+        # the flags are updated in place
+        flags = numpy.frombuffer(self.flags[column], dtype=numpy.uint16)
+        measured = measured[:len(flags)]
+
+        flags[measured] = \
+            (flags[measured] & numpy.uint16(0xFFFF ^ TOPIC_STATUS_MASK)) | \
+            (status_codes[:len(flags)][measured].astype(numpy.uint16) << TOPIC_STATUS_SHIFT)
+
+    def calculate_overall_offtopic_status(self):
+        """Determines, for all TimeMaps and mementos at once, if a memento
+        was marked off-topic in any of its measures.
+        """
+
+        if len(self.measures) == 0:
+            return
+
+        all_status_codes = []
+        all_measured = []
+
+        for measuretype, measurename in self.get_Measures():
+
+            scores, status_codes, measured = self.get_column_data(
+                self.measure_columns[(measuretype, measurename)])
+
+            all_status_codes.append(status_codes)
+            all_measured.append(measured)
+
+        overall_status_codes, has_status = combine_topic_statuses(
+            numpy.array(all_status_codes), numpy.array(all_measured))
+
+        overall_topic_statuses = numpy.frombuffer(
+            self.overall_topic_statuses, dtype=numpy.uint8)
+        overall_topic_statuses[has_status] = overall_status_codes[has_status]
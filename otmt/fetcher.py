@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.fetcher
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module downloads TimeMaps and mementos concurrently while limiting the
+number of simultaneous requests sent to each archive.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+
+from functools import partial
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from .archive_information import archive_mappings
+
+logger = logging.getLogger(__name__)
+
+default_concurrency = 32
+default_host_concurrency = 8
+default_retries = 10
+default_backoff_factor = 0.3
+default_status_forcelist = (429, 500, 502, 503, 504)
+
+class AsyncFetcher:
+    """
+        This class issues HTTP requests from an asyncio event loop running
+        in a background thread. At most `concurrency` requests are in
+        flight at once, and at most `host_concurrency` of those go to the
+        same archive. Archives are recognized by the domain names in
+        `archive_mappings`, other URIs are grouped by host. The limit for
+        specific archives or hosts can be changed via `host_limits`.
+
+        Requests that fail to connect or that return a status in
+        `status_forcelist` are retried up to `retries` times, waiting
+        `backoff_factor` * 2 ** attempt seconds between attempts, or as
+        long as the server asks via Retry-After.
+
+        Like FuturesSession from requests-futures, `get` and `head` return
+        futures, so this class can be used wherever a FuturesSession was
+        used. Leaving a with block waits for all requests to finish.
+
+        Requests are made with a single pooled requests Session, so an
+        installed requests_cache still applies.
+    """
+
+    def __init__(self, concurrency=default_concurrency,
+        host_concurrency=default_host_concurrency, host_limits=None,
+        retries=default_retries, backoff_factor=default_backoff_factor,
+        status_forcelist=default_status_forcelist, session=None):
+
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.host_limits = host_limits if host_limits is not None else {}
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+
+        if session is None:
+            session = requests.Session()
+
+            # retries are handled by this class so they do not hold a slot
+            adapter = HTTPAdapter(
+                pool_connections=len(archive_mappings) + 1,
+                pool_maxsize=concurrency,
+                max_retries=0
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+        self.session = session
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency
+        )
+
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.pending = set()
+
+        # these belong to the event loop and are only touched from within it
+        self.global_semaphore = None
+        self.host_semaphores = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_host_key(self, uri):
+        """Returns the name of the archive, or the host, that `uri` is
+        requested from, used to group requests for concurrency limits.
+        """
+
+        for domainname in archive_mappings:
+
+            if domainname in uri:
+                return domainname
+
+        return urlparse(uri).netloc
+
+    def get_host_limit(self, hostkey):
+        """Returns the number of requests that may be in flight to the
+        archive or host named `hostkey`.
+        """
+
+        return self.host_limits.get(hostkey, self.host_concurrency)
+
+    def get_backoff(self, attempt, response):
+        """Returns the number of seconds to wait before retrying a request
+        for the given `attempt`, honoring any Retry-After in `response`.
+        """
+
+        delay = self.backoff_factor * (2 ** attempt)
+
+        if response is not None and 'retry-after' in response.headers:
+
+            retry_after = response.headers['retry-after']
+
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                try:
+                    delay = max(delay,
+                        parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    )
+                except (TypeError, ValueError):
+                    logger.warning("Ignoring unparseable Retry-After "
+                        "value {}".format(retry_after))
+
+        return delay
+
+    def start(self):
+        """Starts the event loop thread if it is not already running."""
+
+        with self.lock:
+
+            if self.loop is None:
+
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(
+                    target=self.loop.run_forever, daemon=True
+                )
+                self.thread.start()
+
+    async def fetch(self, method, uri, kwargs):
+        """Performs the request for `uri` once slots are available for its
+        archive and globally, retrying according to the settings of this
+        object.
+        """
+
+        if self.global_semaphore is None:
+            self.global_semaphore = asyncio.Semaphore(self.concurrency)
+
+        hostkey = self.get_host_key(uri)
+
+        if hostkey not in self.host_semaphores:
+            self.host_semaphores[hostkey] = asyncio.Semaphore(
+                self.get_host_limit(hostkey)
+            )
+
+        host_semaphore = self.host_semaphores[hostkey]
+
+        attempt = 0
+
+        while True:
+
+            response = None
+
+            # the archive slot is taken first so that requests waiting on a
+            # busy archive do not hold global slots other archives could use
+            async with host_semaphore:
+                async with self.global_semaphore:
+
+                    logger.debug("issuing {} on URI {}".format(method, uri))
+
+                    try:
+                        response = await self.loop.run_in_executor(
+                            self.executor,
+                            partial(self.session.request, method, uri, **kwargs)
+                        )
+                    except (ConnectionError, Timeout) as e:
+
+                        if attempt >= self.retries:
+                            raise
+
+                        logger.info("attempt {} of {} on URI {} failed with "
+                            "{}, retrying".format(attempt + 1, method, uri, repr(e)))
+
+            if response is not None:
+
+                if response.status_code not in self.status_forcelist \
+                    or attempt >= self.retries:
+                    return response
+
+                logger.info("attempt {} of {} on URI {} returned status {}, "
+                    "retrying".format(attempt + 1, method, uri,
+                    response.status_code))
+
+            await asyncio.sleep(self.get_backoff(attempt, response))
+
+            attempt += 1
+
+    def request(self, method, uri, **kwargs):
+        """Schedules a request with HTTP `method` for `uri`, returning a
+        future that resolves to the requests Response. Keyword arguments
+        are passed to requests.
+        """
+
+        self.start()
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.fetch(method, uri, kwargs), self.loop
+        )
+
+        with self.lock:
+            self.pending.add(future)
+
+        future.add_done_callback(self.request_done)
+
+        return future
+
+    def request_done(self, future):
+
+        with self.lock:
+            self.pending.discard(future)
+
+    def get(self, uri, **kwargs):
+        """Schedules a GET request for `uri`, returning a future."""
+
+        return self.request('GET', uri, **kwargs)
+
+    def head(self, uri, **kwargs):
+        """Schedules a HEAD request for `uri`, returning a future."""
+
+        return self.request('HEAD', uri, **kwargs)
+
+    def close(self):
+        """Waits for all scheduled requests to finish, then stops the event
+        loop and releases connections.
+        """
+
+        with self.lock:
+            pending = list(self.pending)
+
+        concurrent.futures.wait(pending)
+
+        with self.lock:
+
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join()
+                self.loop.close()
+                self.loop = None
+                self.thread = None
+                self.global_semaphore = None
+                self.host_semaphores = {}
+
+        self.executor.shutdown(wait=True)
+        self.session.close()
@@ -11,33 +11,70 @@ a MeasureModel, including downloading from TimeMaps and collections.
 import sys
 import logging
 import json
-import multiprocessing
 import requests
 import csv
 import copy
-import random
 import pprint
+import queue
+import threading
+import concurrent.futures
 
 from datetime import datetime
 from datetime import date
 
-from requests_futures.sessions import FuturesSession
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from requests.exceptions import ConnectionError, TooManyRedirects
 from warcio.archiveiterator import ArchiveIterator
 from aiu import ArchiveItCollection
 
-from .collectionmodel import CollectionModel
+from .collectionmodel import CollectionModel, CollectionModelException
+from .sqlite_collectionmodel import SQLiteCollectionModel
+from .fetcher import AsyncFetcher
 # from .archiveit_collection import ArchiveItCollection
 from .archive_information import generate_raw_urim
+from .timemap import iter_LinkTimeMap_links, process_local_dict
 
 logger = logging.getLogger(__name__)
 
-cpu_count = multiprocessing.cpu_count()
-
 working_directory_default = "/tmp/otmt-working"
 
+# working directories starting with this are SQLite databases
+sqlite_prefix = "sqlite:"
+
+# the number of mementos acquired between checkpoints
+checkpoint_interval = 100
+
+# the size of the pieces of a TimeMap read at a time
+timemap_chunk_size = 65536
+
+# the most mementos from a TimeMap being read that are acquired at once
+timemap_batch_size = 1000
+
+def create_collection_model(working_directory, compression=None):
+    """This function returns the collection model stored at
+    `working_directory`. A `working_directory` starting with `sqlite:`
+    names an SQLite database, used via SQLiteCollectionModel, otherwise
+    it is a directory used via CollectionModel.
+
+    Mementos in a directory are stored with `compression`, which is
+    remembered by the directory, if it is set.
+    """
+
+    if working_directory.startswith(sqlite_prefix):
+
+        if compression is not None:
+            raise CollectionModelException(
+                "Compression is only supported for working directories, "
+                "not SQLite databases")
+
+        database_filename = working_directory[len(sqlite_prefix):]
+
+        logger.info("Using SQLite database {} for the collection model".format(
+            database_filename))
+
+        return SQLiteCollectionModel(database_filename)
+
+    return CollectionModel(working_directory, compression=compression)
+
 def json_serial(obj):
     """JSON serializer for objects not serializable by default json code"""
 
@@ -136,14 +173,16 @@ def generate_timemap_from_timemap_data(urir, timemap_data):
 
     return timemap_dict
 
-def get_collection_model_from_warc(warcfiles, working_directory):
+def get_collection_model_from_warc(warcfiles, working_directory,
+    compression=None):
     """This function takes the files specified in `warcfiles` and 
-    fills a colleciton model with their headers and HTTP entities.
+    fills a colleciton model with their headers and HTTP entities,
+    compressed with `compression`, if set.
     """
 
     logger.warning("Only HTML entities are extracted from warcfiles")
 
-    cm = CollectionModel(working_directory)
+    cm = create_collection_model(working_directory, compression=compression)
 
     timemaps_data = {}
 
@@ -202,7 +241,7 @@ def generate_archiveit_urits(cid, seed_uris):
 
 def get_head_responses(session, uris):
     """This function creates a futures object for each URI-M in `uris,
-    using an existing `session` object from requests-futures. Only HEAD
+    using an existing `session` object, such as an AsyncFetcher. Only HEAD
     requests are performed.
     """
 
@@ -218,7 +257,7 @@ def get_head_responses(session, uris):
 
 def get_uri_responses(session, raw_uris):
     """This function creates a futures object for each URI-M in `raw_uris`,
-    using an existing `session` object from requests-futures. Only GET
+    using an existing `session` object, such as an AsyncFetcher. Only GET
     requests are performed.
     """
 
@@ -232,24 +271,36 @@ def get_uri_responses(session, raw_uris):
 
     return futures
 
-def list_generator(input_list):
-    """This function generates the next item in a list. It is useful for lists
-    that have their items deleted while one is iterating through them.
+def iterate_completed(futures):
+    """This function takes `futures`, a dictionary of futures keyed by URI,
+    and yields each URI and its future as soon as the future is done.
     """
 
-    logger.debug("list generator called")
+    uris_by_future = { futures[uri]: uri for uri in futures }
 
-    while len(input_list) > 0:
-        for item in input_list:
-            logger.debug("list now has {} items".format(len(input_list)))
-            logger.debug("yielding {}".format(item))
-            yield item
+    for future in concurrent.futures.as_completed(uris_by_future):
+        yield uris_by_future[future], future
 
-def get_collection_model_from_archiveit(archiveit_cid, working_directory):
+def get_collection_model_from_archiveit(archiveit_cid, working_directory,
+    fetcher=None, pipeline=None, retry_errors=False, compression=None):
     """This function takes an Archive-It Collection ID as `archiveit_cid` and
-    fills a collection model with the contents of that collection.
+    fills a collection model with the contents of that collection. The
+    AsyncFetcher `fetcher` is used for downloads and mementos are submitted
+    to the MementoPipeline `pipeline`, if supplied. Mementos are stored
+    with `compression`, if set.
+
+    TimeMaps and mementos already stored in `working_directory` are not
+    downloaded again. Mementos that previously failed are only downloaded
+    again if `retry_errors` is True.
     """
 
+    if fetcher is None:
+        with AsyncFetcher() as fetcher:
+            return get_collection_model_from_archiveit(
+                archiveit_cid, working_directory, fetcher=fetcher,
+                pipeline=pipeline, retry_errors=retry_errors,
+                compression=compression)
+
     archiveit_cid = archiveit_cid[0]
 
     logger.info("Acquiring Archive-It collection {}".format(
@@ -260,7 +311,7 @@ def get_collection_model_from_archiveit(archiveit_cid, working_directory):
 
     logger.debug("creating collection model")
 
-    cm = CollectionModel(working_directory)
+    cm = create_collection_model(working_directory, compression=compression)
 
     logger.debug("generating list of seed URIs")
 
@@ -272,68 +323,55 @@ def get_collection_model_from_archiveit(archiveit_cid, working_directory):
 
     urits = generate_archiveit_urits(archiveit_cid, seed_uris)
 
-    retry_session = requests.Session()
-    retry = Retry(
-        total=10,
-        read=10,
-        connect=10,
-        backoff_factor=0.3,
-        status_forcelist=(500, 502, 504)
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    retry_session.mount('http://', adapter)
-    retry_session.mount('https://', adapter)  
+    stored_urits = cm.getTimeMapURIList()
 
-    with FuturesSession(max_workers=cpu_count, session=retry_session) as session:
-        futures = get_uri_responses(session, urits)
+    if len(stored_urits) > 0:
 
-    working_uri_list = list(futures.keys())
+        logger.info("{} TimeMaps were acquired by a prior run".format(
+            len(stored_urits)))
 
-    for urit in list_generator(working_uri_list):
+        urits = [ urit for urit in urits if urit not in stored_urits ]
 
-        logging.debug("checking if URI-T {} is done downloading".format(urit))
+    futures = get_uri_responses(fetcher, urits)
 
-        if futures[urit].done():
+    for urit, future in iterate_completed(futures):
 
-            logger.debug("URI-T {} is done, extracting content".format(urit))
+        logger.debug("URI-T {} is done, extracting content".format(urit))
 
-            try:
-                response = futures[urit].result()
+        try:
+            response = future.result()
+
+            http_status = response.status_code
 
-                http_status = response.status_code
+            if http_status == 200:
 
-                if http_status == 200:
+                timemap_content = response.text
+                timemap_headers = dict(response.headers)
+                timemap_headers["http-status"] = http_status
 
-                    timemap_content = response.text
-                    timemap_headers = dict(response.headers)
-                    timemap_headers["http-status"] = http_status
+                logger.debug("adding TimeMap content for URI-T {}".format(urit))
+                logger.debug("Content: {}".format(timemap_content))
+                logger.debug("Headers: {}".format(
+                    pprint.pformat(timemap_headers)
+                    ))
 
-                    logger.debug("adding TimeMap content for URI-T {}".format(urit))
-                    logger.debug("Content: {}".format(timemap_content))
-                    logger.debug("Headers: {}".format(
-                        pprint.pformat(timemap_headers)
-                        ))
+                cm.addTimeMap(urit, timemap_content, timemap_headers)
 
-                    cm.addTimeMap(urit, timemap_content, timemap_headers)
+            # TODO: else store connection errors in CollectionModel
 
-                # TODO: else store connection errors in CollectionModel
-                working_uri_list.remove(urit)
-            
-            except ConnectionError:
+        except ConnectionError:
 
-                logger.warning("There was a connection error while attempting "
-                    "to download URI-T {}".format(urit))
+            logger.warning("There was a connection error while attempting "
+                "to download URI-T {}".format(urit))
 
-                # TODO: store connection errors in CollectionModel
-                working_uri_list.remove(urit)
+            # TODO: store connection errors in CollectionModel
 
-            except TooManyRedirects:
+        except TooManyRedirects:
 
-                logger.warning("There were too many redirects while attempting "
-                    "to download URI-T {}".format(urit))
+            logger.warning("There were too many redirects while attempting "
+                "to download URI-T {}".format(urit))
 
-                # TODO: store connection errors in CollectionModel
-                working_uri_list.remove(urit)
+            # TODO: store connection errors in CollectionModel
 
     urims = []
 
@@ -353,13 +391,16 @@ def get_collection_model_from_archiveit(archiveit_cid, working_directory):
             logger.error("TimeMap Object: {}".format(timemap))
             raise e
 
-    fetch_and_save_memento_content(urims, cm)
+    fetch_and_save_memento_content(urims, cm, fetcher=fetcher,
+        pipeline=pipeline, retry_errors=retry_errors)
                 
     return cm
 
-def discover_raw_urims(urimlist, futures=None):
+def discover_raw_urims(urimlist, futures=None, fetcher=None):
     """This function checks that the URI-Ms in `urimlist` are valid mementos,
     following all redirects and checking for a Memento-Datetime header.
+    If no `futures` are supplied, the requests are issued with `fetcher`,
+    or with a new AsyncFetcher if it is None.
     """
 
     raw_urimdata = {}
@@ -367,226 +408,429 @@ def discover_raw_urims(urimlist, futures=None):
 
     if futures == None:
 
-        retry_session = requests.Session()
-        retry = Retry(
-            total=10,
-            read=10,
-            connect=10,
-            backoff_factor=0.3,
-            status_forcelist=(500, 502, 504)
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        retry_session.mount('http://', adapter)
-        retry_session.mount('https://', adapter)  
+        if fetcher is None:
+            with AsyncFetcher() as fetcher:
+                return discover_raw_urims(urimlist, fetcher=fetcher)
 
-        with FuturesSession(max_workers=cpu_count) as session:
-            futures = get_head_responses(session, urimlist)
+        futures = get_head_responses(fetcher, urimlist)
 
-    working_uri_list = list(futures.keys())
+    for urim, future in iterate_completed(futures):
 
-    completed_urims = []
+        logger.debug("searching for raw version of URI-M {}".format(urim))
 
-    # for urim in list_generator(working_uri_list):
-    while len(completed_urims) < len(list(working_uri_list)):
+        try:
 
-        urim = random.choice(
-            list(set(working_uri_list) - set(completed_urims))
-        )
+            response = future.result()
 
-        logger.debug("checking if URI-M {} is done downloading".format(urim))
+            if "memento-datetime" in response.headers:
 
-        if futures[urim].done():
+                if len(response.history) == 0:
+                    raw_urimdata[urim] = generate_raw_urim(urim)
+                else:
+                    raw_urimdata[urim] = generate_raw_urim(response.url)
 
-            logger.debug("searching for raw version of URI-M {}".format(urim))
+                logger.debug("added raw URI-M {} associated with URI-M {}"
+                    " to the list to be downloaded".format(raw_urimdata[urim], urim))
 
-            try:
+            else:
 
-                response = futures[urim].result()
+                warn_msg = "No Memento-Datetime in Response Headers for " \
+                    "URI-M {}".format(urim)
 
-                if "memento-datetime" in response.headers:
+                logger.warning(warn_msg)
+                errordata[urim] = warn_msg
 
-                    if len(response.history) == 0:
-                        raw_urimdata[urim] = generate_raw_urim(urim)
-                    else:
-                        raw_urimdata[urim] = generate_raw_urim(response.url)
+        except ConnectionError as e:
+            logger.warning("While acquiring memento at {} there was an error of {}, "
+                "this event is being recorded".format(urim, repr(e)))
+            errordata[urim] = repr(e)
 
-                    logger.debug("added raw URI-M {} associated with URI-M {}"
-                        " to the list to be downloaded".format(raw_urimdata[urim], urim))
+        except TooManyRedirects as e:
+            logger.warning("While acquiring memento at {} there was an error of {},"
+                "this event is being recorded".format(urim, repr(e)))
+            errordata[urim] = repr(e)
 
-                else:
+    return raw_urimdata, errordata
+
+def save_memento_error(urim, errormsg, collectionmodel, pipeline=None):
+    """This function records `errormsg` for the memento at `urim` in
+    `collectionmodel`, letting `pipeline`, if any, know that this memento
+    is complete.
+    """
+
+    collectionmodel.addMementoError(
+        urim, b"", {}, bytes(errormsg, "utf8")
+    )
+
+    if pipeline is not None:
+        pipeline.complete_memento(urim)
 
-                    warn_msg = "No Memento-Datetime in Response Headers for " \
-                        "URI-M {}".format(urim)
+def select_urims_to_acquire(urimlist, collectionmodel, retry_errors=False,
+    pipeline=None):
+    """This function returns the URI-Ms from `urimlist` that are not yet
+    stored in `collectionmodel`, so that an interrupted acquisition resumes
+    where it left off. If `retry_errors` is True, the errors stored for
+    URI-Ms in `urimlist` are cleared and those URI-Ms are returned as well.
 
-                    logger.warning(warn_msg)
-                    errordata[urim] = warn_msg
+    The URI-Ms that are skipped are complete as far as `pipeline` is
+    concerned.
+    """
 
-            except ConnectionError as e:
-                logger.warning("While acquiring memento at {} there was an error of {}, "
-                    "this event is being recorded".format(urim, repr(e)))
-                errordata[urim] = repr(e)
+    stored_urims = set(collectionmodel.getMementoURIList())
+    error_urims = set(collectionmodel.getMementoErrorURIList())
 
-            except TooManyRedirects as e:
-                logger.warning("While acquiring memento at {} there was an error of {},"
-                    "this event is being recorded".format(urim, repr(e)))
-                errordata[urim] = repr(e)
+    if retry_errors:
 
-            finally:
-                logger.debug("Removing URI-M {} from the processing list".format(urim))
-                completed_urims.append(urim)
+        retry_urims = [ urim for urim in urimlist if urim in error_urims ]
 
-    return raw_urimdata, errordata
+        logger.info("Retrying {} URI-Ms that previously failed".format(
+            len(retry_urims)))
 
-def fetch_and_save_memento_content(urimlist, collectionmodel):
+        collectionmodel.clearMementoErrors(retry_urims)
+        error_urims.difference_update(retry_urims)
+
+    selected_urims = []
+    skipped_urims = set()
+
+    for urim in urimlist:
+
+        if urim in stored_urims or urim in error_urims:
+            skipped_urims.add(urim)
+        else:
+            selected_urims.append(urim)
+
+    if len(skipped_urims) > 0:
+
+        logger.info("{} URI-Ms were acquired by a prior run, "
+            "skipping them".format(len(skipped_urims)))
+
+        if pipeline is not None:
+            for urim in skipped_urims:
+                pipeline.complete_memento(urim)
+
+    return selected_urims
+
+def fetch_and_save_memento_content(urimlist, collectionmodel, fetcher=None,
+    pipeline=None, retry_errors=False):
     """This function takes a `urimlist` and saves the raw memento content in 
-    `collectionmodel`.
+    `collectionmodel`. Requests are issued with `fetcher`, or with a new
+    AsyncFetcher if it is None. Each memento is saved as soon as its
+    response arrives.
+
+    If a MementoPipeline is supplied as `pipeline`, each saved memento is
+    also submitted to it for boilerplate removal and tokenization.
+
+    URI-Ms already stored in `collectionmodel` are skipped, as are those
+    with stored errors unless `retry_errors` is True. Progress is
+    checkpointed every `checkpoint_interval` mementos so that little work
+    is lost if acquisition is interrupted.
     """
 
+    if fetcher is None:
+        with AsyncFetcher() as fetcher:
+            return fetch_and_save_memento_content(
+                urimlist, collectionmodel, fetcher=fetcher, pipeline=pipeline,
+                retry_errors=retry_errors)
+
+    if pipeline is not None:
+        pipeline.register_TimeMaps(collectionmodel)
+
+    urimlist = select_urims_to_acquire(urimlist, collectionmodel,
+        retry_errors=retry_errors, pipeline=pipeline)
+
+    acquired_count = 0
+    checkpointed_count = 0
+
     logger.info("Discovering raw mementos")
-    raw_urimdata, errordata = discover_raw_urims(urimlist)
+    raw_urimdata, errordata = discover_raw_urims(urimlist, fetcher=fetcher)
 
     logger.debug("Storing error data in collection model")
 
+    for urim in errordata:
+        save_memento_error(urim, errordata[urim], collectionmodel, pipeline)
+        acquired_count += 1
+
     invert_raw_urimdata_mapping = {}
-    raw_urims = []
 
     for urim in raw_urimdata:
         raw_urim = raw_urimdata[urim]
         invert_raw_urimdata_mapping.setdefault(raw_urim, []).append( urim )
-        raw_urims.append(raw_urim)
 
-    logger.info("Issuing requests for {} raw mementos".format(len(raw_urims)))
+    raw_urims = list(invert_raw_urimdata_mapping.keys())
 
-    retry_session = requests.Session()
-    retry = Retry(
-        total=10,
-        read=10,
-        connect=10,
-        backoff_factor=0.3,
-        status_forcelist=(500, 502, 504)
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    retry_session.mount('http://', adapter)
-    retry_session.mount('https://', adapter)  
+    logger.info("Issuing requests for {} raw mementos".format(len(raw_urims)))
 
-    with FuturesSession(max_workers=cpu_count) as session:
-        futures = get_uri_responses(session, raw_urims)
+    futures = get_uri_responses(fetcher, raw_urims)
 
-    completed_raw_urims = []
-    leftovers = list(set(raw_urims) - set(completed_raw_urims))
+    for raw_urim, future in iterate_completed(futures):
 
-    # for raw_urim in list_generator(raw_urims_copy):
-    while len(leftovers) > 0:
+        # sometimes, via redirects, the different URI-Ms end up at the 
+        # same raw URI-M
+        urims = invert_raw_urimdata_mapping[raw_urim]
 
-        raw_urim = random.choice(leftovers)
+        logger.debug("Raw URI-M {} associated with URI-Ms {} is done".format(
+            raw_urim, urims))
 
-        logger.debug("Processing raw URI-M {} associated with URI-M {}".format(
-            raw_urim, invert_raw_urimdata_mapping[raw_urim]))
+        try:
 
-        if futures[raw_urim].done():
+            response = future.result()
 
-            logger.debug("Raw URI-M {} is done".format(raw_urim))
+            http_status = response.status_code
+            memento_content = bytes(response.text, 'utf8')
+            memento_headers = dict(response.headers)    
+            memento_headers["http-status"] = http_status
 
-            try:
+        except (ConnectionError, TooManyRedirects) as e:
+            logger.warning("While acquiring memento at {} there was an error of {}, "
+                "this event is being recorded".format(raw_urim, repr(e)))
 
-                response = futures[raw_urim].result()
+            for urim in urims:
+                save_memento_error(urim, repr(e), collectionmodel, pipeline)
 
-                http_status = response.status_code
-                memento_content = bytes(response.text, 'utf8')
-                memento_headers = dict(response.headers)    
-                memento_headers["http-status"] = http_status
+        else:
 
-                # sometimes, via redirects, the different URI-Ms end up at the 
-                # same raw URI-M
-                logger.debug("There are {} URI-Ms leading to raw URI-M {}".format(
-                    len(invert_raw_urimdata_mapping[raw_urim]), raw_urim
-                ))
-                for urim in invert_raw_urimdata_mapping[raw_urim]:
-                    collectionmodel.addMemento(urim, memento_content, memento_headers)
+            for urim in urims:
 
-                logger.debug("Removing raw URI-M {} from processing list".format(raw_urim))
+                collectionmodel.addMemento(urim, memento_content, memento_headers)
 
-            except ConnectionError as e:
-                urim = invert_raw_urimdata_mapping[raw_urim]
-                logger.warning("While acquiring memento at {} there was an error of {}, "
-                    "this event is being recorded".format(urim, repr(e)))
-                
+                if pipeline is not None:
+                    pipeline.submit(collectionmodel, urim, memento_content)
 
-                try:
-                    errordata[urim] = repr(e)
-                except TypeError as e:
-                    logger.debug("errordata type: {}".format(type(errordata)))
-                    logger.debug("e type: {}".format(type(e)))
-                    logger.debug("repr(e): {}".format(repr(e)))
-                    logger.warning("failed to record error for URI-M {}".format(urim))
+        acquired_count += len(urims)
 
-            except TooManyRedirects as e:
-                urim = invert_raw_urimdata_mapping[raw_urim]
-                logger.warning("While acquiring memento at {} there was an error of {},"
-                    "this event is being recorded".format(urim, repr(e)))
-                errordata[urim] = repr(e)
+        if acquired_count - checkpointed_count >= checkpoint_interval:
 
-            finally:
-                logger.debug("Removing URI-M {} from the processing list".format(urim))
-                completed_raw_urims.append(raw_urim)
+            collectionmodel.checkpoint({
+                "acquired mementos": acquired_count,
+                "requested mementos": len(urimlist)
+            })
 
-        leftovers = list(set(raw_urims) - set(completed_raw_urims))
+            checkpointed_count = acquired_count
 
-    for urim in errordata:
-        errormsg = errordata[urim]
-        collectionmodel.addMementoError(
-            urim, b"", {}, bytes(errormsg, "utf8")
-        )
+    collectionmodel.checkpoint({
+        "acquired mementos": acquired_count,
+        "requested mementos": len(urimlist)
+    })
 
     return collectionmodel
 
-def get_collection_model_from_timemap(urits, working_directory):
-    """This function fills a collection model using one or more TimeMaps
-    stored in `urits`.
+def stream_timemap_mementos(urit, dict_timemap, headers, session=requests,
+    pages=None):
+    """This function downloads the link format TimeMap at `urit`, and each
+    page that follows it via a rel="next" link, with `session`, yielding
+    each memento as soon as its link arrives. The pages are gathered into
+    `dict_timemap` as `convert_LinkTimeMap_to_dict` would for a single
+    page, and `headers` is filled in with the headers of the first page.
+    The text of each page is appended to `pages`, if supplied.
     """
 
-    cm = CollectionModel(working_directory=working_directory)
+    page_urit = urit
+    requested_urits = set()
 
-    for urit in urits:
+    while page_urit is not None and page_urit not in requested_urits:
 
-        logger.info("Acquiring collection model from TimeMap at [{}]".format(urit))
+        logger.info("Acquiring TimeMap page at [{}]".format(page_urit))
+
+        requested_urits.add(page_urit)
 
-        r = requests.get(urit)
+        r = session.get(page_urit, stream=True)
 
         http_status = r.status_code
 
-        if http_status == 200:
+        if http_status != 200:
+            # TODO: Make an exception specific to this module for this case
+            raise Exception("No TimeMap was acquired from URI-T {}".format(page_urit))
 
-            content = r.text
-            headers = dict(r.headers)
+        if page_urit == urit:
+            headers.update(r.headers)
             headers["http-status"] = http_status
-            cm.addTimeMap(urit, content, headers)
+
+        page_urit = None
+        page_chunks = []
+
+        with r:
+
+            chunks = r.iter_content(timemap_chunk_size)
+
+            if pages is not None:
+                chunks = keep_items(chunks, page_chunks)
+
+            for uri, attributes in iter_LinkTimeMap_links(
+                chunks, skipErrors=True, encoding=r.encoding or "utf-8"):
+
+                relation = attributes.get("rel", "")
+
+                if "next" in relation.split() and "memento" not in relation:
+                    page_urit = uri
+                    continue
+
+                # every page names itself, but only the first names the TimeMap
+                if relation == "self" and len(requested_urits) > 1:
+                    continue
+
+                memento_list = dict_timemap.get("mementos", {}).get("list", [])
+                memento_count = len(memento_list)
+
+                process_local_dict({ uri: attributes }, dict_timemap)
+
+                memento_list = dict_timemap.get("mementos", {}).get("list", [])
+
+                if len(memento_list) > memento_count:
+                    yield memento_list[-1]
+
+        if pages is not None:
+            pages.append(b"".join(page_chunks).decode(
+                r.encoding or "utf-8", errors="replace"))
+
+def keep_items(iterable, kept):
+    """This function yields each item of `iterable`, appending it to the
+    list `kept` as it goes.
+    """
+
+    for item in iterable:
+        kept.append(item)
+        yield item
+
+def iterate_batches_in_background(iterable, batch_size=timemap_batch_size):
+    """This function consumes `iterable` in another thread, yielding lists
+    of up to `batch_size` of its items as soon as any are available, so
+    that they can be worked on while later items are still arriving. An
+    exception raised by `iterable` is raised here once the items before
+    it have been yielded.
+    """
+
+    items = queue.Queue()
+    finished = object()
+
+    def consume():
+
+        try:
+            for item in iterable:
+                items.put( (item, None) )
+        except Exception as e:
+            items.put( (finished, e) )
+        else:
+            items.put( (finished, None) )
+
+    threading.Thread(target=consume, daemon=True).start()
+
+    while True:
+
+        item, error = items.get()
+        batch = []
+
+        while item is not finished:
+
+            batch.append(item)
+
+            if len(batch) == batch_size:
+                break
+
+            try:
+                item, error = items.get_nowait()
+            except queue.Empty:
+                break
+
+        if len(batch) > 0:
+            yield batch
+
+        if item is finished:
+
+            if error is not None:
+                raise error
+
+            return
+
+def get_collection_model_from_timemap(urits, working_directory, fetcher=None,
+    pipeline=None, retry_errors=False, compression=None):
+    """This function fills a collection model using one or more TimeMaps
+    stored in `urits`. The AsyncFetcher `fetcher` is used for downloading
+    mementos and they are submitted to the MementoPipeline `pipeline`, if
+    supplied. Mementos are stored with `compression`, if set.
+
+    Each TimeMap is read as it arrives, following rel="next" links to any
+    later pages, and its mementos are downloaded in batches while the
+    rest of it is still being read.
+
+    TimeMaps and mementos already stored in `working_directory` are not
+    downloaded again. Mementos that previously failed are only downloaded
+    again if `retry_errors` is True.
+    """
+
+    cm = create_collection_model(working_directory, compression=compression)
+
+    stored_urits = cm.getTimeMapURIList()
+
+    for urit in urits:
+
+        logger.info("Acquiring collection model from TimeMap at [{}]".format(urit))
+
+        if urit in stored_urits:
+
+            logger.info("TimeMap at [{}] was acquired by a prior run".format(urit))
 
             timemap = cm.getTimeMap(urit)
 
             urims = []
 
-            for memento in timemap["mementos"]["list"]:
+            for memento in timemap.get("mementos", {}).get("list", []):
                 urims.append(memento["uri"])
 
-            fetch_and_save_memento_content(urims, cm)
+            fetch_and_save_memento_content(urims, cm, fetcher=fetcher,
+                pipeline=pipeline, retry_errors=retry_errors)
 
-        else:
-            # TODO: Make an exception specific to this module for this case
-            raise Exception("No TimeMap was acquired from URI-T {}".format(urit))
+            continue
+
+        timemap = {}
+        headers = {}
+        pages = []
+
+        for mementos in iterate_batches_in_background(
+            stream_timemap_mementos(urit, timemap, headers, pages=pages)):
+
+            urims = [ memento["uri"] for memento in mementos ]
+
+            fetch_and_save_memento_content(urims, cm, fetcher=fetcher,
+                pipeline=pipeline, retry_errors=retry_errors)
+
+        # stored JSON TimeMaps need a first and last memento, which the
+        # pages of a TimeMap do not always name
+        memento_list = timemap.get("mementos", {}).get("list", [])
+
+        if len(memento_list) > 0:
+
+            timemap["mementos"].setdefault("first",
+                dict(min(memento_list, key=lambda memento: memento["datetime"])))
+            timemap["mementos"].setdefault("last",
+                dict(max(memento_list, key=lambda memento: memento["datetime"])))
+
+        # the TimeMap was parsed as it arrived, so only its text is stored
+        cm.addTimeMap(urit, "\n".join(pages), headers, timemap=timemap)
+
+        # the mementos were acquired before their TimeMap was stored
+        if pipeline is not None:
+            pipeline.register_TimeMaps(cm)
 
     return cm
 
-def get_collection_model_from_datafile(datafile, working_directory):
+def get_collection_model_from_datafile(datafile, working_directory,
+    fetcher=None, pipeline=None, retry_errors=False, compression=None):
     """This function generates a collection, including TimeMaps from a gold
-    standard testing data file. It is used mainly for testing.
+    standard testing data file. It is used mainly for testing. The
+    AsyncFetcher `fetcher` is used for downloading mementos and they are
+    submitted to the MementoPipeline `pipeline`, if supplied. Mementos are
+    stored with `compression`, if set.
+
+    Mementos already stored in `working_directory` are not downloaded
+    again. Mementos that previously failed are only downloaded again if
+    `retry_errors` is True.
     """
 
     datafile = datafile[0]
 
     logger.info("building collection data from datafile {}".format(datafile))
 
-    cm = CollectionModel(working_directory=working_directory)
+    cm = create_collection_model(working_directory, compression=compression)
 
     with open(datafile) as tsvfile:
 
@@ -607,9 +851,15 @@ def get_collection_model_from_datafile(datafile, working_directory):
                 "uri": urim
             })
 
+    stored_urits = cm.getTimeMapURIList()
+
     for urir in timemaps_data:
 
         urit = "from-datafile::timemap::{}".format(urir)
+
+        if urit in stored_urits:
+            continue
+
         timemap_data = timemaps_data[urir]
         
         timemap_json = json.dumps(
@@ -631,16 +881,18 @@ def get_collection_model_from_datafile(datafile, working_directory):
             # urims.append(raw_urim)
             urims.append(memento["uri"])
 
-    fetch_and_save_memento_content(urims, cm)
+    fetch_and_save_memento_content(urims, cm, fetcher=fetcher,
+        pipeline=pipeline, retry_errors=retry_errors)
 
     return cm
 
-def get_collection_model_from_directory(working_directory):
+def get_collection_model_from_directory(working_directory, compression=None):
     """This function just loads a colleciton model from an existing
-    directory. It is used mainly for testing.
+    directory, storing any later mementos with `compression`, if set.
+    It is used mainly for testing.
     """
     
-    cm = CollectionModel(working_directory)
+    cm = create_collection_model(working_directory, compression=compression)
 
     return cm
     
@@ -652,11 +904,22 @@ supported_input_types = {
     'dir': get_collection_model_from_directory
 }
 
-def get_collection_model(input_type, arguments, working_directory):
+# these input types download content and accept a fetcher, pipeline, and
+# whether to retry errors
+network_input_types = [ 'archiveit', 'timemap', 'goldtest' ]
+
+def get_collection_model(input_type, arguments, working_directory,
+    fetcher=None, pipeline=None, retry_errors=False, compression=None):
     """This factory method takes `input_type` along with `arguments` and uses
     `supported_input_types` to run the correct function for producing
     the collection model filled via the different input methods,
-    such as Archive-It collection ID or TimeMap.
+    such as Archive-It collection ID or TimeMap. Input types that download
+    content use the AsyncFetcher `fetcher` and submit mementos to the
+    MementoPipeline `pipeline`, if supplied. They resume from any content
+    already in `working_directory`, downloading mementos that previously
+    failed again only if `retry_errors` is True. Mementos are stored with
+    `compression`, if set, which the working directory remembers for
+    every later use.
     """
 
     logger.info("Using input type {}".format(input_type))
@@ -671,8 +934,16 @@ def get_collection_model(input_type, arguments, working_directory):
         logger.info("Input directory {} has been chosen, using it instead of the "
             "working directory value of {}".format(input_dir, working_directory))
 
-        return supported_input_types[input_type](input_dir)
+        return supported_input_types[input_type](input_dir,
+            compression=compression)
     else:
         logger.info("Working directory {} will be used".format(working_directory))
 
-        return supported_input_types[input_type](arguments, working_directory)
+        if input_type in network_input_types:
+            return supported_input_types[input_type](
+                arguments, working_directory, fetcher=fetcher,
+                pipeline=pipeline, retry_errors=retry_errors,
+                compression=compression)
+
+        return supported_input_types[input_type](arguments, working_directory,
+            compression=compression)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.levenshtein
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module computes the Levenshtein distance between token sequences
+with the bit-parallel algorithm of Myers, as formulated by Hyyrö, giving
+the same results as the `distance` package in far less time.
+"""
+
+import distance
+
+from collections import Counter
+
+def trim_common_affixes(seq1, seq2):
+    """Returns `seq1` and `seq2` without the tokens they share at their
+    beginning and at their end, which do not change their edit distance.
+    """
+
+    length = min(len(seq1), len(seq2))
+
+    start = 0
+
+    while start < length and seq1[start] == seq2[start]:
+        start += 1
+
+    end = 0
+
+    while end < length - start and seq1[-1 - end] == seq2[-1 - end]:
+        end += 1
+
+    return seq1[start:len(seq1) - end], seq2[start:len(seq2) - end]
+
+def bag_distance(seq1, seq2):
+    """Returns the number of tokens of the longer of `seq1` and `seq2` left
+    over once the tokens they have in common are paired, which is never
+    more than their Levenshtein distance.
+    """
+
+    common = sum((Counter(seq1) & Counter(seq2)).values())
+
+    return max(len(seq1), len(seq2)) - common
+
+def bitparallel_levenshtein(seq1, seq2, max_dist=None):
+    """Computes the Levenshtein distance between the sequences `seq1` and
+    `seq2`, whose tokens may be any hashable values, such as strings or
+    integer token ids.
+
+    Each column of the dynamic programming matrix is held as bit vectors
+    of the differences between its adjacent cells, with a bit for each
+    token of the shorter sequence, so a whole column is computed from the
+    previous one with a few integer operations. Python integers grow as
+    needed, so sequences of any length are handled in a single block.
+
+    The result is the same as that of `distance.levenshtein`.
+
+    If `max_dist` is given, the computation stops as soon as it is known
+    whether the distance is greater than `max_dist`, returning a bound on
+    the distance instead: a lower bound greater than `max_dist` if the
+    distance is, otherwise an upper bound no greater than `max_dist`.
+    """
+
+    if seq1 == seq2:
+        return 0
+
+    seq1, seq2 = trim_common_affixes(seq1, seq2)
+
+    # the shorter sequence becomes the bit vectors
+    if len(seq1) < len(seq2):
+        seq1, seq2 = seq2, seq1
+
+    length = len(seq2)
+
+    if max_dist is not None:
+
+        lower = bag_distance(seq1, seq2)
+
+        if lower > max_dist:
+            return lower
+
+        # substituting or inserting every token of the longer sequence
+        if len(seq1) <= max_dist:
+            return len(seq1)
+
+    if length == 0:
+        return len(seq1)
+
+    # the positions at which each token occurs in the shorter sequence
+    peq = {}
+
+    for position, token in enumerate(seq2):
+        peq[token] = peq.get(token, 0) | (1 << position)
+
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+
+    pv = mask
+    mv = 0
+    score = length
+    remaining = len(seq1)
+
+    for token in seq1:
+
+        eq = peq.get(token, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+
+        remaining -= 1
+
+        # adjacent cells of the last row differ by at most 1, so the
+        # distance is within `remaining` of the current score
+        if max_dist is not None:
+
+            if score - remaining > max_dist:
+                return score - remaining
+
+            if score + remaining <= max_dist:
+                return score + remaining
+
+    return score
+
+def distance_bounded_levenshtein(seq1, seq2, max_dist):
+    """Computes the Levenshtein distance between the sequences `seq1` and
+    `seq2` with `distance.levenshtein`, stopping once it exceeds
+    `max_dist`, returning the bounds that `bitparallel_levenshtein` does
+    when given `max_dist`.
+    """
+
+    if max_dist < 0:
+        return distance.levenshtein(seq1, seq2)
+
+    score = distance.levenshtein(seq1, seq2, max_dist=max_dist)
+
+    if score == -1:
+        return max_dist + 1
+
+    return score
+
+def bitparallel_nlevenshtein(seq1, seq2):
+    """Computes the Levenshtein distance between the sequences `seq1` and
+    `seq2` normalized by the length of the longer one, using
+    `bitparallel_levenshtein`.
+
+    The result is the same as that of `distance.nlevenshtein` with its
+    default `method` of 1.
+    """
+
+    if seq1 == seq2:
+        return 0.0
+
+    if len(seq1) == 0 or len(seq2) == 0:
+        return 1.0
+
+    return bitparallel_levenshtein(seq1, seq2) / float(max(len(seq1), len(seq2)))
+
+levenshtein_engines = {
+    "distance": {
+        "levenshtein": distance.levenshtein,
+        "nlevenshtein": distance.nlevenshtein,
+        "bounded levenshtein": distance_bounded_levenshtein
+    },
+    "bitparallel": {
+        "levenshtein": bitparallel_levenshtein,
+        "nlevenshtein": bitparallel_nlevenshtein,
+        "bounded levenshtein": bitparallel_levenshtein
+    }
+}
+
+default_levenshtein_engine = "bitparallel"
@@ -18,6 +18,31 @@ provided that such a subclass has the same methods and parameters.
 import json
 import csv
 
+from datetime import datetime
+
+import numpy
+
+# topic statuses are stored and combined as their index in this list
+topic_statuses = [ None, "on-topic", "off-topic" ]
+topic_status_codes = { status: code for code, status in enumerate(topic_statuses) }
+
+# the number of rows held in memory before they are written to a Parquet file
+parquet_row_group_size = 65536
+
+parquet_fieldnames = [
+    'URI-T', 'URI-M', 'Error', 'Error Message', 'Memento-Datetime',
+    'Language', 'Content Length', 'Simhash', 'Measurement Type',
+    'Measurement Name', 'Comparison Score', 'Stemmed', 'Tokenized',
+    'Removed Boilerplate', 'Topic Status', 'Overall Topic Status'
+]
+
+comparison_functions = {
+    ">": numpy.greater,
+    "<": numpy.less,
+    "==": numpy.equal,
+    "!=": numpy.not_equal
+}
+
 class MeasureModelException(Exception):
     """An exception class to be used by the functions in this file so that the
     source of error can be detected.
@@ -48,6 +73,100 @@ class MeasureModelNoSuchMeasureType(MeasureModelException):
     """
     pass
 
+def compare_scores(scores, thresholds, comparison):
+    """Returns a boolean numpy array marking the `scores` that are off-topic
+    for `thresholds` as indicated by `comparison`. If `thresholds` is a
+    sequence, the array has a row for each threshold.
+
+    Valid values of `comparison` are <, >, ==, or !=.
+    """
+
+    try:
+        comparison_function = comparison_functions[comparison]
+    except KeyError:
+        raise MeasureModelException("Unsupported comparison type {}".format(comparison))
+
+    thresholds = numpy.asarray(thresholds, dtype=numpy.float64)
+
+    if thresholds.ndim == 0:
+        return comparison_function(scores, thresholds)
+
+    return comparison_function(scores[numpy.newaxis, :], thresholds[:, numpy.newaxis])
+
+def combine_topic_statuses(status_codes, measured):
+    """Combines the topic status codes of each memento across measures,
+    given as numpy arrays with a row per measure in `status_codes`, along
+    with `measured`, which marks the codes that have no errors.
+
+    A memento is off-topic overall if it is off-topic for any measure,
+    otherwise it has the status of the last measure without errors.
+    Returns the overall codes and a boolean numpy array marking the
+    mementos with at least one measure without errors.
+    """
+
+    overall_status_codes = numpy.zeros(status_codes.shape[1], dtype=numpy.uint8)
+
+    for measure_status_codes, measure_measured in zip(status_codes, measured):
+        overall_status_codes = numpy.where(
+            measure_measured, measure_status_codes, overall_status_codes)
+
+    offtopic = ((status_codes == topic_status_codes["off-topic"]) & measured).any(axis=0)
+    overall_status_codes[offtopic] = topic_status_codes["off-topic"]
+
+    return overall_status_codes, measured.any(axis=0)
+
+def convert_dict_to_records(outputdata):
+    """Generates the memento dictionaries of `generate_memento_records`
+    from `outputdata`, a dictionary generated by `generate_dict`.
+    """
+
+    for urit, timemapdata in outputdata.items():
+
+        if "access error" in timemapdata:
+            yield { "URI-T": urit, "access error": timemapdata["access error"] }
+            continue
+
+        if len(timemapdata) == 0:
+            yield { "URI-T": urit }
+
+        for urim, mementodata in timemapdata.items():
+
+            record = { "URI-T": urit, "URI-M": urim }
+            record.update(mementodata)
+
+            yield record
+
+def read_output_records(filename):
+    """Generates the memento dictionaries of `generate_memento_records`,
+    one at a time, from `filename`, which was written by either
+    `MeasureModel.save_as_JSON` or `MeasureModel.save_as_JSONL`. JSON
+    Lines files are read incrementally.
+    """
+
+    with open(filename) as inputfile:
+
+        firstline = inputfile.readline()
+
+        try:
+            firstrecord = json.loads(firstline)
+        except json.JSONDecodeError:
+            firstrecord = None
+
+        if type(firstrecord) == dict and "URI-T" in firstrecord:
+
+            yield firstrecord
+
+            for line in inputfile:
+
+                if line.strip():
+                    yield json.loads(line)
+
+        else:
+            inputfile.seek(0)
+
+            for record in convert_dict_to_records(json.load(inputfile)):
+                yield record
+
 class MeasureModel:
     """
         This class exists because the data structure for keeping track
@@ -89,7 +208,6 @@ class MeasureModel:
 
         self.scoremodel[urit][urim].setdefault(measuretype, {})
         self.scoremodel[urit][urim][measuretype].setdefault(measure, {})
-        self.scoremodel[urit][urim][measuretype][measure].setdefault(measure, {})
         self.scoremodel[urit][urim][measuretype][measure].setdefault("comparison score", None)
         self.scoremodel[urit][urim][measuretype][measure].setdefault("stemmed", None)
         self.scoremodel[urit][urim][measuretype][measure].setdefault("tokenized", None)
@@ -444,6 +562,20 @@ class MeasureModel:
 
         return status
 
+    def set_off_topic_status_by_measure(self, urit, urim, measuretype, measurename, status):
+        """Sets the off-topic `status` of `urim`, belonging to a given `urit`,
+        for `measuretype` and `measurename`.
+        """
+
+        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = status
+
+    def set_overall_off_topic_status(self, urit, urim, status):
+        """Sets the off-topic `status` of `urim`, belonging to a given `urit`,
+        for all measures.
+        """
+
+        self.scoremodel[urit][urim]["overall topic status"] = status
+
     def get_overall_off_topic_status(self, urim):
         """Returns the off-topic status of `urim` for all measures.
 
@@ -451,147 +583,206 @@ class MeasureModel:
         """
 
         urit = self.mementos_to_timemaps[urim]
-        return self.scoremodel[urit][urim]["overall topic status"]
+        return self.scoremodel[urit][urim].get("overall topic status")
+
+    def get_measure_data(self, measuretype, measurename):
+        """Walks through all TimeMaps and mementos once, returning the
+        (URI-T, URI-M) of each memento, a numpy array of their scores for
+        `measuretype` and `measurename`, a numpy array of their topic
+        status codes for that measure, and a boolean numpy array marking
+        the mementos that have a score and no errors.
+        """
+
+        mementos = []
+        scores = []
+        status_codes = []
+        measured = []
+
+        for urit, timemapdata in self.scoremodel.items():
+
+            timemap_error = self.timemap_access_errormodel.get(urit)
+            access_errors = self.memento_access_errormodel.get(urit, {})
+            measurement_errors = self.memento_measure_errormodel.get(urit, {})
+
+            for urim, mementodata in timemapdata.items():
+
+                mementos.append( (urit, urim) )
+
+                try:
+                    measuredata = mementodata[measuretype][measurename]
+                except KeyError:
+                    measuredata = {}
+
+                score = measuredata.get("comparison score")
+
+                measurement_error = \
+                    ((measurement_errors.get(urim) or {}).get(measuretype) or {}).get(measurename)
+
+                scores.append(numpy.nan if score is None else score)
+                status_codes.append(topic_status_codes[measuredata.get("topic status")])
+                measured.append(
+                    score is not None and not timemap_error and
+                    not access_errors.get(urim) and not measurement_error
+                )
+
+        return mementos, numpy.array(scores, dtype=numpy.float64), \
+            numpy.array(status_codes, dtype=numpy.uint8), \
+            numpy.array(measured, dtype=bool)
+
+    def evaluate_thresholds(self, measuretype, measurename, thresholds, comparison):
+        """Compares the scores of every memento for `measuretype` and
+        `measurename` against each of the `thresholds` at once, without
+        changing the topic status stored in this object.
+
+        Returns the (URI-T, URI-M) of each memento, a boolean numpy array
+        with a row per threshold marking the mementos that would be
+        off-topic, and a boolean numpy array marking the mementos that
+        have a score and no errors.
+        """
+
+        mementos, scores, status_codes, measured = \
+            self.get_measure_data(measuretype, measurename)
+
+        offtopic = compare_scores(scores, thresholds, comparison)
+
+        return mementos, offtopic & measured, measured
 
     def calculate_offtopic_by_measure(self, measuretype, measurename, threshold, comparison):
-        """Iterates through all TimeMaps and mementos, deteremining if the 
+        """Determines, for all TimeMaps and mementos at once, if the 
         resulting scores for `measuretype` and `measurename` exceed the 
         numeric value stored in `threshold` as indicated by `comparison`.
 
         Valid values of `comparison` are <, >, ==, or !=.
         """
 
-        for urit in self.get_TimeMap_URIs():
+        mementos, scores, status_codes, measured = \
+            self.get_measure_data(measuretype, measurename)
 
-            if self.get_TimeMap_access_error_message(urit):
-                continue
-
-            for urim in self.get_Memento_URIs_in_TimeMap(urit):
+        offtopic = compare_scores(scores, threshold, comparison)
 
-                if self.get_Memento_access_error_message(urim):
-                    continue
+        for index in numpy.flatnonzero(measured):
 
-                if self.get_Memento_measurement_error_message(urim, measuretype, measurename):
-                    continue
+            urit, urim = mementos[index]
 
-                score = self.get_score(urit, urim, measuretype, measurename)
-
-                # TODO: fix this if/elif block
-                # I know I can use eval, but also know its use has security implications
-                if comparison == ">":
-                    if score > threshold:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "off-topic"
-                    else:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "on-topic"
-                elif comparison == "==":
-                    if score == threshold:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "off-topic"
-                    else:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "on-topic"
-                elif comparison == "<":
-                    if score < threshold:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "off-topic"
-                    else:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "on-topic"
-                elif comparison == "!=":
-                    if score != threshold:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "off-topic"
-                    else:
-                        self.scoremodel[urit][urim][measuretype][measurename]["topic status"] = "on-topic"
-                else:
-                    raise MeasureModelException("Unsupported comparison type {}".format(comparison))
+            self.set_off_topic_status_by_measure(urit, urim,
+                measuretype, measurename,
+                "off-topic" if offtopic[index] else "on-topic")
 
     def calculate_overall_offtopic_status(self):
-        """Iterates through all TimeMaps and mementos, determining if a memento
+        """Determines, for all TimeMaps and mementos at once, if a memento
         was marked off-topic in any of its measures.
         """
 
-        for urit in self.get_TimeMap_URIs():
+        all_status_codes = []
+        all_measured = []
 
-            if self.get_TimeMap_access_error_message(urit):
-                continue
+        for measuretype, measurename in self.get_Measures():
 
-            for urim in self.get_Memento_URIs_in_TimeMap(urit):
+            mementos, scores, status_codes, measured = \
+                self.get_measure_data(measuretype, measurename)
 
-                if self.get_Memento_access_error_message(urim):
-                    continue
+            all_status_codes.append(status_codes)
+            all_measured.append(measured)
 
-                for measuretype, measurename in self.get_Measures():
+        if len(all_status_codes) == 0:
+            return
 
-                    if self.get_Memento_measurement_error_message(urim, measuretype, measurename):
-                        continue
+        overall_status_codes, has_status = combine_topic_statuses(
+            numpy.array(all_status_codes), numpy.array(all_measured))
 
-                    topic_status = self.scoremodel[urit][urim][measuretype][measurename]["topic status"]
+        for index in numpy.flatnonzero(has_status):
 
-                    if topic_status == "off-topic":
-                        self.scoremodel[urit][urim]["overall topic status"] = "off-topic"
-                        break
-                    
-                    self.scoremodel[urit][urim]["overall topic status"] = topic_status
+            urit, urim = mementos[index]
 
-    def generate_dict(self):
-        """Generates a dictionary of the content within this object."""
+            self.set_overall_off_topic_status(urit, urim,
+                topic_statuses[overall_status_codes[index]])
 
-        outputdata = {}
+    def generate_memento_records(self):
+        """Generates a dictionary for each memento stored in this object,
+        one at a time, holding its URI-T and URI-M under the keys "URI-T"
+        and "URI-M" along with the same content as in `generate_dict`.
+        TimeMaps with access errors, or without mementos, produce a
+        single dictionary without a "URI-M".
+        """
 
         for urit in self.get_TimeMap_URIs():
 
-            outputdata.setdefault(urit, {})
-
             tm_a_err = self.get_TimeMap_access_error_message(urit)
 
             if tm_a_err:
-                outputdata[urit]["access error"] = str(tm_a_err)
-            else:
+                yield { "URI-T": urit, "access error": str(tm_a_err) }
+                continue
 
-                for urim in self.get_Memento_URIs_in_TimeMap(urit):
+            urims = self.get_Memento_URIs_in_TimeMap(urit)
 
-                    outputdata[urit].setdefault(urim, {})
+            if len(urims) == 0:
+                yield { "URI-T": urit }
 
-                    m_a_err = self.get_Memento_access_error_message(urim)
+            for urim in urims:
 
-                    if m_a_err:
-                        outputdata[urit][urim]["access error"] = str(m_a_err)
-                    else:
+                record = { "URI-T": urit, "URI-M": urim }
 
-                        if self.get_simhash(urit, urim):
-                            outputdata[urit][urim]["raw memento simhash value"] = \
-                                self.get_simhash(urit, urim)
+                m_a_err = self.get_Memento_access_error_message(urim)
 
-                        if self.get_content_length(urit,urim):
-                            outputdata[urit][urim]["content length"] = \
-                                self.get_content_length(urit, urim)
+                if m_a_err:
+                    record["access error"] = str(m_a_err)
+                    yield record
+                    continue
 
-                        if self.get_language(urit, urim):
-                            outputdata[urit][urim]["language"] = \
-                                self.get_language(urit, urim)
+                if self.get_simhash(urit, urim):
+                    record["raw memento simhash value"] = \
+                        self.get_simhash(urit, urim)
 
-                        if self.get_memento_datetime(urit, urim):
-                            outputdata[urit][urim]["memento-datetime"] = \
-                                self.get_memento_datetime(urit, urim).strftime(
-                                    "%Y/%m/%d %H:%M:%S GMT"
-                                )
+                if self.get_content_length(urit,urim):
+                    record["content length"] = \
+                        self.get_content_length(urit, urim)
 
-                        for measuretype, measurename in self.get_Measures():
+                if self.get_language(urit, urim):
+                    record["language"] = \
+                        self.get_language(urit, urim)
 
-                            outputdata[urit][urim].setdefault(measuretype, {})
-                            outputdata[urit][urim][measuretype].setdefault(measurename, {})
+                if self.get_memento_datetime(urit, urim):
+                    record["memento-datetime"] = \
+                        self.get_memento_datetime(urit, urim).strftime(
+                            "%Y/%m/%d %H:%M:%S GMT"
+                        )
 
-                            m_m_err = self.get_Memento_measurement_error_message(urim, measuretype, measurename)
+                for measuretype, measurename in self.get_Measures():
 
-                            if m_m_err:
-                                outputdata[urit][urim][measuretype][measurename]["measurement error"] = str(m_m_err)
+                    record.setdefault(measuretype, {})
+                    record[measuretype].setdefault(measurename, {})
 
-                            else:
-                                outputdata[urit][urim][measuretype][measurename] = {
-                                    "stemmed": self.get_stemmed(urit, urim, measuretype, measurename),
-                                    "tokenized": self.get_tokenized(urit, urim, measuretype, measurename),
-                                    "removed boilerplate": self.get_removed_boilerplate(urit, urim, measuretype, measurename),
-                                    "comparison score": self.get_score(urit, urim, measuretype, measurename),
-                                    "topic status": self.get_off_topic_status_by_measure(urim, measuretype, measurename)
-                                }
+                    m_m_err = self.get_Memento_measurement_error_message(urim, measuretype, measurename)
+
+                    if m_m_err:
+                        record[measuretype][measurename]["measurement error"] = str(m_m_err)
+
+                    else:
+                        record[measuretype][measurename] = {
+                            "stemmed": self.get_stemmed(urit, urim, measuretype, measurename),
+                            "tokenized": self.get_tokenized(urit, urim, measuretype, measurename),
+                            "removed boilerplate": self.get_removed_boilerplate(urit, urim, measuretype, measurename),
+                            "comparison score": self.get_score(urit, urim, measuretype, measurename),
+                            "topic status": self.get_off_topic_status_by_measure(urim, measuretype, measurename)
+                        }
+
+                        record["overall topic status"] = self.get_overall_off_topic_status(urim)
+
+                yield record
+
+    def generate_dict(self):
+        """Generates a dictionary of the content within this object."""
+
+        outputdata = {}
 
-                                outputdata[urit][urim]["overall topic status"] = self.get_overall_off_topic_status(urim)
+        for record in self.generate_memento_records():
+
+            timemapdata = outputdata.setdefault(record.pop("URI-T"), {})
+
+            if "URI-M" in record:
+                timemapdata[record.pop("URI-M")] = record
+            else:
+                timemapdata.update(record)
 
         return outputdata
 
@@ -603,6 +794,97 @@ class MeasureModel:
         with open(filename, 'w') as outputjson:
             json.dump(outputdata, outputjson, indent=4)
 
+    def load_records(self, records):
+        """Stores the content of the memento dictionaries in `records`, as
+        generated by `generate_memento_records`, in this object, so that
+        the scores of an earlier run can be used again without measuring
+        the mementos.
+        """
+
+        for record in records:
+
+            urit = record["URI-T"]
+            urim = record.get("URI-M")
+
+            if urim is None:
+
+                if "access error" in record:
+                    self.set_TimeMap_access_error(urit, record["access error"])
+
+                continue
+
+            if "access error" in record:
+                self.set_Memento_access_error(urit, urim, record["access error"])
+                continue
+
+            self.initialize_scoremodel_for_urit_urim(urit, urim)
+
+            if "raw memento simhash value" in record:
+                self.set_simhash(urit, urim, record["raw memento simhash value"])
+
+            if "content length" in record:
+                self.set_content_length(urit, urim, record["content length"])
+
+            if "language" in record:
+                self.set_language(urit, urim, record["language"])
+
+            if "memento-datetime" in record:
+                self.set_memento_datetime(urit, urim, datetime.strptime(
+                    record["memento-datetime"], "%Y/%m/%d %H:%M:%S GMT"))
+
+            for measuretype, measuretypedata in record.items():
+
+                if type(measuretypedata) != dict:
+                    continue
+
+                for measurename, measuredata in measuretypedata.items():
+
+                    if "measurement error" in measuredata:
+                        self.set_Memento_measurement_error(urit, urim,
+                            measuretype, measurename, measuredata["measurement error"])
+                        continue
+
+                    self.set_score(urit, urim, measuretype, measurename,
+                        measuredata["comparison score"])
+                    self.set_stemmed(urit, urim, measuretype, measurename,
+                        measuredata["stemmed"])
+                    self.set_tokenized(urit, urim, measuretype, measurename,
+                        measuredata["tokenized"])
+                    self.set_removed_boilerplate(urit, urim, measuretype,
+                        measurename, measuredata["removed boilerplate"])
+                    self.set_off_topic_status_by_measure(urit, urim,
+                        measuretype, measurename, measuredata["topic status"])
+
+            if record.get("overall topic status") is not None:
+                self.set_overall_off_topic_status(urit, urim,
+                    record["overall topic status"])
+
+    def load_dict(self, inputdata):
+        """Stores the content of a dictionary generated by `generate_dict`
+        in this object.
+        """
+
+        self.load_records(convert_dict_to_records(inputdata))
+
+    def load_JSON(self, filename):
+        """Stores the content of a file written by `save_as_JSON` or
+        `save_as_JSONL` in this object.
+        """
+
+        self.load_records(read_output_records(filename))
+
+    def save_as_JSONL(self, filename):
+        """Saves the content of this object as JSON Lines, writing the
+        dictionary of each memento from `generate_memento_records` to
+        its own line as soon as it is generated.
+        """
+
+        with open(filename, 'w') as outputjsonl:
+
+            for record in self.generate_memento_records():
+                outputjsonl.write(json.dumps(record))
+                outputjsonl.write("\n")
+
     def save_as_goldstandard(self, filename):
         """Saves the content of this object as the tab-delimited gold
         standard data used in AlNoamany's work.
@@ -740,6 +1022,144 @@ class MeasureModel:
 
             for row in outputdata:
                 writer.writerow(row)
-            
 
+    def generate_measure_rows(self):
+        """Generates a dictionary for each measure of each memento stored
+        in this object, one at a time, keyed by the names in
+        `parquet_fieldnames`. Mementos with access errors, TimeMaps
+        with access errors, and mementos when no measures were computed,
+        produce a single dictionary.
+        """
+
+        for urit in self.get_TimeMap_URIs():
+
+            tm_a_err = self.get_TimeMap_access_error_message(urit)
+
+            if tm_a_err:
+                yield { "URI-T": urit, "Error": "TimeMap Access Error",
+                    "Error Message": str(tm_a_err) }
+                continue
+
+            for urim in self.get_Memento_URIs_in_TimeMap(urit):
+
+                m_a_err = self.get_Memento_access_error_message(urim)
+
+                if m_a_err:
+                    yield { "URI-T": urit, "URI-M": urim,
+                        "Error": "Memento Access Error",
+                        "Error Message": str(m_a_err) }
+                    continue
+
+                mementorow = {
+                    "URI-T": urit,
+                    "URI-M": urim,
+                    "Memento-Datetime": self.get_memento_datetime(urit, urim),
+                    "Language": self.get_language(urit, urim),
+                    "Content Length": self.get_content_length(urit, urim),
+                    "Simhash": self.get_simhash(urit, urim),
+                    "Overall Topic Status": self.get_overall_off_topic_status(urim)
+                }
+
+                if len(self.get_Measures()) == 0:
+                    yield mementorow
+                    continue
+
+                for measuretype, measurename in self.get_Measures():
+
+                    row = dict(mementorow)
+                    row["Measurement Type"] = measuretype
+                    row["Measurement Name"] = measurename
 
+                    m_m_err = self.get_Memento_measurement_error_message(urim, measuretype, measurename)
+
+                    if m_m_err:
+                        row["Error"] = "Memento Measurement Error"
+                        row["Error Message"] = str(m_m_err)
+
+                    else:
+                        row["Comparison Score"] = self.get_score(urit, urim, measuretype, measurename)
+                        row["Stemmed"] = self.get_stemmed(urit, urim, measuretype, measurename)
+                        row["Tokenized"] = self.get_tokenized(urit, urim, measuretype, measurename)
+                        row["Removed Boilerplate"] = self.get_removed_boilerplate(urit, urim, measuretype, measurename)
+                        row["Topic Status"] = self.get_off_topic_status_by_measure(urim, measuretype, measurename)
+
+                    yield row
+
+    def save_as_Parquet(self, filename, row_group_size=parquet_row_group_size):
+        """Saves the content of this object as a Parquet file with a row
+        for each measure of each memento, as generated by
+        `generate_measure_rows`. Rows are written in groups of
+        `row_group_size`, so only one group is held in memory at a time.
+
+        Content lengths and simhashes that are messages, such as those
+        stored for mementos with errors, are written as null, with the
+        message in the Error and Error Message columns.
+
+        Requires pyarrow, which is installed with the parquet extra.
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise MeasureModelException(
+                "saving as Parquet requires pyarrow, "
+                "install it with 'pip install otmt[parquet]'")
+
+        schema = pyarrow.schema([
+            ('URI-T', pyarrow.string()),
+            ('URI-M', pyarrow.string()),
+            ('Error', pyarrow.string()),
+            ('Error Message', pyarrow.string()),
+            ('Memento-Datetime', pyarrow.timestamp('s', tz='UTC')),
+            ('Language', pyarrow.string()),
+            ('Content Length', pyarrow.int64()),
+            ('Simhash', pyarrow.uint64()),
+            ('Measurement Type', pyarrow.string()),
+            ('Measurement Name', pyarrow.string()),
+            ('Comparison Score', pyarrow.float64()),
+            ('Stemmed', pyarrow.bool_()),
+            ('Tokenized', pyarrow.bool_()),
+            ('Removed Boilerplate', pyarrow.bool_()),
+            ('Topic Status', pyarrow.string()),
+            ('Overall Topic Status', pyarrow.string())
+        ])
+
+        def new_columns():
+            return { fieldname: [] for fieldname in parquet_fieldnames }
+
+        with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+
+            columns = new_columns()
+            rowcount = 0
+
+            for row in self.generate_measure_rows():
+
+                messages = []
+
+                for fieldname in [ "Content Length", "Simhash" ]:
+
+                    value = row.get(fieldname)
+
+                    if value is not None and not isinstance(value, int):
+                        row[fieldname] = None
+                        messages.append(str(value))
+
+                if messages and row.get("Error") is None:
+                    row["Error"] = "Memento Metadata Error"
+                    row["Error Message"] = "; ".join(messages)
+
+                for fieldname in parquet_fieldnames:
+                    columns[fieldname].append(row.get(fieldname))
+
+                rowcount += 1
+
+                if rowcount == row_group_size:
+                    writer.write_table(
+                        pyarrow.Table.from_pydict(columns, schema=schema))
+                    columns = new_columns()
+                    rowcount = 0
+
+            if rowcount > 0:
+                writer.write_table(
+                    pyarrow.Table.from_pydict(columns, schema=schema))
@@ -20,9 +20,11 @@ logger = logging.getLogger(__name__)
 def compute_Simhashes(collectionmodel, measuremodel):
     """Iterates through all TimeMaps and mementos in `collectionmodel` and 
     computes the Simhash on their raw content, storing the results in
-    `measuremodel`.
+    `measuremodel`. Mementos with the same content share one Simhash.
     """
     
+    simhashes = {}
+
     urits = collectionmodel.getTimeMapURIList()
     urittotal = len(urits)
     uritcount = 1
@@ -53,9 +55,14 @@ def compute_Simhashes(collectionmodel, measuremodel):
                         shash = "No Simhash due to error"
 
                     else:
-                        shash = Simhash( 
-                            str(collectionmodel.getMementoContent(urim))
-                            ).value
+                        content_digest = collectionmodel.getMementoContentDigest(urim)
+
+                        if content_digest not in simhashes:
+                            simhashes[content_digest] = Simhash(
+                                str(collectionmodel.getMementoContent(urim))
+                                ).value
+
+                        shash = simhashes[content_digest]
 
                 except CollectionModelNoSuchMementoException:
                     shash = "No Simhash due to access error"
@@ -70,9 +77,11 @@ def compute_Simhashes(collectionmodel, measuremodel):
 def compute_raw_content_lengths(collectionmodel, measuremodel):
     """Iterates through all TimeMaps and mementos in `collectionmodel` and 
     computes the content length, storing the results in
-    `measuremodel`.
+    `measuremodel`. Mementos with the same content share one length.
     """
 
+    lengths = {}
+
     urits = collectionmodel.getTimeMapURIList()
     urittotal = len(urits)
     uritcount = 1
@@ -103,7 +112,13 @@ def compute_raw_content_lengths(collectionmodel, measuremodel):
                         length = "No length due to error"
 
                     else:
-                        length = len(collectionmodel.getMementoContent(urim))
+                        content_digest = collectionmodel.getMementoContentDigest(urim)
+
+                        if content_digest not in lengths:
+                            lengths[content_digest] = len(
+                                collectionmodel.getMementoContent(urim))
+
+                        length = lengths[content_digest]
 
                 except CollectionModelNoSuchMementoException:
                     length = "No length due to access error"
@@ -117,9 +132,11 @@ def compute_raw_content_lengths(collectionmodel, measuremodel):
 def detect_languages(collectionmodel, measuremodel):
     """Iterates through all TimeMaps and mementos in `collectionmodel` and
     detects their languages, storing the results in
-    `measuremodel`.
+    `measuremodel`. Mementos with the same content share one language.
     """
 
+    languages = {}
+
     urits = collectionmodel.getTimeMapURIList()
     urittotal = len(urits)
     uritcount = 1
@@ -150,9 +167,14 @@ def detect_languages(collectionmodel, measuremodel):
                         language = "No language detection due to error"
 
                     else:
-                        language = detect(
-                            str(collectionmodel.getMementoContent(urim))
-                        )
+                        content_digest = collectionmodel.getMementoContentDigest(urim)
+
+                        if content_digest not in languages:
+                            languages[content_digest] = detect(
+                                str(collectionmodel.getMementoContent(urim))
+                            )
+
+                        language = languages[content_digest]
 
                 except CollectionModelNoSuchMementoException:
                     language = "Unknown"
@@ -14,14 +14,22 @@ import logging
 def output_json(outputfile, measuremodel, collectionmodel):
     measuremodel.save_as_JSON(outputfile)
 
+def output_jsonl(outputfile, measuremodel, collectionmodel):
+    measuremodel.save_as_JSONL(outputfile)
+
 def output_datafile(outputfile, measuremodel, collectionmodel):
     measuremodel.save_as_goldstandard(outputfile)
 
 def output_csv(outputfile, measuremodel, collectionmodel):
     measuremodel.save_as_CSV(outputfile)
 
+def output_parquet(outputfile, measuremodel, collectionmodel):
+    measuremodel.save_as_Parquet(outputfile)
+
 supported_output_types = {
     'json': output_json,
+    'jsonl': output_jsonl,
     'golddatafile': output_datafile,
-    'csv': output_csv
+    'csv': output_csv,
+    'parquet': output_parquet
 }
\ No newline at end of file
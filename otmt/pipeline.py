@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.pipeline
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module removes boilerplate from and tokenizes mementos while the rest
+of the collection is still downloading, so that measures can start on each
+TimeMap as soon as its mementos are ready.
+"""
+
+import queue
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+
+from .collectionmodel import remove_boilerplate_from_content, \
+    CollectionModelBoilerPlateRemovalFailureException
+from .tokenization import default_pipeline
+
+logger = logging.getLogger(__name__)
+
+default_queue_size = 256
+
+def prepare_memento(content):
+    """Removes the boilerplate from the memento `content` and tokenizes the
+    result, returning both as they would be produced by the measures. The
+    error message is returned instead if boilerplate removal fails.
+
+    This function runs inside the worker processes of a MementoPipeline.
+    """
+
+    try:
+        content_without_boilerplate = remove_boilerplate_from_content(content)
+    except CollectionModelBoilerPlateRemovalFailureException as e:
+        return None, None, str(e)
+
+    tokens = default_pipeline.tokenize(content_without_boilerplate, stemming=True)
+
+    return content_without_boilerplate, tokens, None
+
+class MementoPipeline:
+    """
+        This class prepares each memento for the measures on a pool of
+        `workers` processes as soon as it is stored in a collection model.
+        At most `queue_size` mementos wait for a worker at once, submitting
+        more blocks until one finishes, so downloading never runs too far
+        ahead of the workers.
+
+        The results are stored in the collection model, where
+        `get_memento_data_for_measure` finds them. Mementos share these
+        results with every other memento stored with the same content, so
+        each distinct content is only prepared once. The TimeMaps of the
+        collection model are released via `iterate_ready_TimeMaps` once
+        every one of their mementos has been prepared or has failed.
+
+        Acquisition runs in a background thread via `acquire` while the
+        caller consumes the ready TimeMaps.
+    """
+
+    def __init__(self, workers=None, queue_size=default_queue_size):
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        self.queue_size = queue_size
+        self.slots = threading.BoundedSemaphore(queue_size)
+
+        self.collectionmodel = None
+
+        self.lock = threading.Lock()
+        self.ready_urits = queue.Queue()
+        self.finished = False
+
+        # TimeMaps waiting on mementos, and the TimeMaps each memento is in
+        self.outstanding_urims = {}
+        self.urits_by_urim = {}
+        self.completed_urims = set()
+        self.registered_urits = set()
+
+        # the URI-Ms waiting on each content digest being prepared
+        self.urims_by_content_digest = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def register_TimeMaps(self, collectionmodel):
+        """Starts tracking the mementos of each TimeMap stored in
+        `collectionmodel` that is not tracked already. TimeMaps whose
+        mementos are all complete are released immediately.
+        """
+
+        with self.lock:
+
+            self.collectionmodel = collectionmodel
+
+            for urit in collectionmodel.getTimeMapURIList():
+
+                if urit in self.registered_urits:
+                    continue
+
+                self.registered_urits.add(urit)
+
+                try:
+                    memento_list = collectionmodel.getTimeMap(urit)["mementos"]["list"]
+                except KeyError:
+                    memento_list = []
+
+                outstanding = set()
+
+                for memento in memento_list:
+
+                    urim = memento["uri"]
+
+                    if urim not in self.completed_urims:
+                        outstanding.add(urim)
+                        self.urits_by_urim.setdefault(urim, []).append(urit)
+
+                if len(outstanding) == 0:
+                    self.ready_urits.put(urit)
+                else:
+                    self.outstanding_urims[urit] = outstanding
+
+    def complete_memento(self, urim):
+        """Records that the memento at `urim` needs no more work, releasing
+        the TimeMaps that were only waiting on it.
+        """
+
+        with self.lock:
+
+            self.completed_urims.add(urim)
+
+            for urit in self.urits_by_urim.pop(urim, []):
+
+                outstanding = self.outstanding_urims[urit]
+                outstanding.discard(urim)
+
+                if len(outstanding) == 0:
+                    del self.outstanding_urims[urit]
+                    self.ready_urits.put(urit)
+
+    def submit(self, collectionmodel, urim, content):
+        """Queues the memento at `urim`, already stored in `collectionmodel`
+        with HTTP entity `content`, for boilerplate removal and tokenization.
+        Blocks while the queue is full.
+
+        Content that is already being prepared for another URI-M is not
+        queued again, nor is content that was prepared, or failed, before.
+        """
+
+        content_digest = collectionmodel.getMementoContentDigest(urim)
+
+        with self.lock:
+
+            waiting_urims = self.urims_by_content_digest.get(content_digest)
+
+            if waiting_urims is not None:
+                waiting_urims.append(urim)
+                return
+
+        if collectionmodel.getMementoTokens(urim,
+            stemming=True, remove_boilerplate=True) is not None or \
+            collectionmodel.getBoilerplateRemovalFailure(urim) is not None:
+            self.complete_memento(urim)
+            return
+
+        self.slots.acquire()
+
+        with self.lock:
+            self.urims_by_content_digest[content_digest] = [ urim ]
+
+        try:
+            future = self.executor.submit(prepare_memento, content)
+        except Exception:
+            with self.lock:
+                del self.urims_by_content_digest[content_digest]
+
+            self.slots.release()
+            raise
+
+        future.add_done_callback(
+            lambda future: self.store_prepared_memento(
+                collectionmodel, urim, content_digest, future)
+        )
+
+    def store_prepared_memento(self, collectionmodel, urim, content_digest,
+        future):
+
+        try:
+            content_without_boilerplate, tokens, errormsg = future.result()
+
+            if errormsg is None:
+
+                collectionmodel.addMementoContentWithoutBoilerplate(
+                    urim, content_without_boilerplate)
+                collectionmodel.addMementoTokens(urim, tokens,
+                    stemming=True, remove_boilerplate=True)
+
+            else:
+                # the measures will encounter and record this error themselves
+                logger.warning("Failed to remove boilerplate from URI-M {}: "
+                    "{}".format(urim, errormsg))
+
+                collectionmodel.addBoilerplateRemovalFailure(urim, errormsg)
+
+        except Exception:
+            logger.exception("Failed to prepare URI-M {}".format(urim))
+
+        finally:
+            self.slots.release()
+
+            with self.lock:
+                urims = self.urims_by_content_digest.pop(content_digest)
+
+            for urim in urims:
+                self.complete_memento(urim)
+
+    def finish(self, collectionmodel=None):
+        """Indicates that no more mementos will be submitted, releasing
+        every remaining TimeMap, including those of `collectionmodel`
+        that were never registered, once the queued mementos are done.
+        """
+
+        if self.finished:
+            return
+
+        if collectionmodel is not None:
+            self.register_TimeMaps(collectionmodel)
+
+        # wait for the queued mementos by taking every slot
+        for i in range(0, self.queue_size):
+            self.slots.acquire()
+
+        for i in range(0, self.queue_size):
+            self.slots.release()
+
+        with self.lock:
+
+            for urit in self.outstanding_urims:
+                self.ready_urits.put(urit)
+
+            self.outstanding_urims = {}
+            self.urits_by_urim = {}
+            self.finished = True
+
+            self.ready_urits.put(None)
+
+    def acquire(self, acquisition_function, *args, **kwargs):
+        """Runs `acquisition_function`, such as `get_collection_model`, in a
+        background thread with the given arguments and this pipeline,
+        returning a future for the collection model it produces.
+        `finish` is called once it returns.
+        """
+
+        result = concurrent.futures.Future()
+
+        def run():
+
+            collectionmodel = None
+
+            try:
+                collectionmodel = acquisition_function(*args, pipeline=self, **kwargs)
+                result.set_result(collectionmodel)
+
+            except BaseException as e:
+                result.set_exception(e)
+
+            finally:
+                self.finish(collectionmodel)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        return result
+
+    def iterate_ready_TimeMaps(self):
+        """Yields the URI-T of each TimeMap once all of its mementos are
+        ready, until `finish` is called and every TimeMap has been yielded.
+        """
+
+        while True:
+
+            urit = self.ready_urits.get()
+
+            if urit is None:
+                break
+
+            yield urit
+
+    def close(self):
+        """Shuts down the worker processes."""
+
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,626 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.sqlite_collectionmodel
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module stores the collection model in a single SQLite database rather
+than in a directory of files, which scales to much larger collections.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+from datetime import datetime
+
+from .collectionmodel import CollectionModel, \
+    CollectionModelException, CollectionModelMementoErrorException, \
+    CollectionModelNoSuchMementoException, \
+    CollectionModelNoSuchTimeMapException, \
+    CollectionModelBoilerPlateRemovalFailureException, \
+    convert_timemap_content_to_dict, convert_stored_timemap_to_dict, \
+    make_read_only_timemap, remove_boilerplate_from_content, \
+    calculate_content_digest, serialize_tokens, deserialize_tokens, json_serial
+
+logger = logging.getLogger(__name__)
+
+# the number of writes grouped into a single transaction
+default_batch_size = 500
+
+schema = """
+CREATE TABLE IF NOT EXISTS timemaps (
+    urit TEXT PRIMARY KEY,
+    content TEXT,
+    headers TEXT,
+    timemap TEXT
+);
+
+CREATE TABLE IF NOT EXISTS mementos (
+    urim TEXT PRIMARY KEY,
+    content_digest TEXT,
+    headers TEXT
+);
+
+CREATE TABLE IF NOT EXISTS memento_contents (
+    content_digest TEXT PRIMARY KEY,
+    content BLOB,
+    content_without_boilerplate BLOB
+);
+
+CREATE TABLE IF NOT EXISTS boilerplate_failures (
+    content_digest TEXT PRIMARY KEY,
+    error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS memento_errors (
+    urim TEXT PRIMARY KEY,
+    content BLOB,
+    headers TEXT,
+    error_information BLOB
+);
+
+CREATE TABLE IF NOT EXISTS memento_tokens (
+    content_digest TEXT,
+    stemming INTEGER,
+    remove_boilerplate INTEGER,
+    tokens BLOB,
+    PRIMARY KEY (content_digest, stemming, remove_boilerplate)
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    progress TEXT
+);
+"""
+
+class SQLiteCollectionModel(CollectionModel):
+    """
+        This class stores the same data as CollectionModel, but in a single
+        SQLite database at `database_filename` instead of a directory of
+        files. URI-Ms and URI-Ts are the primary keys of their tables, so
+        lookups use an index. As with CollectionModel, memento content, the
+        content without boilerplate, and the tokens are stored once per
+        distinct content, keyed by its digest.
+
+        The database is in WAL mode, so other processes, such as the
+        workers of `score_TimeMaps`, may read it while it is written. Writes
+        are grouped into transactions of `batch_size` statements, and are
+        only visible to other processes after `flush` or `checkpoint`.
+
+        SQLite allows only one writer at a time, so worker processes call
+        `deferWrites`. Their tokens and boilerplate-free content are then
+        sent back and stored by the parent process.
+    """
+
+    def __init__(self, database_filename, batch_size=default_batch_size):
+
+        # kept under this name so worker processes can open the same database
+        self.working_directory = database_filename
+        self.database_filename = database_filename
+        self.batch_size = batch_size
+        self.pending_writes = 0
+
+        # the writes kept for takeDeferredWrites, None if writes are executed
+        self.deferred_writes = None
+
+        self.collection_timemaps = {}
+
+        # the boilerplate removal error recorded for each URI-M
+        self.boilerplate_failures = {}
+
+        directory = os.path.dirname(os.path.abspath(database_filename))
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # the pipeline stores its results from another thread
+        self.lock = threading.RLock()
+
+        self.connection = sqlite3.connect(database_filename,
+            isolation_level=None, check_same_thread=False)
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+        self.connection.executescript(schema)
+
+    def __del__(self):
+
+        connection = getattr(self, "connection", None)
+
+        if connection is not None:
+
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Failed to commit pending writes to {}".format(
+                    self.database_filename))
+
+            connection.close()
+
+    def write(self, statement, parameters):
+        """Executes the SQL `statement` with `parameters` within the current
+        transaction, committing once `batch_size` writes have accumulated.
+
+        After `deferWrites`, the write is kept for `takeDeferredWrites`
+        instead.
+        """
+
+        with self.lock:
+
+            if self.deferred_writes is not None:
+                self.deferred_writes.append( (statement, parameters) )
+                return
+
+            if not self.connection.in_transaction:
+                self.connection.execute("BEGIN")
+
+            self.connection.execute(statement, parameters)
+
+            self.pending_writes += 1
+
+            if self.pending_writes >= self.batch_size:
+                self.flush()
+
+    def read(self, statement, parameters=()):
+        """Returns the first row produced by the SQL `statement` with
+        `parameters`, or None if there is none.
+        """
+
+        with self.lock:
+            return self.connection.execute(statement, parameters).fetchone()
+
+    def read_column(self, statement, parameters=()):
+        """Returns a list of the first column of every row produced by
+        the SQL `statement` with `parameters`.
+        """
+
+        with self.lock:
+            return [ row[0] for row in
+                self.connection.execute(statement, parameters) ]
+
+    def flush(self):
+        """Commits any pending writes so that other processes opening the
+        same database see everything stored so far.
+        """
+
+        with self.lock:
+
+            if self.connection.in_transaction:
+                self.connection.execute("COMMIT")
+
+            self.pending_writes = 0
+
+    def deferWrites(self):
+        """Keeps every later write for `takeDeferredWrites` rather than
+        executing it, so that this process never holds the database's write
+        lock. Writes kept this way are not seen by reads against this
+        object.
+        """
+
+        with self.lock:
+            self.flush()
+            self.deferred_writes = []
+
+    def takeDeferredWrites(self):
+        """Returns, and forgets, the writes kept since `deferWrites` was
+        called, as a list of statements and their parameters.
+        """
+
+        with self.lock:
+            writes = self.deferred_writes or []
+
+            if self.deferred_writes is not None:
+                self.deferred_writes = []
+
+            return writes
+
+    def applyWrites(self, writes):
+        """Executes the `writes` returned by `takeDeferredWrites` of another
+        copy of this collection model, such as one in a worker process.
+        """
+
+        for statement, parameters in writes:
+            self.write(statement, parameters)
+
+    def checkpoint(self, progress=None):
+        """Commits all data stored so far, so that a later run against the
+        same database resumes from this point, and records the dict
+        `progress`, along with counts of what is stored.
+        """
+
+        checkpoint_data = {
+            "checkpoint time": datetime.utcnow(),
+            "timemaps": self.read("SELECT COUNT(*) FROM timemaps")[0],
+            "mementos": self.read("SELECT COUNT(*) FROM mementos")[0],
+            "memento errors": self.read("SELECT COUNT(*) FROM memento_errors")[0]
+        }
+
+        if progress is not None:
+            checkpoint_data.update(progress)
+
+        self.write("INSERT OR REPLACE INTO checkpoints (id, progress) "
+            "VALUES (1, ?)", (json.dumps(checkpoint_data, default=json_serial),))
+
+        self.flush()
+
+    def getCheckpoint(self):
+        """Returns the data recorded by the last call to `checkpoint` against
+        this database, or None if there was none.
+        """
+
+        row = self.read("SELECT progress FROM checkpoints WHERE id = 1")
+
+        if row is None:
+            return None
+
+        return json.loads(row[0])
+
+    def addTimeMap(self, urit, content, headers, timemap=None):
+        """Adds a TimeMap to the object, parsing it if it is in link-format.
+
+        If JSON is given as `content`, then it is just converted to a dict.
+        If the dict form of `content` is already known, it can be given as
+        `timemap` so that `content` is not parsed again.
+        """
+
+        if timemap is None:
+            timemap = convert_timemap_content_to_dict(content)
+
+        self.write("INSERT INTO timemaps (urit, content, headers, timemap) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT (urit) DO UPDATE SET "
+            "content = excluded.content, headers = excluded.headers, "
+            "timemap = excluded.timemap", (
+                urit, content, json.dumps(headers, default=json_serial),
+                json.dumps(timemap, default=json_serial)
+            ))
+
+        self.collection_timemaps[urit] = make_read_only_timemap(timemap)
+
+    def getTimeMap(self, urit):
+        """
+            Returns the read-only dict form of TimeMap at `urit` provided
+            that it was previously stored via `addTimeMap`.
+        """
+
+        try:
+            return self.collection_timemaps[urit]
+        except KeyError:
+            pass
+
+        row = self.read("SELECT timemap FROM timemaps WHERE urit = ?", (urit,))
+
+        if row is None:
+            raise CollectionModelNoSuchTimeMapException(
+                "The URI-T [{}] is not saved in this collection model".format(
+                    urit))
+
+        timemap = convert_stored_timemap_to_dict(row[0])
+        self.collection_timemaps[urit] = timemap
+
+        return timemap
+
+    def addMemento(self, urim, content, headers):
+        """Adds Memento `content` specified by `urim` to the object, along
+        with its headers.
+        """
+
+        content_digest = calculate_content_digest(content)
+
+        # content already stored for another URI-M is shared with it
+        self.write("INSERT OR IGNORE INTO memento_contents "
+            "(content_digest, content) VALUES (?, ?)", (content_digest, content))
+
+        self.write("INSERT INTO mementos (urim, content_digest, headers) "
+            "VALUES (?, ?, ?) ON CONFLICT (urim) DO UPDATE SET "
+            "content_digest = excluded.content_digest, "
+            "headers = excluded.headers", (
+                urim, content_digest, json.dumps(headers, default=json_serial)
+            ))
+
+    def addMementoError(self, urim, content, headers, errorinformation):
+        """Associates `errorinformation` with memento specified by `urim` to
+        the object, `content` and `headers` can also be stored from the given
+        input transaction. If there are no headers or content, use content=""
+        and headers={}.
+        """
+
+        self.write("INSERT OR REPLACE INTO memento_errors "
+            "(urim, content, headers, error_information) VALUES (?, ?, ?, ?)", (
+                urim, content, json.dumps(headers, default=json_serial),
+                errorinformation
+            ))
+
+    def clearMementoErrors(self, urims):
+        """Forgets the errors stored via `addMementoError` for each memento
+        in `urims`, so that they can be acquired again via `addMemento`.
+        """
+
+        for urim in urims:
+            self.write("DELETE FROM memento_errors WHERE urim = ?", (urim,))
+
+    def hasMementoError(self, urim):
+        """Returns True if an error was stored for the memento at `urim`."""
+
+        return self.read("SELECT 1 FROM memento_errors WHERE urim = ?",
+            (urim,)) is not None
+
+    def no_such_memento(self, urim):
+        """Logs and returns the exception raised for a `urim` that is not
+        stored in this object.
+        """
+
+        err_msg = "The URI-M [{}] is not saved in this " \
+            "collection model".format(urim)
+
+        logger.error(err_msg)
+
+        return CollectionModelNoSuchMementoException(err_msg)
+
+    def getMementoContent(self, urim):
+        """Returns the HTTP entity of memento at `urim` provided that it
+        was previously stored via `addMemento`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+        """
+
+        content_digest = self.getMementoContentDigest(urim)
+
+        row = self.read("SELECT content FROM memento_contents "
+            "WHERE content_digest = ?", (content_digest,))
+
+        return row[0]
+
+    def getMementoContentDigest(self, urim):
+        """Returns the digest of the HTTP entity of memento at `urim`,
+        which is shared by all mementos stored with the same content,
+        provided that it was previously stored via `addMemento`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+        """
+
+        if self.hasMementoError(urim):
+            raise CollectionModelMementoErrorException
+
+        row = self.read("SELECT content_digest FROM mementos WHERE urim = ?",
+            (urim,))
+
+        if row is None:
+            raise self.no_such_memento(urim)
+
+        return row[0]
+
+    def getMementoErrorInformation(self, urim):
+        """Returns the error information associated with `urim`, provided that
+        it was previously stored via `addMementoError`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+        """
+
+        row = self.read("SELECT error_information FROM memento_errors "
+            "WHERE urim = ?", (urim,))
+
+        if row is not None:
+            return row[0]
+
+        if self.read("SELECT 1 FROM mementos WHERE urim = ?", (urim,)) is not None:
+            return None
+
+        raise self.no_such_memento(urim)
+
+    def getMementoContentWithoutBoilerplate(self, urim):
+        """Returns the HTTP entity of memento at `urim` with all boilerplate
+        removed, provided that it was previously stored via `addMemento`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+
+        If the boilerplate removal process produces an error for `urim`,
+        then CollectionModelBoilerPlateRemovalFailureException is thrown.
+        The error is recorded via `addBoilerplateRemovalFailure`, so later
+        calls, in this run or later ones, throw it again without parsing.
+        """
+
+        errormsg = self.boilerplate_failures.get(urim)
+
+        if errormsg is not None:
+            raise CollectionModelBoilerPlateRemovalFailureException(errormsg)
+
+        if self.hasMementoError(urim):
+            raise CollectionModelMementoErrorException(
+                "Errors were recorded for URI-M {}".format(urim))
+
+        row = self.read("SELECT c.content_digest, "
+            "c.content_without_boilerplate, f.error FROM mementos m "
+            "JOIN memento_contents c ON c.content_digest = m.content_digest "
+            "LEFT JOIN boilerplate_failures f "
+            "ON f.content_digest = m.content_digest "
+            "WHERE m.urim = ?", (urim,))
+
+        if row is None:
+            raise self.no_such_memento(urim)
+
+        content_digest, content_without_boilerplate, errormsg = row
+
+        if errormsg is not None:
+            self.boilerplate_failures[urim] = errormsg
+            raise CollectionModelBoilerPlateRemovalFailureException(errormsg)
+
+        if content_without_boilerplate is None:
+
+            logger.debug("Boilerplate content has not yet been "
+                "generated, generating...")
+
+            content = self.read("SELECT content FROM memento_contents "
+                "WHERE content_digest = ?", (content_digest,))[0]
+
+            try:
+                content_without_boilerplate = remove_boilerplate_from_content(content)
+
+            except CollectionModelBoilerPlateRemovalFailureException as e:
+                self.addBoilerplateRemovalFailure(urim, str(e))
+                raise
+
+            self.write("UPDATE memento_contents SET "
+                "content_without_boilerplate = ? WHERE content_digest = ?",
+                (content_without_boilerplate, content_digest))
+
+        return content_without_boilerplate
+
+    def addMementoContentWithoutBoilerplate(self, urim, content):
+        """Stores `content`, the HTTP entity of the memento at `urim` with
+        all boilerplate removed, so that `getMementoContentWithoutBoilerplate`
+        need not generate it.
+        """
+
+        row = self.read("SELECT content_digest FROM mementos WHERE urim = ?",
+            (urim,))
+
+        if row is None:
+            raise self.no_such_memento(urim)
+
+        self.write("UPDATE memento_contents SET content_without_boilerplate = ? "
+            "WHERE content_digest = ?", (content, row[0]))
+
+    def hasMementoContentWithoutBoilerplate(self, urim):
+        """Returns True if the content without boilerplate of the memento
+        at `urim` is stored, so `getMementoContentWithoutBoilerplate` need
+        not generate it.
+        """
+
+        if self.hasMementoError(urim):
+            return False
+
+        row = self.read("SELECT c.content_without_boilerplate IS NOT NULL "
+            "FROM mementos m JOIN memento_contents c "
+            "ON c.content_digest = m.content_digest WHERE m.urim = ?", (urim,))
+
+        return row is not None and bool(row[0])
+
+    def addBoilerplateRemovalFailure(self, urim, errormsg):
+        """Records `errormsg`, the reason boilerplate could not be removed
+        from the memento at `urim`, so that later attempts can be skipped.
+        """
+
+        row = self.read("SELECT content_digest FROM mementos WHERE urim = ?",
+            (urim,))
+
+        if row is None:
+            raise self.no_such_memento(urim)
+
+        self.write("INSERT OR REPLACE INTO boilerplate_failures "
+            "(content_digest, error) VALUES (?, ?)", (row[0], errormsg))
+
+        self.boilerplate_failures[urim] = errormsg
+
+    def getBoilerplateRemovalFailure(self, urim):
+        """Returns the error message recorded via
+        `addBoilerplateRemovalFailure` for the memento at `urim`, or None if
+        no failure was recorded.
+        """
+
+        row = self.read("SELECT f.error FROM mementos m "
+            "JOIN boilerplate_failures f ON f.content_digest = m.content_digest "
+            "WHERE m.urim = ?", (urim,))
+
+        if row is None:
+            return None
+
+        return row[0]
+
+    def getMementoTokens(self, urim, stemming=True, remove_boilerplate=True):
+        """Returns the tokens of the memento at `urim` produced with the
+        given `stemming` and `remove_boilerplate` settings, provided that
+        they were previously stored via `addMementoTokens`.
+
+        Returns None if no such tokens are stored.
+        """
+
+        if self.hasMementoError(urim):
+            return None
+
+        row = self.read("SELECT t.tokens FROM mementos m "
+            "JOIN memento_tokens t ON t.content_digest = m.content_digest "
+            "WHERE m.urim = ? AND t.stemming = ? AND t.remove_boilerplate = ?",
+            (urim, int(stemming), int(remove_boilerplate)))
+
+        if row is None:
+            return None
+
+        return deserialize_tokens(row[0])
+
+    def addMementoTokens(self, urim, tokens, stemming=True, remove_boilerplate=True):
+        """Stores the `tokens` produced from the memento at `urim` with the
+        given `stemming` and `remove_boilerplate` settings so that later
+        runs need not tokenize the memento again.
+        """
+
+        row = self.read("SELECT content_digest FROM mementos WHERE urim = ?",
+            (urim,))
+
+        if row is None:
+            raise self.no_such_memento(urim)
+
+        self.write("INSERT OR REPLACE INTO memento_tokens "
+            "(content_digest, stemming, remove_boilerplate, tokens) "
+            "VALUES (?, ?, ?, ?)",
+            (row[0], int(stemming), int(remove_boilerplate),
+            serialize_tokens(tokens)))
+
+    def getHeaders(self, objecttype, uri):
+        """Returns the headers associated with URI `uri`.
+        `objecttype` must be set to timemaps if headers
+        for a TimeMap are desired.
+        """
+
+        if objecttype == "timemaps":
+            row = self.read("SELECT headers FROM timemaps WHERE urit = ?", (uri,))
+        else:
+            row = self.read("SELECT headers FROM mementos WHERE urim = ?", (uri,))
+
+        if row is None:
+            raise CollectionModelException(
+                "The URI [{}] headers are not saved "
+                "in this collection model".format(
+                    uri))
+
+        return json.loads(row[0])
+
+    def getMementoHeaders(self, urim):
+        """Returns the headers associated with memento at `urim`.
+        """
+
+        if self.hasMementoError(urim):
+            raise CollectionModelMementoErrorException
+
+        return self.getHeaders("mementos", urim)
+
+    def getMementoURIList(self):
+        """Returns a list of all URI-Ms stored in this object."""
+
+        return self.read_column("SELECT urim FROM mementos ORDER BY rowid")
+
+    def getMementoErrorURIList(self):
+        """Returns a list of all URI-Ms with errors stored in this object."""
+
+        return self.read_column("SELECT urim FROM memento_errors ORDER BY rowid")
+
+    def getTimeMapURIList(self):
+        """Returns a list of all URI-Ts stored in this object."""
+
+        return self.read_column("SELECT urit FROM timemaps ORDER BY rowid")
@@ -7,6 +7,9 @@ otmt.timemap
 This module allows one to parse a link-format TimeMap.
 """
 
+import re
+import codecs
+import itertools
 import requests
 from copy import deepcopy
 
@@ -19,6 +22,110 @@ class MalformedLinkFormatTimeMap(Exception):
     """
     pass
 
+rfc1123_months = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12
+}
+
+rfc1123_pattern = re.compile(
+    r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun), (\d\d) "
+    r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) "
+    r"(\d\d\d\d) (\d\d):(\d\d):(\d\d) GMT", re.ASCII)
+
+# a link, its attributes, and what follows it, as the state machine in
+# iter_local_dicts_by_character reads them when nothing is out of place
+link_pattern = re.compile(
+    r'\s*<([^>]*)>\s*((?:;[^=";,]*=\s*"[^"]*"\s*)+)(,|\Z)')
+
+# the start of a link that later text may still complete
+partial_link_pattern = re.compile(
+    r'\s*(?:<[^>]*(?:>\s*(?:;[^=";,]*=\s*"[^"]*"\s*)*'
+    r'(?:;[^=";,]*(?:=\s*(?:"[^"]*)?)?)?)?)?')
+
+attribute_pattern = re.compile(r';([^=";,]*)=\s*"([^"]*)"')
+
+def convert_RFC1123_to_datetime(datetime_text):
+    """
+        Converts `datetime_text`, in the fixed format used by the datetime
+        attribute of TimeMaps (e.g., Tue, 21 Jan 2016 15:45:06 GMT), into a
+        Python datetime object, falling back to strptime for anything else.
+    """
+
+    match = rfc1123_pattern.fullmatch(datetime_text)
+
+    if match:
+
+        day, month, year, hour, minute, second = match.groups()
+
+        try:
+            return datetime(int(year), rfc1123_months[month], int(day),
+                int(hour), int(minute), int(second))
+        except ValueError:
+            # strptime raises the same error as before for impossible dates
+            pass
+
+    return datetime.strptime(datetime_text, "%a, %d %b %Y %H:%M:%S GMT")
+
+def process_local_dict(local_dict, working_dict):
+    """
+        Adds the link in `local_dict`, which maps its URI to a dictionary
+        of its attributes, to `working_dict`, the dictionary being built
+        from a link format TimeMap.
+    """
+
+    first = False
+    last = False
+
+    for uri in local_dict:
+
+        relation = local_dict[uri]["rel"]
+
+        if relation == "original":
+            working_dict["original_uri"] = uri
+
+        elif relation == "timegate":
+            working_dict["timegate_uri"] = uri
+
+        elif relation == "self":
+            working_dict["timemap_uri"] = {}
+            working_dict["timemap_uri"]["link_format"] = uri
+
+        elif "memento" in relation:
+            working_dict.setdefault("mementos", {})
+
+            if "first" in relation:
+                working_dict["mementos"]["first"] = {}
+                working_dict["mementos"]["first"]["uri"] = uri
+                first = True
+
+            if "last" in relation:
+                working_dict["mementos"]["last"] = {}
+                working_dict["mementos"]["last"]["uri"] = uri
+                last = True
+
+            working_dict["mementos"].setdefault("list", [])
+
+            local_memento_dict = {
+                "datetime": None,
+                "uri": uri
+            }
+
+        if "datetime" in local_dict[uri]:
+
+            mdt = convert_RFC1123_to_datetime(local_dict[uri]["datetime"])
+
+            local_memento_dict["datetime"] = mdt
+
+            working_dict["mementos"]["list"].append(local_memento_dict)
+
+            if first:
+                working_dict["mementos"]["first"]["datetime"] = mdt
+
+            if last:
+                working_dict["mementos"]["last"]["datetime"] = mdt
+            
+    return working_dict
+
 def convert_LinkTimeMap_to_dict(timemap_text, skipErrors=False):
     """
         A function to convert the link format TimeMap text into a Python 
@@ -33,64 +140,137 @@ def convert_LinkTimeMap_to_dict(timemap_text, skipErrors=False):
         behavior.
     """
 
-    def process_local_dict(local_dict, working_dict):
+    dict_timemap = {}
+
+    for uri, attributes in iter_LinkTimeMap_links([ timemap_text ],
+        skipErrors=skipErrors):
+
+        process_local_dict({ uri: attributes }, dict_timemap)
+
+    return dict_timemap
+
+def convert_LinkTimeMap_to_dict_by_character(timemap_text, skipErrors=False):
+    """
+        Converts the link format TimeMap text into a Python dictionary,
+        like `convert_LinkTimeMap_to_dict`, one character at a time.
+    """
+
+    dict_timemap = {}
+
+    for local_dict in iter_local_dicts_by_character(timemap_text,
+        skipErrors=skipErrors):
+
+        process_local_dict(local_dict, dict_timemap)
 
-        first = False
-        last = False
+    return dict_timemap
 
-        for uri in local_dict:
+def iter_LinkTimeMap_links(chunks, skipErrors=False, encoding="utf-8"):
+    """
+        Generates the URI and a dictionary of the attributes of each link in
+        a link format TimeMap as soon as it is complete, reading the TimeMap
+        from `chunks`, an iterable of strings, or of bytes in `encoding`,
+        such as the `iter_content` of a streamed response. Only the link
+        being read is held in memory.
+
+        Each link is read with a regular expression. The rest of a TimeMap
+        that does not fit it is read one character at a time by
+        `iter_local_dicts_by_character` instead, so the links and errors
+        are the same either way. Links come out in the order that
+        `convert_LinkTimeMap_to_dict` processes them, including the last
+        link twice when nothing follows its trailing comma.
+    """
 
-            relation = local_dict[uri]["rel"]
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
 
-            if relation == "original":
-                working_dict["original_uri"] = uri
+    def decode(chunk):
+        if type(chunk) == bytes:
+            return decoder.decode(chunk)
+        return chunk
 
-            elif relation == "timegate":
-                working_dict["timegate_uri"] = uri
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    # the number of characters read before the buffer
+    charcount = 0
+    previous_link = None
+    ended = False
 
-            elif relation == "self":
-                working_dict["timemap_uri"] = {}
-                working_dict["timemap_uri"]["link_format"] = uri
+    while True:
 
-            elif "memento" in relation:
-                working_dict.setdefault("mementos", {})
+        match = link_pattern.match(buffer, position)
 
-                if "first" in relation:
-                    working_dict["mementos"]["first"] = {}
-                    working_dict["mementos"]["first"]["uri"] = uri
-                    first = True
+        if match is not None and (match.group(3) == "," or ended):
 
-                if "last" in relation:
-                    working_dict["mementos"]["last"] = {}
-                    working_dict["mementos"]["last"]["uri"] = uri
-                    last = True
+            uri, attribute_text, separator = match.groups()
+            attributes = {}
 
-                working_dict["mementos"].setdefault("list", [])
+            for key, value in attribute_pattern.findall(attribute_text):
+                attributes[key.strip()] = value.strip()
 
-                local_memento_dict = {
-                    "datetime": None,
-                    "uri": uri
-                }
+            previous_link = (uri.strip(), attributes)
+            yield previous_link
 
-            if "datetime" in local_dict[uri]:
+            position = match.end()
 
-                mdt = datetime.strptime(local_dict[uri]["datetime"],
-                    "%a, %d %b %Y %H:%M:%S GMT")
+            if separator == "":
+                return
 
-                local_memento_dict["datetime"] = mdt
+            continue
 
-                working_dict["mementos"]["list"].append(local_memento_dict)
+        rest = buffer[position:]
 
-                if first:
-                    working_dict["mementos"]["first"]["datetime"] = mdt
+        if ended:
 
-                if last:
-                    working_dict["mementos"]["last"]["datetime"] = mdt
-                
-        return working_dict
+            if rest == "" and previous_link is not None:
+                # nothing follows the comma of the last link
+                yield previous_link
+                return
 
+            if rest == "" or rest.isspace():
+                return
 
-    dict_timemap = {}
+        # a link that may still be completed by later chunks
+        elif match is not None or partial_link_pattern.fullmatch(rest):
+
+            try:
+                text = decode(next(chunks))
+            except StopIteration:
+                text = decoder.decode(b"", final=True)
+                ended = True
+
+            charcount += position
+            buffer = rest + text
+            position = 0
+
+            continue
+
+        def remaining_text():
+
+            yield rest
+
+            for chunk in chunks:
+                yield decode(chunk)
+
+            yield decoder.decode(b"", final=True)
+
+        # the state machine starts where a link would, as after a comma
+        remaining = itertools.chain.from_iterable(remaining_text())
+
+        for local_dict in iter_local_dicts_by_character(remaining,
+            skipErrors=skipErrors, charcount=charcount + position):
+
+            for uri, attributes in local_dict.items():
+                yield uri, attributes
+
+        return
+
+def iter_local_dicts_by_character(characters, skipErrors=False, charcount=0):
+    """
+        Generates a dictionary mapping the URI of each link in a link format
+        TimeMap to a dictionary of its attributes, reading `characters` one
+        at a time. Errors are reported at their position after the first
+        `charcount` characters of the TimeMap.
+    """
 
     # current_char = ""
     uri = ""
@@ -98,9 +278,8 @@ def convert_LinkTimeMap_to_dict(timemap_text, skipErrors=False):
     value = ""
     local_dict = {}
     state = 0
-    charcount = 0
 
-    for character in timemap_text:
+    for character in characters:
         charcount += 1
 
         if state == 0:
@@ -156,7 +335,7 @@ def convert_LinkTimeMap_to_dict(timemap_text, skipErrors=False):
             elif character == ',':
                 state = 0
 
-                process_local_dict(local_dict, dict_timemap)
+                yield local_dict
 
             elif character == '"':
                 state = 5
@@ -188,6 +367,4 @@ def convert_LinkTimeMap_to_dict(timemap_text, skipErrors=False):
                 raise MalformedLinkFormatTimeMap(
                     "discovered unknown state while processing TimeMap")
 
-    process_local_dict(local_dict, dict_timemap)
-
-    return dict_timemap
\ No newline at end of file
+    yield local_dict
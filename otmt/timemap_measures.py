@@ -7,13 +7,15 @@ otmt.timemap_measures
 This module executes the different timemap measures available.
 """
 
+import math
 import distance
-import string
+import functools
+import itertools
 import logging
+import multiprocessing
 
-from nltk import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem.porter import PorterStemmer
+import numpy
+import scipy.sparse
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -22,25 +24,22 @@ from simhash import Simhash
 
 from gensim import corpora, models, similarities
 
-from .collectionmodel import CollectionModelMementoErrorException, \
+from .collectionmodel import CollectionModelException, \
+    CollectionModelMementoErrorException, \
     CollectionModelBoilerPlateRemovalFailureException, \
     CollectionModelNoSuchMementoException
+from .measuremodel import compare_scores
+from .tokenization import default_pipeline
+from .levenshtein import levenshtein_engines, default_levenshtein_engine
 
 logger = logging.getLogger(__name__)
 
-stemmer = PorterStemmer()
-
 def stem_tokens(tokens):
     """Takes a list of `tokens` and feeds it through the Porter Stemmer, 
     producing a new list of stemmed tokens.
     """
 
-    stemmed = []
-
-    for item in tokens:
-        stemmed.append( stemmer.stem(item) )
-
-    return stemmed
+    return default_pipeline.stem_tokens(tokens)
 
 def full_tokenize(text, stemming=True):
     """Takes in `text` and produces a list of stemmed tokens with stopwords 
@@ -49,36 +48,87 @@ def full_tokenize(text, stemming=True):
     It currently only supports English stopwords.
     """
 
-    stopset = stopwords.words("english") + list(string.punctuation)
-
-    if type(text) == bytes:
-        tokens = word_tokenize(text.decode("utf8"))
-    else:
-        tokens = word_tokenize(text)
-
-    if stemming:
-        stems = stem_tokens(tokens)
-
-    return [ i for i in stems if i not in stopset ]
+    return default_pipeline.tokenize(text, stemming=stemming)
 
 def get_memento_data_for_measure(urim, collection_model,
-    tokenize=True, stemming=True, remove_boilerplate=True):
+    tokenize=True, stemming=True, remove_boilerplate=True,
+    memento_data_cache=None):
     """For a give memento identified by a `urim`, this function extracts the 
     content of that URI-M from the given `collection_model` object. It then
     applies tokenizing, stemming, or removing of boilerplate depending 
     on the settings of the `tokenize`, `stemming`, or
     `remove_boilerplate` variables.
+
+    If a dict is supplied as `memento_data_cache`, then the results (and
+    any CollectionModelException, which the measures record as errors for
+    the memento) for each preprocessing variant are kept there so that
+    several measures can share the same content without reading and
+    tokenizing it again.
+
+    Tokens are also stored in `collection_model` so that later runs against
+    the same collection need not tokenize the memento again.
     """
 
-    data = None
+    if memento_data_cache is None:
 
-    if remove_boilerplate:
-        data = collection_model.getMementoContentWithoutBoilerplate(urim)
-    else:
-        data = collection_model.getMementoContent(urim)
+        data = None
+
+        if tokenize:
+            data = collection_model.getMementoTokens(urim, 
+                stemming=stemming, remove_boilerplate=remove_boilerplate)
+
+            if data is not None:
+                return data
+
+        if remove_boilerplate:
+            data = collection_model.getMementoContentWithoutBoilerplate(urim)
+        else:
+            data = collection_model.getMementoContent(urim)
+
+        if tokenize:
+            data = full_tokenize(data, stemming=stemming)
+            collection_model.addMementoTokens(urim, data,
+                stemming=stemming, remove_boilerplate=remove_boilerplate)
+
+        return data
+
+    if not tokenize:
+        stemming = False
+
+    cache_key = (urim, tokenize, stemming, remove_boilerplate)
+
+    if cache_key not in memento_data_cache:
+
+        try:
+
+            if tokenize:
+                data = collection_model.getMementoTokens(urim,
+                    stemming=stemming, remove_boilerplate=remove_boilerplate)
+
+                if data is None:
+                    data = get_memento_data_for_measure(urim, collection_model,
+                        tokenize=False, stemming=False,
+                        remove_boilerplate=remove_boilerplate,
+                        memento_data_cache=memento_data_cache)
 
-    if tokenize:
-        data = full_tokenize(data, stemming=stemming)
+                    data = full_tokenize(data, stemming=stemming)
+                    collection_model.addMementoTokens(urim, data,
+                        stemming=stemming, remove_boilerplate=remove_boilerplate)
+
+            else:
+                data = get_memento_data_for_measure(urim, collection_model,
+                    tokenize=False, stemming=False,
+                    remove_boilerplate=remove_boilerplate)
+
+            memento_data_cache[cache_key] = (data, None)
+
+        except CollectionModelException as e:
+            memento_data_cache[cache_key] = (None, e)
+
+    data, error = memento_data_cache[cache_key]
+
+    if error is not None:
+        raise error
 
     return data
 
@@ -102,31 +152,125 @@ def apply_measurement_error_msg_to_all_mementos(urit, memento_list,
 
     return measuremodel
 
-def compute_score_across_TimeMap(collectionmodel, measuremodel,
-    measurename, scoredistance_function=None, 
-    tokenize=True, stemming=True,
-    remove_boilerplate=True):
-    """Iterates through all TimeMaps stored in `collectionmodel`, discovering
-    all mementos within. Each memento is evaluated against the first memento
-    in each TimeMap using the `scoredistance_function`. The results are stored
-    in the `measuremodel` object and associated with the measure specified by
-    `measurename`. Tokenizing, stemming, and removing boilerplate can be 
-    controlled with the `tokenize`, `stemming`, and `remove_boilerplate`
-    arguments.
+class MeasureModelRecorder:
+    """Stands in for a MeasureModel in worker processes. The calls that
+    the scoring functions make to store scores and errors are kept as 
+    compact tuples in `records` so that they can be shipped back to the
+    parent process and replayed against the real MeasureModel with
+    `replay_measure_records`.
+    """
 
-    This function exists to avoid duplication in code, seeing as almost all
-    TimeMap measures easily fit into this pattern.
+    recorded_methods = [
+        "set_score", "set_tokenized", "set_stemmed", "set_removed_boilerplate",
+        "set_Memento_measurement_error", "set_Memento_access_error",
+        "set_off_topic_status_by_measure"
+    ]
+
+    def __init__(self):
+        self.records = []
+
+    def __getattr__(self, name):
+
+        if name not in self.recorded_methods:
+            raise AttributeError(name)
+
+        def record(*args):
+            self.records.append( (name,) + args )
+
+        return record
+
+def replay_measure_records(records, measuremodel):
+    """Applies the `records` produced by a `MeasureModelRecorder` to
+    `measuremodel`, in the order in which they were recorded.
     """
 
-    # TODO: raise an exception if the scoredistance_function is not set
+    for record in records:
+        getattr(measuremodel, record[0])(*record[1:])
 
-    logger.info("Computing {} score across TimeMap, "
-        "beginning TimeMap iteration...".format(measurename))
+    return measuremodel
+
+# each worker process opens its own copy of the collection model
+worker_collectionmodel = None
+
+def initialize_worker(collectionmodel_class, working_directory):
+    """Opens the collection model stored at `working_directory` for use by
+    the scoring functions run in this worker process.
+    """
+
+    global worker_collectionmodel
+
+    worker_collectionmodel = collectionmodel_class(working_directory)
+
+    # what the worker would store is stored by the parent process instead
+    worker_collectionmodel.deferWrites()
+
+def score_TimeMap_in_worker(task):
+    """Runs the `timemap_scorer` in `task` against a single TimeMap inside
+    a worker process, returning the records of the scores and errors it
+    produced, along with the writes to the collection model it deferred.
+    """
+
+    urit, timemap_scorer, scorer_arguments = task
+
+    recorder = MeasureModelRecorder()
+
+    timemap = worker_collectionmodel.getTimeMap(urit)
+
+    try:
+        timemap["mementos"]["list"]
+    except KeyError:
+        logger.exception("Malformed TimeMap or empty TimeMap at {} , skipping...".format(urit))
+        return recorder.records, worker_collectionmodel.takeDeferredWrites()
+
+    timemap_scorer(urit, timemap, worker_collectionmodel, recorder,
+        **scorer_arguments)
+
+    return recorder.records, worker_collectionmodel.takeDeferredWrites()
+
+def score_TimeMaps(collectionmodel, measuremodel, timemap_scorer,
+    workers=1, **scorer_arguments):
+    """Iterates through all TimeMaps stored in `collectionmodel`, calling 
+    `timemap_scorer` with each TimeMap and the given `scorer_arguments` so 
+    that the results are stored in `measuremodel`.
+
+    If `workers` is greater than 1, the TimeMaps are shared across a pool
+    of that many processes. Each worker opens its own copy of the 
+    collection model from its working directory and returns the scores
+    and errors it produced, which are then stored in `measuremodel` in
+    TimeMap order. Anything the workers would store in the collection
+    model, such as tokens, is returned with them and stored by this
+    process, if the collection model defers writes.
+    """
 
     urits = collectionmodel.getTimeMapURIList()
     urittotal = len(urits)
     uritcounter = 1
 
+    if workers > 1 and urittotal > 1:
+
+        logger.info("Distributing {} TimeMaps across {} worker processes".format(
+            urittotal, workers))
+
+        # the workers read the collection model from disk
+        collectionmodel.flush()
+
+        tasks = [ (urit, timemap_scorer, scorer_arguments) for urit in urits ]
+        chunksize = max(1, urittotal // (workers * 4))
+
+        with multiprocessing.Pool(workers, initializer=initialize_worker,
+            initargs=(type(collectionmodel), collectionmodel.working_directory)) as pool:
+
+            for records, writes in pool.imap(score_TimeMap_in_worker, tasks,
+                chunksize=chunksize):
+
+                logger.info("Processed TimeMap {} of {}".format(uritcounter, urittotal))
+
+                collectionmodel.applyWrites(writes)
+                measuremodel = replay_measure_records(records, measuremodel)
+                uritcounter += 1
+
+        return measuremodel
+
     for urit in urits:
 
         # provide the user with some kind of progress message
@@ -136,100 +280,205 @@ def compute_score_across_TimeMap(collectionmodel, measuremodel,
         timemap = collectionmodel.getTimeMap(urit)
 
         try:
-            memento_list = timemap["mementos"]["list"]
+            timemap["mementos"]["list"]
         except KeyError:
             logger.exception("Malformed TimeMap or empty TimeMap at {} , skipping...".format(urit))
             continue
 
-        # some TimeMaps have no mementos
-        # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
-        if len(memento_list) > 0:
+        measuremodel = timemap_scorer(urit, timemap, collectionmodel,
+            measuremodel, **scorer_arguments)
+
+        uritcounter += 1
+
+    return measuremodel
+
+def set_topic_status(measuremodel, urit, urim, measurename, score,
+    threshold, comparison):
+    """Stores the topic status of `urim`, belonging to a given `urit`, for
+    `measurename` in `measuremodel`, as `calculate_offtopic_by_measure`
+    would determine it from `score`, `threshold`, and `comparison`.
+    """
+
+    if compare_scores(score, threshold, comparison):
+        status = "off-topic"
+    else:
+        status = "on-topic"
+
+    measuremodel.set_off_topic_status_by_measure(urit, urim,
+        "timemap measures", measurename, status)
+
+def score_TimeMap(urit, timemap, collectionmodel, measuremodel,
+    measurename, scoredistance_function, tokenize=True, stemming=True,
+    remove_boilerplate=True, memento_data_cache=None,
+    threshold=None, comparison=None):
+    """Evaluates each memento in the TimeMap `timemap`, identified by `urit`,
+    against its first memento using the `scoredistance_function`, storing the
+    results in `measuremodel` under the measure specified by `measurename`.
+    Tokenizing, stemming, and removing boilerplate can be controlled with
+    the `tokenize`, `stemming`, and `remove_boilerplate` arguments.
+
+    If a `threshold` is given, the `scoredistance_function` is also given
+    the `threshold` and `comparison` so that it may stop as soon as the
+    topic status of a memento is decided, and that status is stored along
+    with the score.
+
+    Memento content is acquired via `get_memento_data_for_measure`, sharing
+    `memento_data_cache` with it if supplied.
+    """
+
+    if threshold is not None:
+        scoredistance_function = functools.partial(scoredistance_function,
+            threshold=threshold, comparison=comparison)
+
+    memento_list = timemap["mementos"]["list"]
 
-            first_urim = timemap["mementos"]["first"]["uri"]
+    # some TimeMaps have no mementos
+    # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
+    if len(memento_list) == 0:
+        return measuremodel
 
-            logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+    first_urim = timemap["mementos"]["first"]["uri"]
+
+    logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+
+    try:
+        first_data = get_memento_data_for_measure(
+            first_urim, collectionmodel, tokenize=tokenize, stemming=stemming, 
+            remove_boilerplate=remove_boilerplate,
+            memento_data_cache=memento_data_cache)
+
+    except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException) as e:
+        errormsg = "Boilerplate removal error with first memento in TimeMap, " \
+            "cannot effectively compare memento content"
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+        return measuremodel
+
+    if len(first_data) == 0:
+
+        errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
+        logger.warning(errormsg)
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+
+        return measuremodel
+
+    mementototal = len(memento_list)
+    logger.info("There are {} mementos in this TimeMap".format(mementototal))
+
+    mementocounter = 1
+
+    for memento in memento_list:
+
+        logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+
+        urim = memento["uri"]
+
+        logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+
+        try:
 
             try:
-                first_data = get_memento_data_for_measure(
-                    first_urim, collectionmodel, tokenize=tokenize, stemming=stemming, 
-                    remove_boilerplate=remove_boilerplate)
+                memento_data = get_memento_data_for_measure(
+                    urim, collectionmodel, tokenize=tokenize, 
+                    stemming=stemming, 
+                    remove_boilerplate=remove_boilerplate,
+                    memento_data_cache=memento_data_cache)
+
+                score = scoredistance_function(first_data, memento_data)
+                measuremodel.set_score(urit, urim, "timemap measures", measurename, score)
+                measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
+                measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
+                measuremodel.set_removed_boilerplate(
+                    urit, urim, "timemap measures", measurename, remove_boilerplate
+                )
+
+                if threshold is not None:
+                    set_topic_status(measuremodel, urit, urim, measurename,
+                        score, threshold, comparison)
 
             except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException) as e:
-                errormsg = "Boilerplate removal error with first memento in TimeMap, " \
-                    "cannot effectively compare memento content"
+                errormsg = "Boilerplate could not be removed from " \
+                    "memento at URI-M {}; details: {}".format(urim, repr(e))
+                logger.warning(errormsg)
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
-                continue
-            
+                measuremodel.set_Memento_measurement_error(
+                    urit, urim, "timemap measures", measurename, repr(e)
+                )
 
-            if len(first_data) == 0:
+        except CollectionModelMementoErrorException:
+            errormsg = "Errors were recorded while attempting to " \
+                "access URI-M {}, skipping {} calcualtions for this " \
+                "URI-M".format(urim, measurename)
+            logger.warning(errormsg)
 
-                errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
-                logger.warning(errormsg)
+            errorinfo = collectionmodel.getMementoErrorInformation(urim)
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+            measuremodel.set_Memento_access_error(
+                urit, urim, errorinfo
+            )
+        
+        mementocounter += 1
 
-                # move on to the next URI-T
-                uritcounter += 1
-                continue
+    return measuremodel
+
+def compute_score_across_TimeMap(collectionmodel, measuremodel,
+    measurename, scoredistance_function=None, 
+    tokenize=True, stemming=True,
+    remove_boilerplate=True, workers=1, threshold=None, comparison=None):
+    """Iterates through all TimeMaps stored in `collectionmodel`, discovering
+    all mementos within. Each memento is evaluated against the first memento
+    in each TimeMap using the `scoredistance_function`. The results are stored
+    in the `measuremodel` object and associated with the measure specified by
+    `measurename`. Tokenizing, stemming, and removing boilerplate can be 
+    controlled with the `tokenize`, `stemming`, and `remove_boilerplate`
+    arguments. TimeMaps are processed by `workers` processes.
 
-            mementototal = len(memento_list)
-            logger.info("There are {} mementos in this TimeMap".format(mementototal))
+    Giving a `threshold` turns on decision mode, in which only the topic
+    status of each memento must be exact. The `scoredistance_function` must
+    then accept `threshold` and `comparison` keyword arguments, and may
+    return a bounded score that lies on the same side of `threshold` as the
+    exact one. The topic status is stored with each score. If `comparison`
+    is None, that of `measurename` in `supported_timemap_measures` is used.
 
-            mementocounter = 1
+    This function exists to avoid duplication in code, seeing as almost all
+    TimeMap measures easily fit into this pattern.
+    """
 
-            for memento in memento_list:
+    # TODO: raise an exception if the scoredistance_function is not set
 
-                logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+    if threshold is not None and comparison is None:
+        comparison = supported_timemap_measures[measurename]["comparison direction"]
 
-                urim = memento["uri"]
+    logger.info("Computing {} score across TimeMap, "
+        "beginning TimeMap iteration...".format(measurename))
 
-                logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+    measuremodel = score_TimeMaps(collectionmodel, measuremodel,
+        score_TimeMap, workers=workers, measurename=measurename,
+        scoredistance_function=scoredistance_function,
+        tokenize=tokenize, stemming=stemming,
+        remove_boilerplate=remove_boilerplate,
+        threshold=threshold, comparison=comparison)
 
-                try:
+    return measuremodel
 
-                    try:
-                        memento_data = get_memento_data_for_measure(
-                            urim, collectionmodel, tokenize=tokenize, 
-                            stemming=stemming, 
-                            remove_boilerplate=remove_boilerplate)
-
-                        score = scoredistance_function(first_data, memento_data)
-                        measuremodel.set_score(urit, urim, "timemap measures", measurename, score)
-                        measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
-                        measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
-                        measuremodel.set_removed_boilerplate(
-                            urit, urim, "timemap measures", measurename, remove_boilerplate
-                        )
-
-                    except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException) as e:
-                        errormsg = "Boilerplate could not be removed from " \
-                            "memento at URI-M {}; details: {}".format(urim, repr(e))
-                        logger.warning(errormsg)
-
-                        measuremodel.set_Memento_measurement_error(
-                            urit, urim, "timemap measures", measurename, repr(e)
-                        )
-
-                except CollectionModelMementoErrorException:
-                    errormsg = "Errors were recorded while attempting to " \
-                        "access URI-M {}, skipping {} calcualtions for this " \
-                        "URI-M".format(urim, measurename)
-                    logger.warning(errormsg)
+def is_decided_by_bound(bound, is_lower_bound, threshold, comparison):
+    """Returns True if a score of `bound`, a lower bound on the exact score
+    if `is_lower_bound` is True and an upper bound otherwise, has the same
+    topic status for `threshold` and `comparison` as the exact score.
+    """
 
-                    errorinfo = collectionmodel.getMementoErrorInformation(urim)
+    offtopic = bool(compare_scores(bound, threshold, comparison))
 
-                    measuremodel.set_Memento_access_error(
-                        urit, urim, errorinfo
-                    )
-                
-                mementocounter += 1
+    if comparison == ">":
+        return offtopic == is_lower_bound
 
-            uritcounter += 1
+    if comparison == "<":
+        return offtopic != is_lower_bound
 
-    return measuremodel
+    return False
 
 
 def simhash_scoredistance(first_data, memento_data):
@@ -247,26 +496,30 @@ def simhash_scoredistance(first_data, memento_data):
     return score
 
 def compute_rawsimhash_across_TimeMap(collectionmodel, measuremodel, 
-    tokenize=False, stemming=False):
+    tokenize=False, stemming=False,
+    workers=1):
     """Contains the appropriate arguments to run the Simhash algorithm against
     the raw memento text content of all mementos in a TimeMap.
     """
 
     measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "raw_simhash", 
         simhash_scoredistance, tokenize=False, stemming=False,
-        remove_boilerplate=False
+        remove_boilerplate=False,
+        workers=workers
     )
 
     return measuremodel
 
-def compute_tfsimhash_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
+def compute_tfsimhash_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True,
+    workers=1):
     """Contains the appropriate arguments to run the Simhash algorithm against
     the term frequencies of the tokenized content of all mementos in a TimeMap.
     """
 
     measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "tf_simhash", 
         simhash_scoredistance, tokenize=True, stemming=True,
-        remove_boilerplate=True
+        remove_boilerplate=True,
+        workers=workers
     )
 
     return measuremodel
@@ -301,7 +554,8 @@ def bytecount_scoredistance(first_data, memento_data):
     
     return score
 
-def compute_bytecount_across_TimeMap(collectionmodel, measuremodel, tokenize=False, stemming=False):
+def compute_bytecount_across_TimeMap(collectionmodel, measuremodel, tokenize=False, stemming=False,
+    workers=1):
     """Contains the appropriate arguments to run the Byte Count algorithm against
     the raw memento text content of all mementos in a TimeMap.
     
@@ -312,7 +566,8 @@ def compute_bytecount_across_TimeMap(collectionmodel, measuremodel, tokenize=Fal
 
     measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "bytecount", 
         bytecount_scoredistance, tokenize=False, stemming=False,
-        remove_boilerplate=False
+        remove_boilerplate=False,
+        workers=workers
     )
 
     return measuremodel
@@ -340,7 +595,8 @@ def wordcount_scoredistance(first_data, memento_data):
 
     return score
 
-def compute_wordcount_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
+def compute_wordcount_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True,
+    workers=1):
     """Contains the appropriate arguments to run the Word Count algorithm against
     the raw memento text content of all mementos in a TimeMap.
 
@@ -351,7 +607,8 @@ def compute_wordcount_across_TimeMap(collectionmodel, measuremodel, tokenize=Tru
 
     measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "wordcount", 
         wordcount_scoredistance, tokenize=True, stemming=stemming,
-        remove_boilerplate=True
+        remove_boilerplate=True,
+        workers=workers
     )
 
     return measuremodel
@@ -387,16 +644,33 @@ def jaccard_scoredistance(first_data, memento_data):
 
     return score
 
-def compute_jaccard_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
+def jaccard_setdistances(intersections, first_size, sizes):
+    """Calculates the Jaccard Distance of each memento from the first
+    memento given the numpy arrays of the number of distinct tokens they
+    share with it in `intersections` and of their number of distinct tokens
+    in `sizes`, along with the number of distinct tokens of the first
+    memento in `first_size`.
+
+    The arithmetic is that of `distance.jaccard`, so the scores are the
+    same as those of `jaccard_scoredistance`.
+    """
+
+    return 1 - intersections / (first_size + sizes - intersections)
+
+def compute_jaccard_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True,
+    workers=1):
     """Contains the appropriate arguments to run the Jaccard Distance 
     algorithm against the raw memento text content of all mementos in a 
     TimeMap.
     """
 
-    scores = compute_score_across_TimeMap(collectionmodel, measuremodel, "jaccard", 
-        jaccard_scoredistance, tokenize=tokenize, stemming=stemming,
-        remove_boilerplate=True
-    )
+    logger.info("Computing jaccard score across TimeMap, "
+        "beginning TimeMap iteration...")
+
+    scores = score_TimeMaps(collectionmodel, measuremodel,
+        score_TimeMap_by_set_distance, workers=workers,
+        measurename="jaccard", setdistance_function=jaccard_setdistances,
+        tokenize=tokenize, stemming=stemming, remove_boilerplate=True)
 
     return scores
 
@@ -412,61 +686,278 @@ def sorensen_scoredistance(first_data, memento_data):
 
     return scoredata
 
-def compute_sorensen_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
+def sorensen_setdistances(intersections, first_size, sizes):
+    """Calculates the Sørensen-Dice Distance of each memento from the first
+    memento given the numpy arrays of the number of distinct tokens they
+    share with it in `intersections` and of their number of distinct tokens
+    in `sizes`, along with the number of distinct tokens of the first
+    memento in `first_size`.
+
+    The arithmetic is that of `distance.sorensen`, so the scores are the
+    same as those of `sorensen_scoredistance`.
+    """
+
+    return 1 - (2 * intersections / (first_size + sizes))
+
+def compute_sorensen_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True,
+    workers=1):
     """Contains the appropriate arguments to run the Sørensen-Dice Distance
     algorithm against the raw memento text content of all mementos in a 
     TimeMap.
     """
 
-    scores = compute_score_across_TimeMap(collectionmodel, measuremodel, "sorensen", 
-        sorensen_scoredistance, tokenize=tokenize, stemming=stemming,
-        remove_boilerplate=True
-    )
+    logger.info("Computing sorensen score across TimeMap, "
+        "beginning TimeMap iteration...")
+
+    scores = score_TimeMaps(collectionmodel, measuremodel,
+        score_TimeMap_by_set_distance, workers=workers,
+        measurename="sorensen", setdistance_function=sorensen_setdistances,
+        tokenize=tokenize, stemming=stemming, remove_boilerplate=True)
 
     return scores
 
-def levenshtein_scoredistance(first_data, memento_data):
+def build_document_term_matrix(documents):
+    """Builds a binary sparse matrix with a row for each of the `documents`,
+    each a sequence of hashable tokens, and a column for each distinct
+    token among them. An entry is 1 if the document contains that token.
+    """
+
+    vocabulary = {}
+    indices = []
+    indptr = [ 0 ]
+
+    for document in documents:
+
+        tokens = set(document)
+
+        # new tokens are numbered in the order they are first seen
+        vocabulary.update(zip(tokens.difference(vocabulary),
+            itertools.count(len(vocabulary))))
+
+        indices.extend(map(vocabulary.__getitem__, tokens))
+        indptr.append(len(indices))
+
+    return scipy.sparse.csr_matrix(
+        (numpy.ones(len(indices), dtype=numpy.int64), indices, indptr),
+        shape=(len(documents), len(vocabulary)))
+
+def score_TimeMap_by_set_distance(urit, timemap, collectionmodel, measuremodel,
+    measurename, setdistance_function, tokenize=True, stemming=True,
+    remove_boilerplate=True, memento_data_cache=None):
+    """Scores each memento in the TimeMap `timemap`, identified by `urit`,
+    against its first memento using the `setdistance_function`, such as
+    `jaccard_setdistances`, storing the results in `measuremodel` under the
+    measure specified by `measurename`. Tokenizing, stemming, and removing
+    boilerplate can be controlled with the `tokenize`, `stemming`, and
+    `remove_boilerplate` arguments.
+
+    Rather than comparing the sets of tokens of each pair of mementos, the
+    mementos of the TimeMap become the rows of one binary document-term
+    matrix, and the number of distinct tokens each shares with the first
+    memento is the product of that matrix with the first memento's row.
+
+    Memento content is acquired via `get_memento_data_for_measure`, sharing
+    `memento_data_cache` with it if supplied.
+    """
+
+    memento_list = timemap["mementos"]["list"]
+
+    # some TimeMaps have no mementos
+    # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
+    if len(memento_list) == 0:
+        return measuremodel
+
+    first_urim = timemap["mementos"]["first"]["uri"]
+
+    logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+
+    try:
+        first_data = get_memento_data_for_measure(
+            first_urim, collectionmodel, tokenize=tokenize, stemming=stemming,
+            remove_boilerplate=remove_boilerplate,
+            memento_data_cache=memento_data_cache)
+
+    except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException) as e:
+        errormsg = "Boilerplate removal error with first memento in TimeMap, " \
+            "cannot effectively compare memento content"
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+        return measuremodel
+
+    if len(first_data) == 0:
+
+        errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
+        logger.warning(errormsg)
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+
+        return measuremodel
+
+    mementototal = len(memento_list)
+    logger.info("There are {} mementos in this TimeMap".format(mementototal))
+
+    # the first row of the matrix is the first memento
+    documents = [ first_data ]
+    rows = []
+
+    for memento in memento_list:
+
+        urim = memento["uri"]
+
+        logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+
+        try:
+            memento_data = get_memento_data_for_measure(
+                urim, collectionmodel, tokenize=tokenize,
+                stemming=stemming,
+                remove_boilerplate=remove_boilerplate,
+                memento_data_cache=memento_data_cache)
+
+            rows.append( (urim, len(documents), None) )
+            documents.append(memento_data)
+
+        except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException) as e:
+            errormsg = "Boilerplate could not be removed from " \
+                "memento at URI-M {}; details: {}".format(urim, repr(e))
+            logger.warning(errormsg)
+
+            rows.append( (urim, None, e) )
+
+    document_term_matrix = build_document_term_matrix(documents)
+
+    sizes = numpy.diff(document_term_matrix.indptr)
+    intersections = document_term_matrix.dot(
+        document_term_matrix.getrow(0).toarray().ravel())
+
+    scores = setdistance_function(intersections, sizes[0], sizes)
+
+    # stored in TimeMap order, as each memento would be scored on its own
+    for urim, row, error in rows:
+
+        if error is not None:
+            measuremodel.set_Memento_measurement_error(
+                urit, urim, "timemap measures", measurename, repr(error)
+            )
+            continue
+
+        measuremodel.set_score(urit, urim, "timemap measures", measurename, float(scores[row]))
+        measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
+        measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
+        measuremodel.set_removed_boilerplate(
+            urit, urim, "timemap measures", measurename, remove_boilerplate
+        )
+
+    return measuremodel
+
+def bounded_levenshtein_scoredistance(first_data, memento_data, measurename,
+    engine, threshold, comparison):
+    """Calculates the distance named by `measurename`, levenshtein or
+    nlevenshtein, given the content in `first_data` and `memento_data`
+    with the implementation named by `engine` in `levenshtein_engines`.
+
+    The computation stops as soon as the topic status for `threshold` and
+    `comparison` is decided, returning the bound on the distance known at
+    that point. The exact distance is computed if the bound does not
+    decide the topic status, such as for comparisons other than < and >.
+    """
+
+    if comparison in [ ">", "<" ] and first_data != memento_data and \
+        min(len(first_data), len(memento_data)) > 0:
+
+        # nlevenshtein divides by the length of the longer sequence
+        if measurename == "nlevenshtein":
+            scale = float(max(len(first_data), len(memento_data)))
+        else:
+            scale = 1
+
+        # the largest distance on the lower side of the threshold
+        if comparison == ">":
+            max_dist = math.floor(threshold * scale)
+        else:
+            max_dist = math.ceil(threshold * scale) - 1
+
+        bound = levenshtein_engines[engine]["bounded levenshtein"](
+            first_data, memento_data, max_dist)
+
+        if measurename == "nlevenshtein":
+            score = bound / scale
+        else:
+            score = bound
+
+        if is_decided_by_bound(score, bound > max_dist, threshold, comparison):
+            return score
+
+    return compute_scores_on_distance_measure(
+        first_data, memento_data, levenshtein_engines[engine][measurename])
+
+def levenshtein_scoredistance(first_data, memento_data,
+    engine=default_levenshtein_engine, threshold=None, comparison=None):
     """Calculates the Levenshtein Distance given the content in
-    `first_data` and `memento_data`.
+    `first_data` and `memento_data` with the implementation named by
+    `engine` in `levenshtein_engines`.
+
+    If a `threshold` is given, the computation may stop once the topic
+    status for `threshold` and `comparison` is decided, returning a bound.
     """
 
+    if threshold is not None:
+        return bounded_levenshtein_scoredistance(first_data, memento_data,
+            "levenshtein", engine, threshold, comparison)
+
     score = compute_scores_on_distance_measure(
-        first_data, memento_data, distance.levenshtein)
+        first_data, memento_data, levenshtein_engines[engine]["levenshtein"])
 
     return score
 
-def compute_levenshtein_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
+def compute_levenshtein_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True,
+    workers=1, levenshtein_engine=default_levenshtein_engine, threshold=None):
     """Contains the appropriate arguments to run the Levenshtein Distance
     algorithm against the raw memento text content of all mementos in a 
-    TimeMap.
+    TimeMap, using the implementation named by `levenshtein_engine`.
     """
 
     scores = compute_score_across_TimeMap(collectionmodel, measuremodel, "levenshtein", 
-        levenshtein_scoredistance, tokenize=tokenize, stemming=stemming,
-        remove_boilerplate=True
+        functools.partial(levenshtein_scoredistance, engine=levenshtein_engine),
+        tokenize=tokenize, stemming=stemming,
+        remove_boilerplate=True,
+        workers=workers, threshold=threshold
     )
 
     return scores
 
-def nlevenshtein_scoredistance(first_data, memento_data):
+def nlevenshtein_scoredistance(first_data, memento_data,
+    engine=default_levenshtein_engine, threshold=None, comparison=None):
     """Calculates the Normalized Levenshtein Distance given the content in
-    `first_data` and `memento_data`.
+    `first_data` and `memento_data` with the implementation named by
+    `engine` in `levenshtein_engines`.
+
+    If a `threshold` is given, the computation may stop once the topic
+    status for `threshold` and `comparison` is decided, returning a bound.
     """
 
+    if threshold is not None:
+        return bounded_levenshtein_scoredistance(first_data, memento_data,
+            "nlevenshtein", engine, threshold, comparison)
+
     score = compute_scores_on_distance_measure(
-        first_data, memento_data, distance.nlevenshtein)
+        first_data, memento_data, levenshtein_engines[engine]["nlevenshtein"])
 
     return score
 
-def compute_nlevenshtein_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
+def compute_nlevenshtein_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True,
+    workers=1, levenshtein_engine=default_levenshtein_engine, threshold=None):
     """Contains the appropriate arguments to run the Normalized Levenshtein 
     Distance algorithm against the raw memento text content of all mementos 
-    in a TimeMap.
+    in a TimeMap, using the implementation named by `levenshtein_engine`.
     """
 
     scores = compute_score_across_TimeMap(collectionmodel, measuremodel, "nlevenshtein", 
-        nlevenshtein_scoredistance, tokenize=tokenize, stemming=stemming,
-        remove_boilerplate=True
+        functools.partial(nlevenshtein_scoredistance, engine=levenshtein_engine),
+        tokenize=tokenize, stemming=stemming,
+        remove_boilerplate=True,
+        workers=workers, threshold=threshold
     )
 
     return scores
@@ -531,7 +1022,8 @@ def tfintersection_scoredistance(first_data, memento_data):
 
     return number_of_intersecting_terms
 
-def compute_tfintersection_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=True):
+def compute_tfintersection_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=True,
+    workers=1):
     """Contains the appropriate arguments to run the TF-Intersection 
     algorithm against the raw memento text content of all mementos 
     in a TimeMap.
@@ -539,22 +1031,20 @@ def compute_tfintersection_across_TimeMap(collectionmodel, measuremodel, tokeniz
 
     scores = compute_score_across_TimeMap(collectionmodel, measuremodel, "tfintersection",
         tfintersection_scoredistance, tokenize=True, stemming=stemming,
-        remove_boilerplate=True
+        remove_boilerplate=True,
+        workers=workers
     )
 
     return scores
 
-def compute_cosine_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None):
-    """Contains the appropriate arguments to run the cosine similarity 
-    algorithm against the raw memento text content of all mementos 
-    in a TimeMap.
+def score_TimeMap_by_cosine(urit, timemap, collectionmodel, measuremodel,
+    memento_data_cache=None):
+    """Scores each memento in the TimeMap `timemap`, identified by `urit`,
+    by the cosine similarity of its TF-IDF vector to that of the first
+    memento, storing the results in `measuremodel`.
 
-    Note: The `tokenize` and `stemming` arguments have no affect and are purely
-    included to support the same signature as the other "compute_" functions
-    so that a factory pattern can be used.
-
-    Note: This function is very close to compute_score_across_TimeMap and that
-    function may be altered to support this measure in the future.
+    Memento content is acquired via `get_memento_data_for_measure`, sharing
+    `memento_data_cache` with it if supplied.
     """
 
     measurename = "cosine"
@@ -563,155 +1053,306 @@ def compute_cosine_across_TimeMap(collectionmodel, measuremodel, tokenize=None,
     remove_boilerplate = True
     stemming = True
 
-    logger.info("Computing cosine score across TimeMap, beginning TimeMap iteration...")
+    memento_list = timemap["mementos"]["list"]
 
-    urits = collectionmodel.getTimeMapURIList()
-    urittotal = len(urits)
-    uritcounter = 1
+    # some TimeMaps have no mementos
+    # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
+    if len(memento_list) == 0:
+        return measuremodel
 
-    for urit in urits:
+    first_urim = timemap["mementos"]["first"]["uri"]
 
-        logger.info("Processing TimeMap {} of {}".format(uritcounter, urittotal))
-        logger.debug("Processing mementos from TimeMap at {}".format(urit))
+    logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
 
-        timemap = collectionmodel.getTimeMap(urit)
+    try:
+        first_data = get_memento_data_for_measure(first_urim, collectionmodel,
+            tokenize=False, remove_boilerplate=True,
+            memento_data_cache=memento_data_cache)
+
+    except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException, CollectionModelNoSuchMementoException) as e:
+        errormsg = "Boilerplate removal error with first memento in TimeMap, " \
+            "cannot effectively compare memento content"
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+        return measuremodel
+
+    if len(first_data) == 0:
+
+        errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
+        logger.warning(errormsg)
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+
+        return measuremodel
+
+    mementototal = len(memento_list)
+    logger.info("There are {} mementos in this TimeMap".format(mementototal))
+
+    mementocounter = 1
+
+    processed_urims = []
+    error_urims = []
+    documents = []
+
+    # in case the mementos are not sorted in order of memento datetime
+    # we save the first one for comparison
+    processed_urims.append(first_urim)
+    documents.append(first_data)
+
+    for memento in memento_list:
+
+        logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+
+        urim = memento["uri"]
+
+        logger.debug("Accessing content of URI-M {} for calculations".format(urim))
 
         try:
-            memento_list = timemap["mementos"]["list"]
-        except KeyError as e:
-            logger.exception("Failed to process TimeMap at {}".format(urit))
-            continue
 
-        # some TimeMaps have no mementos
-        # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
-        if len(memento_list) > 0:
+            # in case the mementos are not sorted in order of memento datetime
+            # we ignore the first one for comparison because we already saved it
+            if urim != first_urim:
+                try:
+                    memento_data = get_memento_data_for_measure(urim,
+                        collectionmodel, tokenize=False,
+                        remove_boilerplate=True,
+                        memento_data_cache=memento_data_cache)
+                        
+                    processed_urims.append(urim)
+                    documents.append(memento_data)
+
+                except (CollectionModelBoilerPlateRemovalFailureException, 
+                    CollectionModelMementoErrorException, UnicodeDecodeError) as e:
+                    errormsg = "Boilerplate could not be removed from " \
+                        "memento at URI-M {}; details: {}".format(urim, repr(e))
+                    logger.warning(errormsg)
 
-            first_urim = timemap["mementos"]["first"]["uri"]
+                    measuremodel.set_Memento_measurement_error(
+                        urit, urim, "timemap measures", measurename, repr(e)
+                    )
 
-            logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+        except (CollectionModelMementoErrorException,  CollectionModelNoSuchMementoException):
+            errormsg = "Errors were recorded while attempting to " \
+                "access URI-M {}, skipping {} calcualtions for this " \
+                "URI-M".format(urim, measurename)
+            logger.warning(errormsg)
 
             try:
-                first_data = collectionmodel.getMementoContentWithoutBoilerplate(first_urim)
+                errorinfo = collectionmodel.getMementoErrorInformation(urim)
 
-            except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException, CollectionModelNoSuchMementoException) as e:
-                errormsg = "Boilerplate removal error with first memento in TimeMap, " \
-                    "cannot effectively compare memento content"
+            except CollectionModelNoSuchMementoException as e:
+                errorinfo = str(e)
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
-                continue
+            measuremodel.set_Memento_access_error(
+                urit, urim, errorinfo
+            )
+            error_urims.append(urim)
+        
+        mementocounter += 1
 
-            if len(first_data) == 0:
+    try:
+        # our full_tokenize function handles stop words
+        tfidf_vectorizer = TfidfVectorizer(tokenizer=full_tokenize, stop_words=None)
+        tfidf_matrix = tfidf_vectorizer.fit_transform(documents)
+    except ValueError as e:
+        errormsg = "Errors were recorded while attempting to generate " \
+            "TF-IDF information for the TimeMap {}".format(urit)
+        logger.exception(errormsg)
 
-                errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
-                logger.warning(errormsg)
+        for memento in memento_list:
+            urim = memento["uri"]
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+            measuremodel.set_Memento_measurement_error(
+                urit, urim, "timemap measures", measurename, repr(e)
+            )
 
-                # move on to the next URI-T
-                uritcounter += 1
-                continue
+    else:
 
-            mementototal = len(memento_list)
-            logger.info("There are {} mementos in this TimeMap".format(mementototal))
+        cscores = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix)
 
-            mementocounter = 1
+        for i in range(0, len(cscores[0])):
+            urim = processed_urims[i]
+            logger.debug("saving cosine scores for URI-M {}".format(urim))
 
-            processed_urims = []
-            error_urims = []
-            documents = []
+            measuremodel.set_score(urit, urim, "timemap measures", measurename, cscores[0][i])
+            measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
+            measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
+            measuremodel.set_removed_boilerplate(
+                urit, urim, "timemap measures", measurename, remove_boilerplate
+            )
 
-            # in case the mementos are not sorted in order of memento datetime
-            # we save the first one for comparison
-            processed_urims.append(first_urim)
-            documents.append(first_data)
+    return measuremodel
 
-            for memento in memento_list:
+def compute_cosine_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
+    workers=1):
+    """Contains the appropriate arguments to run the cosine similarity 
+    algorithm against the raw memento text content of all mementos 
+    in a TimeMap.
 
-                logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+    Note: The `tokenize` and `stemming` arguments have no affect and are purely
+    included to support the same signature as the other "compute_" functions
+    so that a factory pattern can be used.
+    """
 
-                urim = memento["uri"]
+    logger.info("Computing cosine score across TimeMap, beginning TimeMap iteration...")
 
-                logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+    measuremodel = score_TimeMaps(collectionmodel, measuremodel,
+        score_TimeMap_by_cosine, workers=workers)
 
-                try:
+    return measuremodel
 
-                    # in case the mementos are not sorted in order of memento datetime
-                    # we ignore the first one for comparison because we already saved it
-                    if urim != first_urim:
-                        try:
-                            memento_data = collectionmodel.getMementoContentWithoutBoilerplate(urim)
-                                
-                            processed_urims.append(urim)
-                            documents.append(memento_data)
-
-                        except (CollectionModelBoilerPlateRemovalFailureException, 
-                            CollectionModelMementoErrorException, UnicodeDecodeError) as e:
-                            errormsg = "Boilerplate could not be removed from " \
-                                "memento at URI-M {}; details: {}".format(urim, repr(e))
-                            logger.warning(errormsg)
-
-                            measuremodel.set_Memento_measurement_error(
-                                urit, urim, "timemap measures", measurename, repr(e)
-                            )
-
-                except (CollectionModelMementoErrorException,  CollectionModelNoSuchMementoException):
-                    errormsg = "Errors were recorded while attempting to " \
-                        "access URI-M {}, skipping {} calcualtions for this " \
-                        "URI-M".format(urim, measurename)
-                    logger.warning(errormsg)
+def score_TimeMap_by_gensim(urit, timemap, collectionmodel, measuremodel,
+    measurename, gensim_model, num_topics=2, memento_data_cache=None):
+    """Scores each memento in the TimeMap `timemap`, identified by `urit`,
+    by its similarity to the first memento in the topic space produced by
+    `gensim_model` with `num_topics` topics, storing the results in
+    `measuremodel` under the measure specified by `measurename`.
 
-                    try:
-                        errorinfo = collectionmodel.getMementoErrorInformation(urim)
+    Memento content is acquired via `get_memento_data_for_measure`, sharing
+    `memento_data_cache` with it if supplied.
+    """
 
-                    except CollectionModelNoSuchMementoException as e:
-                        errorinfo = str(e)
+    tokenize = True
+    remove_boilerplate = True
+    stemming = True
 
-                    measuremodel.set_Memento_access_error(
-                        urit, urim, errorinfo
-                    )
-                    error_urims.append(urim)
-                
-                mementocounter += 1
+    memento_list = timemap["mementos"]["list"]
 
-            try:
-                # our full_tokenize function handles stop words
-                tfidf_vectorizer = TfidfVectorizer(tokenizer=full_tokenize, stop_words=None)
-                tfidf_matrix = tfidf_vectorizer.fit_transform(documents)
-            except ValueError as e:
-                errormsg = "Errors were recorded while attempting to generate " \
-                    "TF-IDF information for the TimeMap {}".format(urit)
-                logger.exception(errormsg)
+    # some TimeMaps have no mementos
+    # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
+    if len(memento_list) == 0:
+        return measuremodel
+
+    first_urim = timemap["mementos"]["first"]["uri"]
+
+    logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+
+    try:
+        first_data = get_memento_data_for_measure(
+            first_urim, collectionmodel, tokenize=tokenize, stemming=stemming, 
+            remove_boilerplate=remove_boilerplate,
+            memento_data_cache=memento_data_cache)
+
+    except CollectionModelBoilerPlateRemovalFailureException as e:
+        errormsg = "Boilerplate removal error with first memento in TimeMap, " \
+            "cannot effectively compare memento content"
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+        return measuremodel
+
+    if len(first_data) == 0:
+
+        errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
+        logger.warning(errormsg)
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
+
+        return measuremodel
+
+    mementototal = len(memento_list)
+    logger.info("There are {} mementos in this TimeMap".format(mementototal))
+
+    mementocounter = 1
+
+    processed_urims = []
+    error_urims = []
+    documents = []
+
+    # in case the mementos are not sorted in order of memento datetime
+    # we save the first one for comparison
+    processed_urims.append(first_urim)
+    documents.append(first_data)
+
+    for memento in memento_list:
+
+        logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+
+        urim = memento["uri"]
+
+        logger.debug("Accessing content of URI-M {} for calculations".format(urim))
 
-                for memento in memento_list:
-                    urim = memento["uri"]
+        try:
+
+            # in case the mementos are not sorted in order of memento datetime
+            # we ignore the first one for comparison because we already saved it
+            if urim != first_urim:
+                try:
+                    memento_data = get_memento_data_for_measure(
+                        urim, collectionmodel, tokenize=tokenize, 
+                        stemming=stemming, 
+                        remove_boilerplate=remove_boilerplate,
+                        memento_data_cache=memento_data_cache)
+                        
+                    processed_urims.append(urim)
+                    documents.append(memento_data)
+
+                except CollectionModelBoilerPlateRemovalFailureException as e:
+                    errormsg = "Boilerplate could not be removed from " \
+                        "memento at URI-M {}; details: {}".format(urim, repr(e))
+                    logger.warning(errormsg)
 
                     measuremodel.set_Memento_measurement_error(
                         urit, urim, "timemap measures", measurename, repr(e)
                     )
 
-            else:
+        except CollectionModelMementoErrorException:
+            errormsg = "Errors were recorded while attempting to " \
+                "access URI-M {}, skipping {} calcualtions for this " \
+                "URI-M".format(urim, measurename)
+            logger.warning(errormsg)
 
-                cscores = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix)
+            errorinfo = collectionmodel.getMementoErrorInformation(urim)
 
-                for i in range(0, len(cscores[0])):
-                    urim = processed_urims[i]
-                    logger.debug("saving cosine scores for URI-M {}".format(urim))
+            measuremodel.set_Memento_access_error(
+                urit, urim, errorinfo
+            )
+            error_urims.append(urim)
+        
+        mementocounter += 1
 
-                    measuremodel.set_score(urit, urim, "timemap measures", measurename, cscores[0][i])
-                    measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
-                    measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
-                    measuremodel.set_removed_boilerplate(
-                        urit, urim, "timemap measures", measurename, remove_boilerplate
-                    )
-            finally:                        
-                uritcounter += 1
+    logger.info("There are {} mementos under consideration in this TimeMap".format(len(documents)))
+
+    dictionary = corpora.Dictionary(documents)
+    corpus = [ dictionary.doc2bow(text) for text in documents]
+    mod = gensim_model(corpus, id2word=dictionary, num_topics=num_topics)
+
+    try:
+        index = similarities.MatrixSimilarity(mod[corpus])
+
+        for i in range(0, len(documents)):
+            
+            urim = processed_urims[i]
+            doc = documents[i]
+            vec_bow = dictionary.doc2bow(doc)
+            vec_lsi = mod[vec_bow]
+
+            sims = index[vec_lsi]
+            
+            # gensim outputs to float32, which is not serializable with 
+            # the Python json library
+            measuremodel.set_score(urit, urim, "timemap measures", measurename, 
+                float(sims[0]) )
+            measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
+            measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
+            measuremodel.set_removed_boilerplate(
+                urit, urim, "timemap measures", measurename, remove_boilerplate
+            )
+
+    except IndexError as e:
+        errormsg = "Gensim Error: {}".format(repr(e))
+        logger.warning(errormsg)
+
+        apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+            measuremodel, measurename, errormsg)
 
     return measuremodel
 
 def compute_gensim_across_TimeMap(collectionmodel, measuremodel, measurename, 
-    gensim_model, num_topics=2):
+    gensim_model, num_topics=2, workers=1):
     """Contains the appropriate arguments to score mementos using latent
     semantic indexing (LSI) via gensim against the raw memento text content 
     of all mementos in a TimeMap.
@@ -719,178 +1360,179 @@ def compute_gensim_across_TimeMap(collectionmodel, measuremodel, measurename,
     Note: The `tokenize` and `stemming` arguments have no affect and are purely
     included to support the same signature as the other "compute_" functions
     so that a factory pattern can be used.
-
-    Note: This function is very close to compute_score_across_TimeMap and that
-    function may be altered to support this measure in the future.
     """
 
-    tokenize = True
-    remove_boilerplate = True
-    stemming = True
-
     logger.info("Computing gensim {} with {} topics score across TimeMap, "
         "beginning TimeMap iteration...".format(measurename, num_topics))
 
-    urits = collectionmodel.getTimeMapURIList()
-    urittotal = len(urits)
-    uritcounter = 1
-
-    for urit in urits:
-
-        logger.info("Processing TimeMap {} of {}".format(uritcounter, urittotal))
-        logger.debug("Processing mementos from TimeMap at {}".format(urit))
+    measuremodel = score_TimeMaps(collectionmodel, measuremodel,
+        score_TimeMap_by_gensim, workers=workers, measurename=measurename,
+        gensim_model=gensim_model, num_topics=num_topics)
 
-        timemap = collectionmodel.getTimeMap(urit)
+    return measuremodel
 
-        memento_list = timemap["mementos"]["list"]
+def compute_gensim_lsi_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
+    num_topics=10, workers=1):
 
-        # some TimeMaps have no mementos
-        # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
-        if len(memento_list) > 0:
+    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
+        "gensim_lsi", gensim_model=models.LsiModel, num_topics=num_topics,
+        workers=workers)
 
-            first_urim = timemap["mementos"]["first"]["uri"]
+    return measuremodel
 
-            logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+def compute_gensim_lda_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
+    num_topics=2, workers=1):
 
-            try:
-                first_data = get_memento_data_for_measure(
-                    first_urim, collectionmodel, tokenize=tokenize, stemming=stemming, 
-                    remove_boilerplate=remove_boilerplate)
+    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
+        "gensim_lda", gensim_model=models.LdaModel, num_topics=num_topics,
+        workers=workers)
 
-            except CollectionModelBoilerPlateRemovalFailureException as e:
-                errormsg = "Boilerplate removal error with first memento in TimeMap, " \
-                    "cannot effectively compare memento content"
+    return measuremodel
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
-                continue
+def score_TimeMap_by_measure(urit, timemap, collectionmodel, measuremodel,
+    measurename, num_topics=None, memento_data_cache=None,
+    levenshtein_engine=None, threshold=None):
+    """Scores the mementos of the TimeMap `timemap`, identified by `urit`,
+    with the measure named `measurename`, using the preprocessing settings
+    and functions recorded for it in `supported_timemap_measures`.
+
+    If `num_topics` is None, gensim measures use their default number of
+    topics. If `levenshtein_engine` is None, Levenshtein measures use
+    `default_levenshtein_engine`. If a `threshold` is given, measures that
+    support decision mode are scored in it, see
+    `compute_score_across_TimeMap`.
+    """
 
-            if len(first_data) == 0:
+    measureinfo = supported_timemap_measures[measurename]
 
-                errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
-                logger.warning(errormsg)
+    if threshold is not None and measureinfo.get("decision mode", False):
+        comparison = measureinfo["comparison direction"]
+    else:
+        threshold = None
+        comparison = None
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+    if measurename == "cosine":
 
-                # move on to the next URI-T
-                uritcounter += 1
-                continue
+        measuremodel = score_TimeMap_by_cosine(urit, timemap,
+            collectionmodel, measuremodel,
+            memento_data_cache=memento_data_cache)
 
-            mementototal = len(memento_list)
-            logger.info("There are {} mementos in this TimeMap".format(mementototal))
+    elif "setdistance function" in measureinfo:
 
-            mementocounter = 1
+        measuremodel = score_TimeMap_by_set_distance(urit, timemap,
+            collectionmodel, measuremodel, measurename,
+            measureinfo["setdistance function"],
+            tokenize=measureinfo["tokenize"],
+            stemming=measureinfo["stemming"],
+            remove_boilerplate=measureinfo["remove boilerplate"],
+            memento_data_cache=memento_data_cache)
 
-            processed_urims = []
-            error_urims = []
-            documents = []
+    elif "gensim model" in measureinfo:
 
-            # in case the mementos are not sorted in order of memento datetime
-            # we save the first one for comparison
-            processed_urims.append(first_urim)
-            documents.append(first_data)
+        if num_topics is None:
+            num_topics = measureinfo["default number of topics"]
 
-            for memento in memento_list:
+        measuremodel = score_TimeMap_by_gensim(urit, timemap,
+            collectionmodel, measuremodel, measurename,
+            measureinfo["gensim model"], num_topics=num_topics,
+            memento_data_cache=memento_data_cache)
 
-                logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+    else:
 
-                urim = memento["uri"]
+        scoredistance_function = measureinfo["scoredistance function"]
 
-                logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+        if measureinfo.get("levenshtein engine", False) and \
+            levenshtein_engine is not None:
 
-                try:
+            scoredistance_function = functools.partial(
+                scoredistance_function, engine=levenshtein_engine)
 
-                    # in case the mementos are not sorted in order of memento datetime
-                    # we ignore the first one for comparison because we already saved it
-                    if urim != first_urim:
-                        try:
-                            memento_data = get_memento_data_for_measure(
-                                urim, collectionmodel, tokenize=tokenize, 
-                                stemming=stemming, 
-                                remove_boilerplate=remove_boilerplate)
-                                
-                            processed_urims.append(urim)
-                            documents.append(memento_data)
-
-                        except CollectionModelBoilerPlateRemovalFailureException as e:
-                            errormsg = "Boilerplate could not be removed from " \
-                                "memento at URI-M {}; details: {}".format(urim, repr(e))
-                            logger.warning(errormsg)
-
-                            measuremodel.set_Memento_measurement_error(
-                                urit, urim, "timemap measures", measurename, repr(e)
-                            )
-
-                except CollectionModelMementoErrorException:
-                    errormsg = "Errors were recorded while attempting to " \
-                        "access URI-M {}, skipping {} calcualtions for this " \
-                        "URI-M".format(urim, measurename)
-                    logger.warning(errormsg)
+        measuremodel = score_TimeMap(urit, timemap, collectionmodel,
+            measuremodel, measurename, scoredistance_function,
+            tokenize=measureinfo["tokenize"],
+            stemming=measureinfo["stemming"],
+            remove_boilerplate=measureinfo["remove boilerplate"],
+            memento_data_cache=memento_data_cache,
+            threshold=threshold, comparison=comparison)
 
-                    errorinfo = collectionmodel.getMementoErrorInformation(urim)
+    return measuremodel
 
-                    measuremodel.set_Memento_access_error(
-                        urit, urim, errorinfo
-                    )
-                    error_urims.append(urim)
-                
-                mementocounter += 1
+def score_TimeMap_by_measures(urit, timemap, collectionmodel, measuremodel,
+    measurenames, num_topics=None, levenshtein_engine=None, thresholds=None):
+    """Scores the mementos of the TimeMap `timemap`, identified by `urit`,
+    with every measure listed in `measurenames`, sharing the memento
+    content and its preprocessing between them.
 
-            logger.info("There are {} mementos under consideration in this TimeMap".format(len(documents)))
+    If `thresholds` maps measure names to thresholds, those measures are
+    scored in decision mode where they support it.
+    """
 
-            dictionary = corpora.Dictionary(documents)
-            corpus = [ dictionary.doc2bow(text) for text in documents]
-            mod = gensim_model(corpus, id2word=dictionary, num_topics=num_topics)
+    memento_data_cache = {}
 
-            try:
-                index = similarities.MatrixSimilarity(mod[corpus])
-
-                for i in range(0, len(documents)):
-                    
-                    urim = processed_urims[i]
-                    doc = documents[i]
-                    vec_bow = dictionary.doc2bow(doc)
-                    vec_lsi = mod[vec_bow]
-
-                    sims = index[vec_lsi]
-                    
-                    # gensim outputs to float32, which is not serializable with 
-                    # the Python json library
-                    measuremodel.set_score(urit, urim, "timemap measures", measurename, 
-                        float(sims[0]) )
-                    measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
-                    measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
-                    measuremodel.set_removed_boilerplate(
-                        urit, urim, "timemap measures", measurename, remove_boilerplate
-                    )
+    if thresholds is None:
+        thresholds = {}
 
-            except IndexError as e:
-                errormsg = "Gensim Error: {}".format(repr(e))
-                logger.warning(errormsg)
+    for measurename in measurenames:
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+        logger.debug("Computing {} scores for TimeMap at {}".format(
+            measurename, urit))
 
-            uritcounter += 1
+        measuremodel = score_TimeMap_by_measure(urit, timemap,
+            collectionmodel, measuremodel, measurename,
+            num_topics=num_topics, memento_data_cache=memento_data_cache,
+            levenshtein_engine=levenshtein_engine,
+            threshold=thresholds.get(measurename))
 
     return measuremodel
 
-def compute_gensim_lsi_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
-    num_topics=10):
+def compute_measures_across_TimeMap(collectionmodel, measuremodel,
+    measurenames, num_topics=None, workers=1, levenshtein_engine=None,
+    thresholds=None):
+    """Iterates through all TimeMaps stored in `collectionmodel` once,
+    scoring their mementos with every measure listed in `measurenames`.
+    The results are stored in `measuremodel` just as if each measure's
+    "compute_" function had been run separately. TimeMaps are processed
+    by `workers` processes.
+
+    Each memento is read, stripped of boilerplate, and tokenized at most
+    once per preprocessing variant, with the results shared by all measures
+    requiring that variant. Only the data for the current TimeMap is kept
+    in memory.
+
+    If `thresholds` maps measure names to thresholds, the measures that
+    support it, levenshtein and nlevenshtein, are scored in decision mode,
+    see `compute_score_across_TimeMap`. The others are scored exactly.
+    """
 
-    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
-        "gensim_lsi", gensim_model=models.LsiModel, num_topics=num_topics)
+    logger.info("Computing {} scores across TimeMap, "
+        "beginning TimeMap iteration...".format(", ".join(measurenames)))
+
+    measuremodel = score_TimeMaps(collectionmodel, measuremodel,
+        score_TimeMap_by_measures, workers=workers,
+        measurenames=measurenames, num_topics=num_topics,
+        levenshtein_engine=levenshtein_engine, thresholds=thresholds)
 
     return measuremodel
 
-def compute_gensim_lda_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
-    num_topics=2):
+def compute_measures_for_TimeMap(urit, collectionmodel, measuremodel,
+    measurenames, num_topics=None, levenshtein_engine=None, thresholds=None):
+    """Scores the mementos of the single TimeMap at `urit` stored in
+    `collectionmodel` with every measure listed in `measurenames`, storing
+    the results in `measuremodel`. This allows TimeMaps to be scored as
+    they become available, such as from a MementoPipeline.
+    """
 
-    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
-        "gensim_lda", gensim_model=models.LdaModel, num_topics=num_topics)
+    timemap = collectionmodel.getTimeMap(urit)
 
-    return measuremodel
+    try:
+        timemap["mementos"]["list"]
+    except KeyError:
+        logger.exception("Malformed TimeMap or empty TimeMap at {} , skipping...".format(urit))
+        return measuremodel
+
+    return score_TimeMap_by_measures(urit, timemap, collectionmodel,
+        measuremodel, measurenames, num_topics=num_topics,
+        levenshtein_engine=levenshtein_engine, thresholds=thresholds)
 
 supported_timemap_measures = {
     "cosine": {
@@ -903,68 +1545,112 @@ supported_timemap_measures = {
         "name": "Byte Count",
         "function": compute_bytecount_across_TimeMap,
         "comparison direction": "<",
-        "default threshold": -0.43
+        "default threshold": -0.43,
+        "scoredistance function": bytecount_scoredistance,
+        "tokenize": False,
+        "stemming": False,
+        "remove boilerplate": False
     },
     "wordcount": {
         "name": "Word Count",
         "function": compute_wordcount_across_TimeMap,
         "comparison direction": "<",
-        "default threshold": -0.70
+        "default threshold": -0.70,
+        "scoredistance function": wordcount_scoredistance,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     },
     "tfintersection": {
         "name": "TF-Intersection",
         "function": compute_tfintersection_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 0.0
+        "default threshold": 0.0,
+        "scoredistance function": tfintersection_scoredistance,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     },
     "jaccard": {
         "name": "Jaccard Distance",
         "function": compute_jaccard_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 0.96
+        "default threshold": 0.96,
+        "scoredistance function": jaccard_scoredistance,
+        "setdistance function": jaccard_setdistances,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     },
     "sorensen": {
         "name": "Sørensen-Dice Distance",
         "function": compute_sorensen_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 0.93
+        "default threshold": 0.93,
+        "scoredistance function": sorensen_scoredistance,
+        "setdistance function": sorensen_setdistances,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     },
     "raw_simhash": {
         "name": "Simhash on raw memento content",
         "function": compute_rawsimhash_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 38
+        "default threshold": 38,
+        "scoredistance function": simhash_scoredistance,
+        "tokenize": False,
+        "stemming": False,
+        "remove boilerplate": False
     },
     "tf_simhash": {
         "name": "Simhash on term frequencies in memento",
         "function": compute_tfsimhash_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 34
+        "default threshold": 34,
+        "scoredistance function": simhash_scoredistance,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     },
     "gensim_lsi": {
         "name": "Latent Semantic Indexing with Gensim",
         "function": compute_gensim_lsi_across_TimeMap,
         "comparison direction": "<",
         "default threshold": 0.07,
-        "default number of topics": 10
+        "default number of topics": 10,
+        "gensim model": models.LsiModel
     },
     "gensim_lda": {
         "name": "Latent Dirichlet Allocation with Gensim (EXPERIMENTAL)",
         "function": compute_gensim_lda_across_TimeMap,
         "comparison direction": "<",
         "default threshold": 0.15,
-        "default number of topics": 2
+        "default number of topics": 2,
+        "gensim model": models.LdaModel
     },
     "levenshtein": {
         "name": "Levenshtein Distance",
         "function": compute_levenshtein_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 0.05
+        "default threshold": 0.05,
+        "scoredistance function": levenshtein_scoredistance,
+        "decision mode": True,
+        "levenshtein engine": True,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     },
     "nlevenshtein": {
         "name": "Normalized Levenshtein Distance",
         "function": compute_nlevenshtein_across_TimeMap,
         "comparison direction": ">",
-        "default threshold": 0.05
+        "default threshold": 0.05,
+        "scoredistance function": nlevenshtein_scoredistance,
+        "decision mode": True,
+        "levenshtein engine": True,
+        "tokenize": True,
+        "stemming": True,
+        "remove boilerplate": True
     }
 }
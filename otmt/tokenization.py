@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.tokenization
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module turns memento text into the lists of tokens used by the
+measures.
+"""
+
+import string
+import logging
+
+from functools import lru_cache
+
+from nltk import word_tokenize
+from nltk.corpus import stopwords
+from nltk.stem.porter import PorterStemmer
+
+logger = logging.getLogger(__name__)
+
+stemmer = PorterStemmer()
+
+# the vocabularies of mementos from the same seed overlap heavily, so the
+# stems are remembered across all documents processed by this process
+stem_memo_size = 2**20
+
+@lru_cache(maxsize=stem_memo_size)
+def stem(token):
+    """Returns the Porter stem of `token`, remembering the result for
+    future calls.
+    """
+
+    return stemmer.stem(token)
+
+class TokenizationPipeline:
+    """
+        This class holds everything needed to tokenize memento text: the
+        stopwords for a `language` as a frozen set and the memoized Porter
+        stemmer. The stopwords are loaded from NLTK on first use.
+    """
+
+    def __init__(self, language="english"):
+
+        self.language = language
+        self.stopset = None
+
+    def get_stopset(self):
+        """Returns the stopwords and punctuation that are removed from
+        tokenized text.
+        """
+
+        if self.stopset is None:
+            self.stopset = frozenset(
+                stopwords.words(self.language) + list(string.punctuation)
+            )
+
+        return self.stopset
+
+    def stem_tokens(self, tokens):
+        """Takes a list of `tokens` and feeds it through the Porter Stemmer,
+        producing a new list of stemmed tokens.
+        """
+
+        return [ stem(token) for token in tokens ]
+
+    def tokenize(self, text, stemming=True):
+        """Takes in `text` and produces a list of stemmed tokens with
+        stopwords removed. Stemming can be stopped by setting stemming
+        to False.
+        """
+
+        stopset = self.get_stopset()
+
+        if type(text) == bytes:
+            tokens = word_tokenize(text.decode("utf8"))
+        else:
+            tokens = word_tokenize(text)
+
+        if stemming:
+            return [ i for i in map(stem, tokens) if i not in stopset ]
+
+        return [ i for i in tokens if i not in stopset ]
+
+    def tokenize_documents(self, documents, stemming=True):
+        """Tokenizes each text in `documents` as `tokenize` would, returning
+        a list containing the tokens of each document in the same order.
+        """
+
+        return [ self.tokenize(text, stemming=stemming) for text in documents ]
+
+default_pipeline = TokenizationPipeline()
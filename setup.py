@@ -47,7 +47,8 @@ setup(
         'bin/select_by_language',
         'bin/slice_by_datetime',
         'bin/cluster_by_simhash',
-        'bin/select_high_quality'
+        'bin/select_high_quality',
+        'bin/calibrate_thresholds'
     ],
     install_requires=[
         'aiu',
@@ -63,12 +64,15 @@ setup(
         'paramiko',
         'requests',
         'requests_cache',
-        'requests_futures',
         'scikit-learn',
         'scipy',
         'simhash',
         'warcio'
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'zstd': ['zstandard']
+    },
     setup_requires=['nltk'],
     test_suite="tests",
     zip_safe=True,
@@ -0,0 +1,149 @@
+import os
+import shutil
+import unittest
+
+from otmt import MeasureModel, ColumnarMeasureModel
+from otmt.calibration import read_gold_standard, calculate_performance, \
+    sweep_thresholds, sweep_threshold_combinations, find_best_thresholds, \
+    get_score_range
+
+import numpy
+
+def store_scores(mm):
+
+    # mementos 0-5 are on-topic, 6-9 are off-topic
+    jaccard_scores = [ 0.1, 0.2, 0.1, 0.3, 0.2, 0.9, 0.8, 0.7, 0.9, 0.2 ]
+    bytecount_scores = [ -0.1, -0.2, -0.1, -0.3, -0.2, -0.1, -0.9, -0.8, -0.9, -0.9 ]
+
+    for i in range(0, 10):
+
+        urim = "memento{}".format(i)
+
+        mm.set_score("timemap1", urim, "timemap measures", "jaccard", jaccard_scores[i])
+        mm.set_score("timemap1", urim, "timemap measures", "bytecount", bytecount_scores[i])
+
+    mm.set_Memento_access_error("timemap1", "memento10", "ConnectionError")
+
+    return mm
+
+class TestingCalibration(unittest.TestCase):
+
+    def setUp(self):
+
+        self.test_directory = "/tmp/calibration_test"
+
+        if os.path.exists(self.test_directory):
+            shutil.rmtree(self.test_directory)
+
+        os.makedirs(self.test_directory)
+
+        self.gold_filename = "{}/gold.tsv".format(self.test_directory)
+
+        with open(self.gold_filename, 'w') as out:
+
+            out.write("id\tdate\tURI\tlabel\n")
+
+            for i in range(0, 11):
+                out.write("1\t20160101000000\tmemento{}\t{}\n".format(
+                    i, "ERROR" if i == 10 else ("1" if i < 6 else "0")))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.test_directory)
+
+    def test_calculate_performance(self):
+
+        actual = numpy.array([ True, True, False, False ])
+        predicted = numpy.array([
+            [ True, True, False, False ],
+            [ True, False, True, False ],
+            [ False, False, False, False ]
+        ])
+
+        performance = calculate_performance(predicted, actual)
+
+        self.assertEqual([2, 1, 0], performance["true positives"].tolist())
+        self.assertEqual([0, 1, 0], performance["false positives"].tolist())
+        self.assertEqual([1.0, 0.5, 0.0], performance["precision"].tolist())
+        self.assertEqual([1.0, 0.5, 0.0], performance["recall"].tolist())
+        self.assertEqual([1.0, 0.5, 0.0], performance["F1"].tolist())
+        self.assertEqual([1.0, 0.5, 0.5], performance["accuracy"].tolist())
+
+    def test_sweep_thresholds(self):
+
+        gold_labels = read_gold_standard(self.gold_filename)
+
+        self.assertEqual(10, len(gold_labels))
+        self.assertTrue(gold_labels["memento7"])
+        self.assertFalse(gold_labels["memento0"])
+
+        for mm in [ store_scores(MeasureModel()), store_scores(ColumnarMeasureModel()) ]:
+
+            thresholds = get_score_range(mm, "timemap measures", "jaccard", 9)
+
+            self.assertEqual([0.1, 0.9], [thresholds[0], thresholds[-1]])
+
+            results = sweep_thresholds(mm, "timemap measures", "jaccard",
+                [ 0.25, 0.5, 0.75 ], ">", gold_labels)
+
+            # memento5 is always a false positive and memento9 a false negative
+            self.assertEqual([3, 3, 2], results["true positives"].tolist())
+            self.assertEqual([2, 1, 1], results["false positives"].tolist())
+            self.assertEqual(1, find_best_thresholds(results))
+
+            results = sweep_threshold_combinations(mm, "timemap measures", {
+                "jaccard": ([ 0.25, 0.5, 0.75 ], ">"),
+                "bytecount": ([ -0.85, -0.5 ], "<")
+            }, gold_labels)
+
+            self.assertEqual((6, 2), results["thresholds"].shape)
+
+            best = find_best_thresholds(results)
+
+            self.assertEqual([0.5, -0.85], results["thresholds"][best].tolist())
+            self.assertEqual(1.0, results["recall"][best])
+
+            # the scores can be loaded from the output of an earlier run
+            reloaded = ColumnarMeasureModel()
+            reloaded.load_dict(mm.generate_dict())
+
+            self.assertEqual(mm.generate_dict(), reloaded.generate_dict())
+            self.assertEqual(
+                results["F1"].tolist(),
+                sweep_threshold_combinations(reloaded, "timemap measures", {
+                    "jaccard": ([ 0.25, 0.5, 0.75 ], ">"),
+                    "bytecount": ([ -0.85, -0.5 ], "<")
+                }, gold_labels)["F1"].tolist()
+            )
+
+    def test_combinations_with_unscored_measures(self):
+
+        gold_labels = read_gold_standard(self.gold_filename)
+
+        mm = store_scores(ColumnarMeasureModel())
+
+        cosine_thresholds = get_score_range(mm, "timemap measures", "cosine", 9)
+
+        self.assertEqual(0, len(cosine_thresholds))
+
+        results = sweep_threshold_combinations(mm, "timemap measures", {
+            "cosine": (cosine_thresholds, "<"),
+            "jaccard": ([ 0.25, 0.5, 0.75 ], ">")
+        }, gold_labels)
+
+        # measures without thresholds are left out of the combinations
+        self.assertEqual((3, 2), results["thresholds"].shape)
+        self.assertTrue(numpy.isnan(results["thresholds"][:, 0]).all())
+        self.assertEqual([ 0.25, 0.5, 0.75 ], results["thresholds"][:, 1].tolist())
+        self.assertEqual(
+            sweep_thresholds(mm, "timemap measures", "jaccard",
+                [ 0.25, 0.5, 0.75 ], ">", gold_labels)["F1"].tolist(),
+            results["F1"].tolist())
+
+        results = sweep_threshold_combinations(mm, "timemap measures", {
+            "cosine": (cosine_thresholds, "<"),
+            "gensim_lsi": (cosine_thresholds, "<")
+        }, gold_labels)
+
+        self.assertEqual((0, 2), results["thresholds"].shape)
+        self.assertIsNone(find_best_thresholds(results))
@@ -4,6 +4,7 @@ import os
 import hashlib
 import shutil
 import zipfile
+import copy
 
 import pprint
 
@@ -173,10 +174,14 @@ class TestingCollectionModel(unittest.TestCase):
         self.assertEqual(cm.getMementoContentWithoutBoilerplate(testurim1), b"mementotext\n")
 
         filename_digest = hashlib.sha3_256(bytes(testurim1, "utf8")).hexdigest()
+        content_digest = hashlib.sha3_256(testmemcontent).hexdigest()
+
+        self.assertEqual(content_digest, cm.getMementoContentDigest(testurim1))
 
         files_to_check = [
             "{}/{}_headers.json".format( memento_directory, filename_digest ),
-            "{}/{}.orig".format( memento_directory, filename_digest )
+            "{}/{}.orig".format( memento_directory, content_digest ),
+            "{}/{}.orig.noboilerplate".format( memento_directory, content_digest )
         ]
 
         self.check_fileobjects_exist(files_to_check)
@@ -258,10 +263,11 @@ class TestingCollectionModel(unittest.TestCase):
         self.assertEqual(cm.getMementoContent(testurim1), testmemcontent)
 
         filename_digest = hashlib.sha3_256(bytes(testurim1, "utf8")).hexdigest()
+        content_digest = hashlib.sha3_256(testmemcontent).hexdigest()
 
         files_to_check = [
             "{}/{}_headers.json".format( memento_directory, filename_digest ),
-            "{}/{}.orig".format( memento_directory, filename_digest )
+            "{}/{}.orig".format( memento_directory, content_digest )
         ]
 
         self.check_fileobjects_exist(files_to_check)
@@ -548,4 +554,492 @@ class TestingCollectionModel(unittest.TestCase):
                 "http://arxiv.example.net/web/20000621044156/http://a.example.org")
             data # here to shut up pylint
 
-        shutil.rmtree(working_directory)
\ No newline at end of file
+        shutil.rmtree(working_directory)
+
+    def test_token_cache(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_token_cache"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        testurim = "testing-storage:memento1"
+
+        testheaders = {
+            "header1": "value1",
+            "header2": "value2"
+        }
+
+        cm.addMemento(testurim, b"<html><body>mementotext</body></html>", testheaders)
+
+        self.assertIsNone(cm.getMementoTokens(testurim))
+        self.assertIsNone(cm.getMementoTokens("testing-storage:not-stored"))
+
+        tokens = [ "token{}".format(i % 300) for i in range(0, 1000) ] + \
+            [ "sørensen", "dice", "sørensen" ]
+
+        cm.addMementoTokens(testurim, tokens, stemming=True, remove_boilerplate=True)
+
+        content_digest = hashlib.sha3_256(
+            b"<html><body>mementotext</body></html>").hexdigest()
+
+        self.check_fileobjects_exist([
+            "{}/mementos/{}.orig.noboilerplate.stemmed.tokens".format(
+                working_directory, content_digest)
+        ])
+
+        self.assertEqual(tokens, cm.getMementoTokens(testurim))
+
+        # different preprocessing settings are stored separately
+        self.assertIsNone(cm.getMementoTokens(testurim, stemming=False))
+        self.assertIsNone(cm.getMementoTokens(testurim, remove_boilerplate=False))
+
+        cm.addMementoTokens(testurim, [], stemming=False, remove_boilerplate=False)
+
+        cm.flush()
+
+        # the tokens survive into the next run
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual(tokens, cm.getMementoTokens(testurim))
+        self.assertEqual([], cm.getMementoTokens(testurim, stemming=False, remove_boilerplate=False))
+
+        with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+            cm.addMementoTokens("testing-storage:not-stored", tokens)
+
+        shutil.rmtree(working_directory)
+
+    def test_content_addressed_mementos(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_content_addressed_mementos"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        content = b"<html><body>mementotext</body></html>"
+
+        cm.addMemento("testing-storage:memento1", content, { "header1": "value1" })
+        cm.addMemento("testing-storage:memento2", content, { "header1": "value2" })
+        cm.addMemento("testing-storage:memento3", b"<html><body>other</body></html>", {})
+
+        # the content is stored once, but the headers once per URI-M
+        self.assertEqual(2, len([ filename for filename in os.listdir(
+            "{}/mementos".format(working_directory)) if filename.endswith(".orig") ]))
+        self.assertEqual(3, len([ filename for filename in os.listdir(
+            "{}/mementos".format(working_directory)) if filename.endswith("_headers.json") ]))
+        self.assertEqual(cm.getMementoContentDigest("testing-storage:memento1"),
+            cm.getMementoContentDigest("testing-storage:memento2"))
+        self.assertNotEqual(cm.getMementoContentDigest("testing-storage:memento1"),
+            cm.getMementoContentDigest("testing-storage:memento3"))
+        self.assertEqual({ "header1": "value2" },
+            cm.getMementoHeaders("testing-storage:memento2"))
+
+        # what is derived from the content is shared as well
+        cm.addMementoTokens("testing-storage:memento1", [ "mementotext" ])
+        cm.addMementoContentWithoutBoilerplate("testing-storage:memento1", b"shared\n")
+
+        self.assertEqual([ "mementotext" ], cm.getMementoTokens("testing-storage:memento2"))
+        self.assertEqual(b"shared\n",
+            cm.getMementoContentWithoutBoilerplate("testing-storage:memento2"))
+        self.assertIsNone(cm.getMementoTokens("testing-storage:memento3"))
+
+        with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+            cm.getMementoContentDigest("testing-storage:not-stored")
+
+        # mementos stored before content was shared are kept under their URI-M
+        legacy_urim = "testing-storage:legacy-memento"
+        filename_digest = hashlib.sha3_256(bytes(legacy_urim, "utf8")).hexdigest()
+
+        with open("{}/mementos/{}.orig".format(working_directory, filename_digest), 'wb') as out:
+            out.write(b"<html><body>legacy</body></html>")
+
+        with open("{}/mementos/{}_headers.json".format(working_directory, filename_digest), 'w') as out:
+            out.write("{}")
+
+        cm.memento_csvwriter.writerow([legacy_urim, filename_digest])
+        cm.flush()
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual(b"<html><body>legacy</body></html>", cm.getMementoContent(legacy_urim))
+        self.assertEqual(b"legacy\n", cm.getMementoContentWithoutBoilerplate(legacy_urim))
+        self.assertEqual(content, cm.getMementoContent("testing-storage:memento2"))
+        self.assertEqual([ "mementotext" ], cm.getMementoTokens("testing-storage:memento2"))
+
+        shutil.rmtree(working_directory)
+
+    def test_compressed_mementos(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_compressed_mementos"
+
+        compressions = [ "gzip" ]
+
+        if collectionmodel.zstandard is not None:
+            compressions.append("zstd")
+
+        sample_count = collectionmodel.compression_dictionary_sample_count
+        collectionmodel.compression_dictionary_sample_count = 8
+
+        try:
+
+            for compression in compressions:
+
+                with self.subTest(compression=compression):
+
+                    if os.path.exists(working_directory):
+                        shutil.rmtree(working_directory)
+
+                    # mementos stored before compression was chosen stay readable
+                    cm = collectionmodel.CollectionModel(working_directory=working_directory)
+                    cm.addMemento("testing-storage:uncompressed",
+                        b"<html><body>uncompressed</body></html>", { "header1": "value1" })
+                    cm.flush()
+
+                    cm = collectionmodel.CollectionModel(
+                        working_directory=working_directory, compression=compression)
+
+                    # a second reader opened before a dictionary is trained
+                    reader = collectionmodel.CollectionModel(working_directory=working_directory)
+
+                    contents = [ bytes("<html><body><p>Memento {} of the collection "
+                        "about the same topic.</p></body></html>".format(i), "utf8") * 20
+                        for i in range(0, 16) ]
+
+                    for i, content in enumerate(contents):
+                        cm.addMemento("testing-storage:memento{}".format(i), content,
+                            { "header1": "value{}".format(i) })
+
+                    cm.flush()
+
+                    suffix = collectionmodel.compression_suffixes[compression]
+                    content_digest = cm.getMementoContentDigest("testing-storage:memento15")
+
+                    self.check_fileobjects_exist([
+                        "{}/mementos/{}.orig{}".format(working_directory, content_digest, suffix)
+                    ])
+
+                    self.assertLess(os.path.getsize("{}/mementos/{}.orig{}".format(
+                        working_directory, content_digest, suffix)), len(contents[15]))
+
+                    if compression == "zstd":
+                        self.check_fileobjects_exist([
+                            "{}/mementos/compression.dict".format(working_directory)
+                        ])
+
+                    for model in [ cm, reader,
+                        collectionmodel.CollectionModel(working_directory=working_directory) ]:
+
+                        model.load_data_from_directory()
+
+                        self.assertEqual(compression, model.compression)
+
+                        for i, content in enumerate(contents):
+
+                            urim = "testing-storage:memento{}".format(i)
+
+                            self.assertEqual(content, model.getMementoContent(urim))
+                            self.assertEqual({ "header1": "value{}".format(i) },
+                                model.getMementoHeaders(urim))
+
+                        self.assertEqual(b"<html><body>uncompressed</body></html>",
+                            model.getMementoContent("testing-storage:uncompressed"))
+                        self.assertEqual({ "header1": "value1" },
+                            model.getMementoHeaders("testing-storage:uncompressed"))
+
+                    self.assertEqual(
+                        collectionmodel.remove_boilerplate_from_content(contents[15]),
+                        cm.getMementoContentWithoutBoilerplate("testing-storage:memento15"))
+
+                    self.check_fileobjects_exist([
+                        "{}/mementos/{}.orig.noboilerplate{}".format(
+                            working_directory, content_digest, suffix)
+                    ])
+
+                    self.assertEqual(
+                        cm.getMementoContentWithoutBoilerplate("testing-storage:memento15"),
+                        reader.getMementoContentWithoutBoilerplate("testing-storage:memento15"))
+
+        finally:
+            collectionmodel.compression_dictionary_sample_count = sample_count
+
+        with self.assertRaises(collectionmodel.CollectionModelException):
+            collectionmodel.CollectionModel(
+                working_directory=working_directory, compression="bzip2")
+
+        shutil.rmtree(working_directory)
+
+    def test_precompute_boilerplate(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_precompute_boilerplate"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        contents = [ bytes("<html><body><p>Memento {} of the collection.</p>"
+            "</body></html>".format(i), "utf8") for i in range(0, 6) ]
+
+        for i, content in enumerate(contents):
+            cm.addMemento("testing-storage:memento{}".format(i), content, {})
+
+        # shared content is only processed once
+        cm.addMemento("testing-storage:shared", contents[0], {})
+        cm.addMemento("testing-storage:empty", b"", {})
+        cm.addMementoError("testing-storage:error", b"", {}, b"ConnectionError")
+
+        cm.getMementoContentWithoutBoilerplate("testing-storage:memento5")
+
+        self.assertTrue(cm.hasMementoContentWithoutBoilerplate("testing-storage:memento5"))
+        self.assertFalse(cm.hasMementoContentWithoutBoilerplate("testing-storage:memento4"))
+        self.assertFalse(cm.hasMementoContentWithoutBoilerplate("testing-storage:error"))
+
+        results = cm.precomputeBoilerplate(workers=2)
+
+        self.assertEqual(6, results["processed"])
+        self.assertEqual(1, results["failed"])
+        self.assertEqual(1, results["skipped"])
+
+        for i, content in enumerate(contents):
+
+            urim = "testing-storage:memento{}".format(i)
+
+            self.assertTrue(cm.hasMementoContentWithoutBoilerplate(urim))
+            self.assertEqual(collectionmodel.remove_boilerplate_from_content(content),
+                cm.getMementoContentWithoutBoilerplate(urim))
+
+        self.assertTrue(cm.hasMementoContentWithoutBoilerplate("testing-storage:shared"))
+        self.assertIsNone(cm.getBoilerplateRemovalFailure("testing-storage:memento0"))
+        self.assertIn("Document is empty",
+            cm.getBoilerplateRemovalFailure("testing-storage:empty"))
+
+        # failures are not attempted again by the next run
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertIn("Document is empty",
+            cm.getBoilerplateRemovalFailure("testing-storage:empty"))
+
+        results = cm.precomputeBoilerplate(workers=1)
+
+        self.assertEqual(0, results["processed"])
+        self.assertEqual(7, results["skipped"])
+
+        with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+            cm.addBoilerplateRemovalFailure("testing-storage:not-stored", "ParserError")
+
+        shutil.rmtree(working_directory)
+
+    def test_boilerplate_failure_cache(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_boilerplate_failure_cache"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        cm.addMemento("testing-storage:empty", b"", {})
+        cm.addMemento("testing-storage:also-empty", b"", {})
+
+        with self.assertRaises(collectionmodel.CollectionModelBoilerPlateRemovalFailureException) as first:
+            cm.getMementoContentWithoutBoilerplate("testing-storage:empty")
+
+        self.assertEqual(str(first.exception),
+            cm.getBoilerplateRemovalFailure("testing-storage:empty"))
+
+        remove_boilerplate_from_content = collectionmodel.remove_boilerplate_from_content
+        calls = []
+
+        def counting_remove_boilerplate_from_content(content):
+            calls.append(content)
+            return remove_boilerplate_from_content(content)
+
+        collectionmodel.remove_boilerplate_from_content = counting_remove_boilerplate_from_content
+
+        try:
+
+            # failures, including those of shared content, are not parsed again
+            for urim in [ "testing-storage:empty", "testing-storage:also-empty" ]:
+
+                with self.assertRaises(collectionmodel.CollectionModelBoilerPlateRemovalFailureException) as repeated:
+                    cm.getMementoContentWithoutBoilerplate(urim)
+
+                self.assertEqual(str(first.exception), str(repeated.exception))
+
+            cm.flush()
+
+            cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+            with self.assertRaises(collectionmodel.CollectionModelBoilerPlateRemovalFailureException) as repeated:
+                cm.getMementoContentWithoutBoilerplate("testing-storage:empty")
+
+            self.assertEqual(str(first.exception), str(repeated.exception))
+
+        finally:
+            collectionmodel.remove_boilerplate_from_content = remove_boilerplate_from_content
+
+        self.assertEqual([], calls)
+
+        shutil.rmtree(working_directory)
+
+    def test_clear_memento_errors_and_checkpoint(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_clear_memento_errors"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertIsNone(cm.getCheckpoint())
+
+        cm.addMemento("testing-storage:memento1", b"<html><body>mementotext</body></html>", {})
+        cm.addMementoError("testing-storage:memento2", b"", {}, b"ConnectionError")
+        cm.addMementoError("testing-storage:memento3", b"", {}, b"TooManyRedirects")
+
+        self.assertEqual(
+            ["testing-storage:memento2", "testing-storage:memento3"],
+            cm.getMementoErrorURIList()
+        )
+
+        cm.clearMementoErrors(["testing-storage:memento2", "testing-storage:not-stored"])
+
+        self.assertEqual(["testing-storage:memento3"], cm.getMementoErrorURIList())
+
+        filename_digest = hashlib.sha3_256(bytes("testing-storage:memento2", "utf8")).hexdigest()
+
+        self.assertFalse(os.path.exists("{}/memento_errors/{}_error_info.txt".format(
+            working_directory, filename_digest)))
+
+        cm.addMemento("testing-storage:memento2", b"<html><body>mementotext</body></html>", {})
+
+        cm.checkpoint({"acquired mementos": 2})
+
+        checkpoint = cm.getCheckpoint()
+
+        self.assertEqual(2, checkpoint["acquired mementos"])
+        self.assertEqual(2, checkpoint["mementos"])
+        self.assertEqual(1, checkpoint["memento errors"])
+
+        # the cleared error does not come back in the next run
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual(["testing-storage:memento3"], cm.getMementoErrorURIList())
+
+        self.assertEqual(
+            b"<html><body>mementotext</body></html>",
+            cm.getMementoContent("testing-storage:memento2")
+        )
+
+        self.assertEqual(b"TooManyRedirects",
+            cm.getMementoErrorInformation("testing-storage:memento3"))
+
+        shutil.rmtree(working_directory)
+
+    def test_lazy_read_only_timemap(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_lazy_read_only_timemap"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+        cm.addTimeMap("timemap1", timemap_content, {})
+        cm.flush()
+
+        expected_timemap = copy.deepcopy(cm.getTimeMap("timemap1"))
+
+        # nothing is parsed until the TimeMap is requested
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual(["timemap1"], cm.getTimeMapURIList())
+        self.assertEqual({}, cm.collection_timemaps)
+
+        timemap = cm.getTimeMap("timemap1")
+
+        self.assertEqual(expected_timemap, timemap)
+        self.assertIs(timemap, cm.getTimeMap("timemap1"))
+        self.assertIsInstance(timemap["mementos"]["list"],
+            collectionmodel.CompactMementoList)
+        self.assertEqual(
+            datetime(2016, 1, 21, 15, 45, 6),
+            timemap["mementos"]["first"]["datetime"]
+        )
+
+        with self.assertRaises(TypeError):
+            timemap["mementos"]["list"].append({})
+
+        with self.assertRaises(TypeError):
+            timemap["mementos"]["list"][0]["uri"] = "memento13"
+
+        with self.assertRaises(TypeError):
+            del timemap["mementos"]["first"]
+
+        mutable_timemap = copy.deepcopy(timemap)
+        mutable_timemap["mementos"]["list"].append({})
+
+        self.assertEqual(2, len(timemap["mementos"]["list"]))
+
+        with self.assertRaises(KeyError):
+            cm.getTimeMap("not-stored")
+
+        shutil.rmtree(working_directory)
+
+    def test_compact_memento_list(self):
+
+        memento_list = [
+            { "datetime": datetime(2016, 1, 21, 15, 45, 6), "uri": "memento11" },
+            { "datetime": datetime(1960, 3, 1, 0, 0, 0, 250), "uri": "memento12" },
+            { "datetime": datetime(2018, 1, 21, 15, 45, 12), "uri": "memento13" }
+        ]
+
+        self.assertTrue(collectionmodel.CompactMementoList.can_hold(memento_list))
+
+        compact_list = collectionmodel.CompactMementoList(memento_list)
+
+        self.assertEqual(memento_list, compact_list)
+        self.assertEqual(compact_list, collectionmodel.CompactMementoList(memento_list))
+        self.assertEqual(3, len(compact_list))
+        self.assertEqual(memento_list[-1], compact_list[-1])
+        self.assertEqual(memento_list[1:], compact_list[1:])
+        self.assertEqual(datetime(1960, 3, 1, 0, 0, 0, 250), compact_list[1]["datetime"])
+        self.assertIn(memento_list[0], compact_list)
+
+        with self.assertRaises(IndexError):
+            compact_list[3]
+
+        with self.assertRaises(TypeError):
+            compact_list.append({})
+
+        with self.assertRaises(TypeError):
+            compact_list[0]["uri"] = "memento14"
+
+        mutable_list = copy.deepcopy(compact_list)
+        mutable_list.append({})
+
+        self.assertEqual(memento_list + [ {} ], mutable_list)
+        self.assertEqual(list, type(mutable_list))
+
+        # anything else is left as ordinary read-only lists and dicts
+        for other_list in [
+            memento_list + [ { "datetime": None, "uri": "memento14" } ],
+            memento_list + [ { "datetime": datetime(2018, 1, 1), "uri": "memento14", "extra": 1 } ]
+            ]:
+
+            self.assertFalse(collectionmodel.CompactMementoList.can_hold(other_list))
+
+            timemap = collectionmodel.make_read_only_timemap({ "mementos": { "list": other_list } })
+
+            self.assertIsInstance(timemap["mementos"]["list"], collectionmodel.ReadOnlyList)
+            self.assertEqual(other_list, timemap["mementos"]["list"])
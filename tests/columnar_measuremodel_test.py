@@ -0,0 +1,150 @@
+import unittest
+import os
+
+from otmt.measuremodel import MeasureModelException
+
+from otmt import MeasureModel, ColumnarMeasureModel, MeasureModelNoSuchMemento, \
+    MeasureModelNoSuchTimeMap, MeasureModelNoSuchMeasure, \
+    MeasureModelNoSuchMeasureType
+
+from tests.measuremodel_test import store_measures
+
+class TestingColumnarMeasureModel(unittest.TestCase):
+
+    def test_same_results_as_measuremodel(self):
+
+        mm = store_measures(MeasureModel())
+        cmm = store_measures(ColumnarMeasureModel())
+
+        self.assertEqual(mm.scoremodel, cmm.scoremodel)
+        self.assertEqual(mm.generate_dict(), cmm.generate_dict())
+        self.assertEqual(list(mm.generate_measure_rows()), list(cmm.generate_measure_rows()))
+        self.assertEqual(mm.get_Measures(), cmm.get_Measures())
+
+        self.assertEqual(30, cmm.get_score("timemap1", "timemap1-memento3",
+            "timemap measures", "raw_simhash"))
+        self.assertIsInstance(cmm.get_score("timemap1", "timemap1-memento3",
+            "timemap measures", "raw_simhash"), int)
+        self.assertEqual(2 ** 63 + 3, cmm.get_simhash("timemap1", "timemap1-memento3"))
+
+        self.assertEqual("off-topic",
+            cmm.get_off_topic_status_by_measure("timemap1-memento3",
+                "timemap measures", "jaccard"))
+        self.assertEqual("on-topic",
+            cmm.get_overall_off_topic_status("timemap1-memento1"))
+        self.assertEqual("EmptyDocument",
+            cmm.get_Memento_measurement_error_message("timemap2-memento3",
+                "timemap measures", "jaccard"))
+        self.assertEqual("ConnectionError",
+            cmm.get_Memento_access_error_message("timemap2-memento4"))
+        self.assertEqual("404 Not Found",
+            cmm.get_TimeMap_access_error_message("timemap3"))
+        self.assertIsNone(cmm.get_TimeMap_access_error_message("timemap1"))
+
+    def test_simhash_error_messages(self):
+
+        mm = store_measures(MeasureModel())
+        cmm = store_measures(ColumnarMeasureModel())
+
+        # metadata_calcluations stores messages for mementos with errors
+        for model in [ mm, cmm ]:
+            model.set_simhash("timemap2", "timemap2-memento3", "No Simhash due to error")
+            model.set_simhash("timemap2", "timemap2-memento4", "No Simhash due to access error")
+            model.set_content_length("timemap2", "timemap2-memento4", "No length due to access error")
+
+        self.assertEqual(mm.scoremodel, cmm.scoremodel)
+        self.assertEqual(mm.generate_dict(), cmm.generate_dict())
+        self.assertEqual("No Simhash due to error",
+            cmm.get_simhash("timemap2", "timemap2-memento3"))
+
+        cmm.set_simhash("timemap2", "timemap2-memento3", 5)
+        self.assertEqual(5, cmm.get_simhash("timemap2", "timemap2-memento3"))
+
+        cmm.set_simhash("timemap2", "timemap2-memento3", None)
+        self.assertIsNone(cmm.get_simhash("timemap2", "timemap2-memento3"))
+
+    def test_missing_data(self):
+
+        cmm = ColumnarMeasureModel()
+
+        with self.assertRaises(MeasureModelNoSuchTimeMap):
+            cmm.get_score("timemap1", "memento1", "measuretype1", "measure1")
+
+        cmm.set_Memento_access_error("timemap1", "memento2", "ConnectionError")
+
+        with self.assertRaises(MeasureModelNoSuchMemento):
+            cmm.get_stemmed("timemap1", "memento1", "measuretype1", "measure1")
+
+        with self.assertRaises(MeasureModelNoSuchMeasureType):
+            cmm.get_tokenized("timemap1", "memento2", "measuretype1", "measure1")
+
+        cmm.set_score("timemap1", "memento2", "measuretype1", "measure2", 0.5)
+
+        with self.assertRaises(MeasureModelNoSuchMeasure):
+            cmm.get_removed_boilerplate("timemap1", "memento2", "measuretype1", "measure1")
+
+        self.assertIsNone(cmm.get_stemmed("timemap1", "memento2", "measuretype1", "measure2"))
+        self.assertIsNone(cmm.get_content_length("timemap1", "memento2"))
+        self.assertIsNone(cmm.get_simhash("timemap1", "memento2"))
+        self.assertIsNone(cmm.get_language("timemap1", "memento2"))
+
+    def test_missing_overall_topic_status(self):
+
+        for mm in [ MeasureModel(), ColumnarMeasureModel() ]:
+
+            mm.set_simhash("timemap1", "memento1", 5)
+            mm.set_score("timemap1", "memento2", "timemap measures", "jaccard", 0.5)
+            mm.set_Memento_measurement_error("timemap1", "memento3",
+                "timemap measures", "jaccard", "EmptyDocument")
+
+            for urim in [ "memento1", "memento2", "memento3" ]:
+                self.assertIsNone(mm.get_overall_off_topic_status(urim))
+
+            mm.calculate_offtopic_by_measure("timemap measures", "jaccard", 0.25, ">")
+            mm.calculate_overall_offtopic_status()
+
+            self.assertEqual("off-topic", mm.get_overall_off_topic_status("memento2"))
+            self.assertIsNone(mm.get_overall_off_topic_status("memento3"))
+
+    def test_evaluate_thresholds(self):
+
+        for mm in [ store_measures(MeasureModel()), store_measures(ColumnarMeasureModel()) ]:
+
+            mementos, offtopic, measured = mm.evaluate_thresholds(
+                "timemap measures", "jaccard", [ 0.1, 0.5, 1.0 ], ">")
+
+            self.assertEqual(len(mementos), len(measured))
+            self.assertEqual((3, len(mementos)), offtopic.shape)
+
+            # memento3 of timemap2 has a measurement error, memento4 an access error
+            self.assertEqual(7, measured.sum())
+            self.assertEqual([5, 1, 0], offtopic.sum(axis=1).tolist())
+
+            for index, (urit, urim) in enumerate(mementos):
+
+                if measured[index]:
+                    self.assertEqual(
+                        mm.get_off_topic_status_by_measure(urim,
+                            "timemap measures", "jaccard") == "off-topic",
+                        offtopic[1][index]
+                    )
+
+            with self.assertRaises(MeasureModelException):
+                mm.calculate_offtopic_by_measure("timemap measures", "jaccard", 0.5, ">=")
+
+    def test_load_output(self):
+
+        mm = store_measures(MeasureModel())
+
+        for filename, save in [
+            ("/tmp/test_columnar_measuremodel_load_output.json", mm.save_as_JSON),
+            ("/tmp/test_columnar_measuremodel_load_output.jsonl", mm.save_as_JSONL) ]:
+
+            save(filename)
+
+            cmm = ColumnarMeasureModel()
+            cmm.load_JSON(filename)
+
+            self.assertEqual(mm.generate_dict(), cmm.generate_dict())
+
+            os.unlink(filename)
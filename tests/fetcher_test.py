@@ -0,0 +1,334 @@
+import unittest
+import threading
+import shutil
+import time
+import os
+import hashlib
+
+from datetime import datetime
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+from otmt import AsyncFetcher
+from otmt import CollectionModel
+from otmt.input_types import fetch_and_save_memento_content, \
+    get_collection_model_from_timemap
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class StandInArchiveHandler(BaseHTTPRequestHandler):
+    """Serves mementos from memory, tracking how many requests are
+    in flight at once and failing the first requests for /flaky. A
+    TimeMap of the mementos is served in two pages, /timemap/1 and
+    /timemap/2, and a TimeMap without mementos at /timemap/empty.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, include_body):
+
+        server = self.server
+
+        with server.lock:
+            server.request_count += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        time.sleep(0.05)
+
+        # the client may send its next request as soon as it has a response
+        with server.lock:
+            server.in_flight -= 1
+
+        if self.path == "/flaky":
+
+            with server.lock:
+                server.flaky_attempts += 1
+                attempts = server.flaky_attempts
+
+            if attempts <= 2:
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        body = "<html><body>memento at {}</body></html>".format(
+            self.path).encode("utf8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Memento-Datetime", "Thu, 01 Jan 1970 00:00:00 GMT")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if include_body:
+            self.wfile.write(body)
+
+    def respond_timemap(self):
+
+        base_uri = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        page = self.path.split('/')[-1]
+
+        links = [
+            '<http://example.com/>; rel="original"',
+            '<{}/timemap/{}>; rel="self"; type="application/link-format"'.format(
+                base_uri, page)
+        ]
+
+        page = 0 if page == "empty" else int(page)
+
+        for i in range(max(page * 3 - 3, 0), page * 3):
+            links.append(
+                '<{}/memento{}>; rel="memento"; datetime="Thu, 0{} Jan 1970 00:00:00 GMT"'.format(
+                    base_uri, i, i + 1))
+
+        if page == 1:
+            links.append('<{}/timemap/2>; rel="next"; type="application/link-format"'.format(
+                base_uri))
+
+        body = ",\n".join(links).encode("utf8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/link-format")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        if self.path.startswith("/timemap/"):
+            self.respond_timemap()
+        else:
+            self.respond(True)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+class TestingAsyncFetcher(unittest.TestCase):
+
+    def setUp(self):
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInArchiveHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.flaky_attempts = 0
+        self.server.request_count = 0
+
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.base_uri = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def tearDown(self):
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_host_concurrency(self):
+
+        uris = [ "{}/memento{}".format(self.base_uri, i) for i in range(0, 20) ]
+
+        with AsyncFetcher(concurrency=10, host_concurrency=3) as fetcher:
+            futures = [ fetcher.get(uri) for uri in uris ]
+
+        for uri, future in zip(uris, futures):
+            response = future.result()
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(uri.split('/')[-1], response.text)
+
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertGreater(self.server.max_in_flight, 1)
+
+    def test_host_limits(self):
+
+        uris = [ "{}/memento{}".format(self.base_uri, i) for i in range(0, 10) ]
+        hostkey = "127.0.0.1:{}".format(self.server.server_address[1])
+
+        with AsyncFetcher(concurrency=10, host_concurrency=5,
+            host_limits={ hostkey: 1 }) as fetcher:
+
+            self.assertEqual(fetcher.get_host_key(uris[0]), hostkey)
+            self.assertEqual(
+                fetcher.get_host_key("https://wayback.archive-it.org/1234/20100101000000/http://example.com"),
+                "wayback.archive-it.org"
+            )
+
+            futures = [ fetcher.head(uri) for uri in uris ]
+
+        for future in futures:
+            self.assertEqual(future.result().status_code, 200)
+
+        self.assertEqual(self.server.max_in_flight, 1)
+
+    def test_retry(self):
+
+        with AsyncFetcher(retries=3, backoff_factor=0) as fetcher:
+            response = fetcher.get("{}/flaky".format(self.base_uri)).result()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.flaky_attempts, 3)
+
+        self.server.flaky_attempts = 0
+
+        with AsyncFetcher(retries=1, backoff_factor=0) as fetcher:
+            response = fetcher.get("{}/flaky".format(self.base_uri)).result()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.flaky_attempts, 2)
+
+    def test_fetch_and_save_memento_content(self):
+
+        working_directory = "/tmp/test_fetcher_fetch_and_save"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        urims = [ "{}/memento{}".format(self.base_uri, i) for i in range(0, 5) ]
+
+        cm = CollectionModel(working_directory)
+
+        with AsyncFetcher(concurrency=4, host_concurrency=2) as fetcher:
+            fetch_and_save_memento_content(urims, cm, fetcher=fetcher)
+
+        self.assertEqual(sorted(urims), sorted(cm.getMementoURIList()))
+
+        for urim in urims:
+            self.assertEqual(
+                "<html><body>memento at /{}</body></html>".format(
+                    urim.split('/')[-1]).encode("utf8"),
+                cm.getMementoContent(urim)
+            )
+
+        self.assertLessEqual(self.server.max_in_flight, 2)
+
+        shutil.rmtree(working_directory)
+
+    def test_resume_acquisition(self):
+
+        working_directory = "/tmp/test_fetcher_resume_acquisition"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        urims = [ "{}/memento{}".format(self.base_uri, i) for i in range(0, 5) ]
+        error_urim = "{}/memento5".format(self.base_uri)
+
+        cm = CollectionModel(working_directory)
+
+        with AsyncFetcher() as fetcher:
+            fetch_and_save_memento_content(urims[0:3], cm, fetcher=fetcher)
+
+        cm.addMementoError(error_urim, b"", {}, b"ConnectionError")
+        cm.flush()
+
+        self.assertEqual(6, self.server.request_count)
+        self.assertEqual(3, cm.getCheckpoint()["acquired mementos"])
+
+        # a later run only acquires what is missing
+        cm = CollectionModel(working_directory)
+        self.server.request_count = 0
+
+        with AsyncFetcher() as fetcher:
+            fetch_and_save_memento_content(urims + [ error_urim ], cm,
+                fetcher=fetcher)
+
+        self.assertEqual(4, self.server.request_count)
+        self.assertEqual(sorted(urims), sorted(cm.getMementoURIList()))
+        self.assertEqual([ error_urim ], cm.getMementoErrorURIList())
+
+        self.server.request_count = 0
+
+        with AsyncFetcher() as fetcher:
+            fetch_and_save_memento_content(urims + [ error_urim ], cm,
+                fetcher=fetcher, retry_errors=True)
+
+        self.assertEqual(2, self.server.request_count)
+        self.assertEqual([], cm.getMementoErrorURIList())
+        self.assertEqual(
+            b"<html><body>memento at /memento5</body></html>",
+            cm.getMementoContent(error_urim)
+        )
+
+        shutil.rmtree(working_directory)
+
+    def test_paged_timemap(self):
+
+        working_directory = "/tmp/test_fetcher_paged_timemap"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        urit = "{}/timemap/1".format(self.base_uri)
+        urims = [ "{}/memento{}".format(self.base_uri, i) for i in range(0, 6) ]
+
+        with AsyncFetcher() as fetcher:
+            cm = get_collection_model_from_timemap([ urit ], working_directory,
+                fetcher=fetcher)
+
+        self.assertEqual(sorted(urims), sorted(cm.getMementoURIList()))
+
+        timemap = cm.getTimeMap(urit)
+
+        self.assertEqual(urims, [ memento["uri"] for memento in timemap["mementos"]["list"] ])
+        self.assertEqual(urit, timemap["timemap_uri"]["link_format"])
+        self.assertEqual(urims[0], timemap["mementos"]["first"]["uri"])
+        self.assertEqual(urims[-1], timemap["mementos"]["last"]["uri"])
+        self.assertEqual(datetime(1970, 1, 6), timemap["mementos"]["last"]["datetime"])
+        self.assertEqual(200, cm.getTimeMapHeaders(urit)["http-status"])
+
+        # the link format text of the pages is kept as the original TimeMap
+        filename_digest = hashlib.sha3_256(bytes(urit, "utf8")).hexdigest()
+
+        with open("{}/timemaps/{}.orig".format(
+            working_directory, filename_digest)) as f:
+            content = f.read()
+
+        self.assertTrue(content.startswith('<http://example.com/>; rel="original"'))
+        self.assertIn('<{}>; rel="memento"'.format(urims[0]), content)
+        self.assertIn('<{}>; rel="memento"'.format(urims[-1]), content)
+
+        # a later run reads the stored TimeMap
+        cm = CollectionModel(working_directory)
+        self.server.request_count = 0
+
+        with AsyncFetcher() as fetcher:
+            cm = get_collection_model_from_timemap([ urit ], working_directory,
+                fetcher=fetcher)
+
+        self.assertEqual(0, self.server.request_count)
+        self.assertEqual(urims, [ memento["uri"] for memento in
+            cm.getTimeMap(urit)["mementos"]["list"] ])
+
+        shutil.rmtree(working_directory)
+
+    def test_timemap_without_mementos(self):
+
+        working_directory = "/tmp/test_fetcher_timemap_without_mementos"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        urit = "{}/timemap/empty".format(self.base_uri)
+
+        with AsyncFetcher() as fetcher:
+            cm = get_collection_model_from_timemap([ urit ], working_directory,
+                fetcher=fetcher)
+
+        self.assertEqual([ urit ], cm.getTimeMapURIList())
+        self.assertEqual([], cm.getMementoURIList())
+        self.assertNotIn("mementos", cm.getTimeMap(urit))
+
+        # a later run reads the stored TimeMap
+        with AsyncFetcher() as fetcher:
+            cm = get_collection_model_from_timemap([ urit ], working_directory,
+                fetcher=fetcher)
+
+        self.assertEqual([ urit ], cm.getTimeMapURIList())
+
+        shutil.rmtree(working_directory)
@@ -2,6 +2,7 @@ import unittest
 import shutil
 import zipfile
 import os
+import concurrent.futures
 
 from datetime import datetime
 
@@ -10,6 +11,7 @@ from requests.exceptions import ConnectionError, TooManyRedirects
 from otmt import CollectionModel
 from otmt import get_collection_model
 from otmt import discover_raw_urims
+from otmt.input_types import iterate_completed
 
 import logging
 logging.basicConfig(level=logging.DEBUG)
@@ -87,15 +89,20 @@ class MockResponse():
         self.history = futures_mementoinfo[self.uri]["history"]
         self.url = ""
 
-class MockFuture():
+class MockFuture(concurrent.futures.Future):
 
     def __init__(self, uri):
+
+        super().__init__()
+
         self.uri = uri
 
-    def done(self):
-        return True
+        try:
+            self.set_result(self.mock_result())
+        except (ConnectionError, TooManyRedirects) as e:
+            self.set_exception(e)
 
-    def result(self):
+    def mock_result(self):
 
         if self.uri == "https://wayback.archive-it.org/web/19700101000000/http://connectionerror":
             raise ConnectionError("connectionerror")
@@ -276,3 +283,34 @@ class InputTypeTest(unittest.TestCase):
             errordata["https://wayback.archive-it.org/web/19700101000000/http://toomanyredirects"],
             "TooManyRedirects('toomanyredirects')"
         )
+
+    def test_iterate_completed(self):
+
+        futures = {}
+
+        for uri in [ "uri1", "uri2", "uri3" ]:
+            futures[uri] = concurrent.futures.Future()
+
+        futures["mock"] = MockFuture(
+            "https://wayback.archive-it.org/web/19700101000000/http://goodmemento"
+        )
+
+        futures["uri3"].set_result("result3")
+
+        completed = iterate_completed(futures)
+
+        # futures that are already done come first
+        self.assertEqual(
+            { "uri3": futures["uri3"], "mock": futures["mock"] },
+            dict([ next(completed), next(completed) ]))
+
+        futures["uri1"].set_result("result1")
+
+        self.assertEqual(next(completed), ("uri1", futures["uri1"]))
+
+        futures["uri2"].set_exception(ConnectionError("connectionerror"))
+
+        self.assertEqual(next(completed), ("uri2", futures["uri2"]))
+
+        with self.assertRaises(StopIteration):
+            next(completed)
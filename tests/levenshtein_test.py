@@ -0,0 +1,106 @@
+import random
+import unittest
+
+import distance
+
+from otmt.levenshtein import bitparallel_levenshtein, \
+    bitparallel_nlevenshtein, trim_common_affixes, bag_distance, \
+    levenshtein_engines
+
+class TestingLevenshtein(unittest.TestCase):
+
+    def assertSameAsDistance(self, seq1, seq2):
+
+        self.assertEqual(distance.levenshtein(seq1, seq2),
+            bitparallel_levenshtein(seq1, seq2))
+        self.assertEqual(distance.nlevenshtein(seq1, seq2),
+            bitparallel_nlevenshtein(seq1, seq2))
+
+    def test_same_as_distance(self):
+
+        pairs = [
+            ([], []),
+            ([], ["fox"]),
+            (["fox"], []),
+            (["fox"], ["fox"]),
+            (["fox"], ["dog"]),
+            (["the", "quick", "brown", "fox"], ["the", "quick", "brown", "fox"]),
+            (["the", "quick", "brown", "fox"], ["the", "slow", "brown", "fox"]),
+            (["quick", "brown", "fox"], ["the", "quick", "brown", "fox", "jumps"]),
+            (["fox", "fox", "fox"], ["fox"]),
+            ("kitten", "sitting"),
+            (b"kitten", b"sitting"),
+            ([ 1, 2, 3, 4, 5 ], [ 5, 4, 3, 2, 1 ])
+        ]
+
+        for seq1, seq2 in pairs:
+            with self.subTest(seq1=seq1, seq2=seq2):
+                self.assertSameAsDistance(seq1, seq2)
+                self.assertSameAsDistance(seq2, seq1)
+
+        random.seed(1)
+
+        # longer than a machine word on either side, and with few tokens
+        # so that the sequences share many of them
+        for i in range(0, 200):
+
+            seq1 = random.choices("abcde", k=random.randint(0, 150))
+            seq2 = random.choices("abcde", k=random.randint(0, 150))
+
+            with self.subTest(seq1=seq1, seq2=seq2):
+                self.assertSameAsDistance(seq1, seq2)
+
+        tokens = [ "token{}".format(i) for i in range(0, 500) ]
+        seq1 = random.choices(tokens, k=400)
+        seq2 = list(seq1)
+
+        for i in range(0, 40):
+            seq2[random.randrange(len(seq2))] = random.choice(tokens)
+
+        del seq2[100:120]
+        seq2[300:300] = random.choices(tokens, k=30)
+
+        self.assertSameAsDistance(seq1, seq2)
+
+        self.assertIsInstance(bitparallel_levenshtein(seq1, seq2), int)
+        self.assertIsInstance(bitparallel_nlevenshtein(seq1, seq2), float)
+
+    def test_trim_common_affixes(self):
+
+        self.assertEqual((["quick"], ["slow"]), trim_common_affixes(
+            ["the", "quick", "fox"], ["the", "slow", "fox"]))
+
+        self.assertEqual(([], ["fox"]), trim_common_affixes(
+            ["fox"], ["fox", "fox"]))
+
+        self.assertEqual(([], []), trim_common_affixes(
+            ["the", "fox"], ["the", "fox"]))
+
+    def test_bounded_levenshtein(self):
+
+        random.seed(2)
+
+        for i in range(0, 100):
+
+            seq1 = random.choices("abcde", k=random.randint(0, 100))
+            seq2 = random.choices("abcde", k=random.randint(0, 100))
+
+            score = distance.levenshtein(seq1, seq2)
+
+            self.assertLessEqual(bag_distance(seq1, seq2), score)
+
+            for max_dist in [ -1, 0, 5, score - 1, score, score + 1, 200 ]:
+                for engine in levenshtein_engines:
+
+                    bound = levenshtein_engines[engine]["bounded levenshtein"](
+                        seq1, seq2, max_dist)
+
+                    with self.subTest(seq1=seq1, seq2=seq2, max_dist=max_dist, engine=engine):
+
+                        # a bound on the same side of max_dist as the distance
+                        if score > max_dist:
+                            self.assertGreater(bound, max_dist)
+                            self.assertLessEqual(bound, score)
+                        else:
+                            self.assertLessEqual(bound, max_dist)
+                            self.assertGreaterEqual(bound, score)
@@ -3,11 +3,53 @@ import os
 import json
 import pprint
 
+from datetime import datetime
+
 pp = pprint.PrettyPrinter(indent=4)
 
 from otmt import MeasureModel, MeasureModelNoSuchMemento, \
     MeasureModelNoSuchTimeMap, MeasureModelNoSuchMeasure, \
     MeasureModelNoSuchMeasureType
+from otmt.measuremodel import read_output_records
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+def store_measures(mm):
+
+    for urit in [ "timemap1", "timemap2" ]:
+
+        for i in range(0, 4):
+
+            urim = "{}-memento{}".format(urit, i)
+
+            mm.set_simhash(urit, urim, 2 ** 63 + i)
+            mm.set_content_length(urit, urim, 100 * i)
+            mm.set_language(urit, urim, "en")
+            mm.set_memento_datetime(urit, urim, datetime(2016, 1, i + 1))
+
+            mm.set_score(urit, urim, "timemap measures", "jaccard", i * 0.25)
+            mm.set_stemmed(urit, urim, "timemap measures", "jaccard", True)
+            mm.set_tokenized(urit, urim, "timemap measures", "jaccard", True)
+            mm.set_removed_boilerplate(urit, urim, "timemap measures", "jaccard", True)
+
+            mm.set_score(urit, urim, "timemap measures", "raw_simhash", i * 10)
+            mm.set_stemmed(urit, urim, "timemap measures", "raw_simhash", False)
+            mm.set_tokenized(urit, urim, "timemap measures", "raw_simhash", False)
+            mm.set_removed_boilerplate(urit, urim, "timemap measures", "raw_simhash", False)
+
+    mm.set_Memento_access_error("timemap2", "timemap2-memento4", "ConnectionError")
+    mm.set_Memento_measurement_error("timemap2", "timemap2-memento3",
+        "timemap measures", "jaccard", "EmptyDocument")
+    mm.set_TimeMap_access_error("timemap3", "404 Not Found")
+
+    mm.calculate_offtopic_by_measure("timemap measures", "jaccard", 0.5, ">")
+    mm.calculate_offtopic_by_measure("timemap measures", "raw_simhash", 25, ">")
+    mm.calculate_overall_offtopic_status()
+
+    return mm
 
 class TestingMeasureModel(unittest.TestCase):
 
@@ -275,4 +317,136 @@ timemap5,http://examplearchive.org/19700101000000/http://memento3,Memento Measur
             mm.get_tokenized("timemap1", "http://examplearchive.org/19700101000000/http://memento1", "measuretype1", "measure1")
 
         with self.assertRaises(MeasureModelNoSuchMeasure):
-            mm.get_removed_boilerplate("timemap1", "http://examplearchive.org/19700101000000/http://memento1", "measuretype1", "measure1")
\ No newline at end of file
+            mm.get_removed_boilerplate("timemap1", "http://examplearchive.org/19700101000000/http://memento1", "measuretype1", "measure1")
+
+    def test_jsonl_round_trip(self):
+
+        jsonfilename = "/tmp/test_measuremodel_jsonl_round_trip.json"
+        jsonlfilename = "/tmp/test_measuremodel_jsonl_round_trip.jsonl"
+
+        mm = store_measures(MeasureModel())
+
+        mm.save_as_JSON(jsonfilename)
+        mm.save_as_JSONL(jsonlfilename)
+
+        with open(jsonlfilename) as f:
+            # 8 stored mementos, 1 memento access error, 1 TimeMap access error
+            self.assertEqual(10, len(f.readlines()))
+
+        self.assertEqual(list(read_output_records(jsonfilename)),
+            list(read_output_records(jsonlfilename)))
+
+        for filename in [ jsonfilename, jsonlfilename ]:
+
+            loaded = MeasureModel()
+            loaded.load_JSON(filename)
+
+            self.assertEqual(mm.generate_dict(), loaded.generate_dict())
+
+            os.unlink(filename)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_output(self):
+
+        parquetfilename = "/tmp/test_measuremodel_parquet_output.parquet"
+
+        mm = store_measures(MeasureModel())
+
+        mm.save_as_Parquet(parquetfilename, row_group_size=4)
+
+        parquetfile = pyarrow.parquet.ParquetFile(parquetfilename)
+
+        # 8 mementos with 2 measures each, 1 memento and 1 TimeMap access error
+        self.assertEqual(18, parquetfile.metadata.num_rows)
+        self.assertEqual(5, parquetfile.metadata.num_row_groups)
+
+        rows = parquetfile.read().to_pylist()
+
+        self.assertEqual("timemap1-memento3", rows[6]["URI-M"])
+        self.assertEqual("jaccard", rows[6]["Measurement Name"])
+        self.assertEqual(0.75, rows[6]["Comparison Score"])
+        self.assertEqual("off-topic", rows[6]["Topic Status"])
+        self.assertEqual(2 ** 63 + 3, rows[6]["Simhash"])
+        self.assertEqual(2016, rows[6]["Memento-Datetime"].year)
+        self.assertEqual("raw_simhash", rows[7]["Measurement Name"])
+        self.assertEqual(30.0, rows[7]["Comparison Score"])
+        self.assertFalse(rows[7]["Stemmed"])
+
+        self.assertEqual("Memento Measurement Error", rows[14]["Error"])
+        self.assertIsNone(rows[14]["Comparison Score"])
+        self.assertEqual("Memento Access Error", rows[16]["Error"])
+        self.assertEqual("timemap3", rows[17]["URI-T"])
+        self.assertIsNone(rows[17]["URI-M"])
+
+        os.unlink(parquetfilename)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_output_with_metadata_errors(self):
+
+        parquetfilename = "/tmp/test_measuremodel_parquet_output_with_metadata_errors.parquet"
+
+        mm = store_measures(MeasureModel())
+
+        # metadata_calcluations stores messages for mementos with errors
+        mm.set_simhash("timemap1", "timemap1-memento2", "No Simhash due to error")
+        mm.set_content_length("timemap1", "timemap1-memento2", "No length due to error")
+        mm.set_simhash("timemap2", "timemap2-memento3", "No Simhash due to access error")
+
+        mm.save_as_Parquet(parquetfilename)
+
+        rows = pyarrow.parquet.read_table(parquetfilename).to_pylist()
+
+        self.assertEqual("timemap1-memento2", rows[4]["URI-M"])
+        self.assertIsNone(rows[4]["Simhash"])
+        self.assertIsNone(rows[4]["Content Length"])
+        self.assertEqual("Memento Metadata Error", rows[4]["Error"])
+        self.assertEqual("No length due to error; No Simhash due to error",
+            rows[4]["Error Message"])
+        self.assertEqual(0.5, rows[4]["Comparison Score"])
+
+        # a measurement error is kept over the message
+        self.assertEqual("Memento Measurement Error", rows[14]["Error"])
+        self.assertEqual("EmptyDocument", rows[14]["Error Message"])
+        self.assertIsNone(rows[14]["Simhash"])
+        self.assertEqual("Memento Metadata Error", rows[15]["Error"])
+        self.assertEqual(300, rows[15]["Content Length"])
+
+        os.unlink(parquetfilename)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_output_without_overall_topic_status(self):
+
+        parquetfilename = "/tmp/test_measuremodel_parquet_output_without_overall_topic_status.parquet"
+
+        # only Simhashes were computed, without any measures
+        mm = MeasureModel()
+        mm.set_simhash("timemap1", "memento1", 5)
+        mm.set_content_length("timemap1", "memento1", 100)
+
+        mm.save_as_Parquet(parquetfilename)
+
+        rows = pyarrow.parquet.read_table(parquetfilename).to_pylist()
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(5, rows[0]["Simhash"])
+        self.assertIsNone(rows[0]["Measurement Name"])
+        self.assertIsNone(rows[0]["Overall Topic Status"])
+
+        # the only measure of memento2 failed, as it does for every memento
+        # of a TimeMap whose first memento fails
+        mm.set_score("timemap1", "memento1", "timemap measures", "jaccard", 0.5)
+        mm.set_Memento_measurement_error("timemap1", "memento2",
+            "timemap measures", "jaccard", "EmptyDocument")
+        mm.calculate_offtopic_by_measure("timemap measures", "jaccard", 0.25, ">")
+        mm.calculate_overall_offtopic_status()
+
+        mm.save_as_Parquet(parquetfilename)
+
+        rows = pyarrow.parquet.read_table(parquetfilename).to_pylist()
+
+        self.assertEqual("off-topic", rows[0]["Overall Topic Status"])
+        self.assertEqual("memento2", rows[1]["URI-M"])
+        self.assertEqual("Memento Measurement Error", rows[1]["Error"])
+        self.assertIsNone(rows[1]["Overall Topic Status"])
+
+        os.unlink(parquetfilename)
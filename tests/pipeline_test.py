@@ -0,0 +1,185 @@
+import os
+import unittest
+import shutil
+
+from otmt import collectionmodel, MementoPipeline
+from otmt.timemap_measures import full_tokenize
+from otmt.collectionmodel import remove_boilerplate_from_content
+
+import logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class TestingMementoPipeline(unittest.TestCase):
+
+    def test_pipeline(self):
+
+        working_directory = "/tmp/test_memento_pipeline"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap1_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        timemap2_content ="""<original2>; rel="original",
+<timemap2>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate2>; rel="timegate",
+<memento21>; rel="first memento"; datetime="Tue, 21 Mar 2016 15:45:06 GMT",
+<memento22>; rel="last memento"; datetime="Tue, 21 Mar 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap1_content, headers)
+        cm.addTimeMap("timemap2", timemap2_content, headers)
+
+        contents = {
+            "memento11": b"<html><body><p>The quick brown foxes are jumping over the lazy dogs in the park.</p></body></html>",
+            "memento12": b"<html><body><p>Brown foxes jumped over lazy dogs yesterday afternoon in the park.</p></body></html>",
+            "memento21": b"<html><body><p>Completely different content about something else entirely.</p></body></html>"
+        }
+
+        with MementoPipeline(workers=2, queue_size=2) as pipeline:
+
+            pipeline.register_TimeMaps(cm)
+
+            ready = pipeline.iterate_ready_TimeMaps()
+
+            for urim in [ "memento11", "memento12" ]:
+                cm.addMemento(urim, contents[urim], headers)
+                pipeline.submit(cm, urim, contents[urim])
+
+            self.assertEqual(next(ready), "timemap1")
+
+            for urim in [ "memento11", "memento12" ]:
+
+                expected_content = remove_boilerplate_from_content(contents[urim])
+
+                self.assertEqual(
+                    expected_content,
+                    cm.getMementoContentWithoutBoilerplate(urim)
+                )
+
+                self.assertEqual(
+                    full_tokenize(expected_content),
+                    cm.getMementoTokens(urim)
+                )
+
+            cm.addMemento("memento21", contents["memento21"], headers)
+            pipeline.submit(cm, "memento21", contents["memento21"])
+
+            cm.addMementoError("memento22", b"", {}, b"ConnectionError")
+            pipeline.complete_memento("memento22")
+
+            self.assertEqual(next(ready), "timemap2")
+
+            self.assertIsNotNone(cm.getMementoTokens("memento21"))
+
+            pipeline.finish()
+
+            with self.assertRaises(StopIteration):
+                next(ready)
+
+        shutil.rmtree(working_directory)
+
+    def test_shared_content_is_prepared_once(self):
+
+        working_directory = "/tmp/test_memento_pipeline_shared_content"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        timemap1_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        timemap2_content ="""<original2>; rel="original",
+<timemap2>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate2>; rel="timegate",
+<memento21>; rel="first memento"; datetime="Tue, 21 Mar 2016 15:45:06 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap1_content, {})
+
+        content = b"<html><body><p>The quick brown foxes are jumping over the lazy dogs in the park.</p></body></html>"
+
+        with MementoPipeline(workers=1) as pipeline:
+
+            submitted = []
+            executor_submit = pipeline.executor.submit
+
+            def counting_submit(function, *args):
+                submitted.append(args)
+                return executor_submit(function, *args)
+
+            pipeline.executor.submit = counting_submit
+
+            pipeline.register_TimeMaps(cm)
+
+            ready = pipeline.iterate_ready_TimeMaps()
+
+            # the second URI-M waits on the content queued for the first
+            for urim in [ "memento11", "memento12" ]:
+                cm.addMemento(urim, content, {})
+                pipeline.submit(cm, urim, content)
+
+            self.assertEqual(next(ready), "timemap1")
+
+            # and content prepared already is not queued again
+            cm.addTimeMap("timemap2", timemap2_content, {})
+            pipeline.register_TimeMaps(cm)
+
+            cm.addMemento("memento21", content, {})
+            pipeline.submit(cm, "memento21", content)
+
+            self.assertEqual(next(ready), "timemap2")
+            self.assertEqual(1, len(submitted))
+
+            for urim in [ "memento11", "memento12", "memento21" ]:
+                self.assertEqual(full_tokenize(remove_boilerplate_from_content(content)),
+                    cm.getMementoTokens(urim))
+
+            pipeline.finish()
+
+        shutil.rmtree(working_directory)
+
+    def test_finish_releases_waiting_TimeMaps(self):
+
+        working_directory = "/tmp/test_memento_pipeline_finish"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, {})
+
+        with MementoPipeline(workers=1) as pipeline:
+
+            pipeline.finish(cm)
+
+            self.assertEqual(["timemap1"], list(pipeline.iterate_ready_TimeMaps()))
+
+        shutil.rmtree(working_directory)
@@ -0,0 +1,284 @@
+import os
+import shutil
+import unittest
+
+from datetime import datetime
+
+from otmt import collectionmodel, SQLiteCollectionModel, \
+    create_collection_model, get_collection_model, MeasureModel, \
+    compute_measures_across_TimeMap
+
+import logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+class TestingSQLiteCollectionModel(unittest.TestCase):
+
+    def setUp(self):
+
+        self.test_directory = "/tmp/sqlite_collectionmodel_test"
+
+        if os.path.exists(self.test_directory):
+            shutil.rmtree(self.test_directory)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.test_directory)
+
+    def test_same_results_as_files(self):
+
+        database_filename = "{}/test_same_results.sqlite".format(self.test_directory)
+
+        cm = SQLiteCollectionModel(database_filename)
+        filecm = collectionmodel.CollectionModel(
+            "{}/test_same_results".format(self.test_directory))
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        contents = [
+            b"<html><body><p>The quick brown foxes are jumping over the lazy dogs in the park.</p></body></html>",
+            b"<html><body><p>Brown foxes jumped over lazy dogs yesterday afternoon in the park.</p></body></html>",
+            b"<html><body><p>Completely different content about something else entirely.</p></body></html>"
+        ]
+
+        for model in [ cm, filecm ]:
+
+            model.addTimeMap("timemap1", timemap_content, headers)
+
+            for i in range(0, 3):
+                model.addMemento("memento1{}".format(i + 1), contents[i], headers)
+
+        self.assertEqual(["timemap1"], cm.getTimeMapURIList())
+        self.assertEqual(filecm.getTimeMap("timemap1"), cm.getTimeMap("timemap1"))
+        self.assertEqual(headers, cm.getTimeMapHeaders("timemap1"))
+
+        self.assertEqual(["memento11", "memento12", "memento13"], cm.getMementoURIList())
+
+        for i in range(0, 3):
+
+            urim = "memento1{}".format(i + 1)
+
+            self.assertEqual(contents[i], cm.getMementoContent(urim))
+            self.assertEqual(headers, cm.getMementoHeaders(urim))
+            self.assertIsNone(cm.getMementoErrorInformation(urim))
+            self.assertEqual(
+                filecm.getMementoContentWithoutBoilerplate(urim),
+                cm.getMementoContentWithoutBoilerplate(urim)
+            )
+
+        mm = compute_measures_across_TimeMap(cm, MeasureModel(),
+            ["bytecount", "raw_simhash"])
+        filemm = compute_measures_across_TimeMap(filecm, MeasureModel(),
+            ["bytecount", "raw_simhash"])
+
+        self.assertEqual(filemm.scoremodel, mm.scoremodel)
+
+        # worker processes open the database themselves
+        parallelmm = compute_measures_across_TimeMap(cm, MeasureModel(),
+            ["bytecount", "raw_simhash"], workers=2)
+
+        self.assertEqual(mm.scoremodel, parallelmm.scoremodel)
+
+    def test_parallel_measures_store_tokens(self):
+
+        database_filename = "{}/test_parallel_measures.sqlite".format(self.test_directory)
+
+        cm = SQLiteCollectionModel(database_filename)
+
+        words = [ "fox", "dog", "park", "jumping", "lazy", "brown", "quick",
+            "storm", "flood", "city", "rescue", "domain" ]
+
+        for i in range(0, 8):
+
+            urit = "timemap{}".format(i)
+
+            cm.addTimeMap(urit, timemap_content.replace("memento1", "memento{}-".format(i)), {})
+
+            for j in range(1, 4):
+
+                # every TimeMap has content of its own, so workers write tokens
+                cm.addMemento("memento{}-{}".format(i, j), bytes(
+                    "<html><body><p>memento{}x{} {}</p></body></html>".format(i, j,
+                        " ".join(words[(i + j + k) % len(words)] for k in range(0, 40))
+                    ), "utf8"), {})
+
+        measures = [ "jaccard", "cosine", "levenshtein" ]
+
+        # worker processes send their writes back rather than locking the database
+        parallelmm = compute_measures_across_TimeMap(cm, MeasureModel(), measures, workers=2)
+
+        cm.flush()
+        cm = SQLiteCollectionModel(database_filename)
+
+        self.assertEqual(24, cm.read("SELECT COUNT(*) FROM memento_tokens")[0])
+        self.assertEqual(24, cm.read("SELECT COUNT(*) FROM memento_contents "
+            "WHERE content_without_boilerplate IS NOT NULL")[0])
+
+        mm = compute_measures_across_TimeMap(cm, MeasureModel(), measures)
+
+        self.assertEqual(mm.scoremodel, parallelmm.scoremodel)
+
+        # deferred writes are only stored where they are applied
+        cm.deferWrites()
+        cm.addMementoTokens("memento0-1", [ "other" ])
+
+        self.assertNotEqual([ "other" ], cm.getMementoTokens("memento0-1"))
+
+        othercm = SQLiteCollectionModel(database_filename)
+        othercm.applyWrites(cm.takeDeferredWrites())
+
+        self.assertEqual([ "other" ], othercm.getMementoTokens("memento0-1"))
+        self.assertEqual([], cm.takeDeferredWrites())
+
+    def test_errors_tokens_and_persistence(self):
+
+        database_filename = "{}/test_errors.sqlite".format(self.test_directory)
+
+        cm = SQLiteCollectionModel(database_filename, batch_size=2)
+
+        cm.addTimeMap("timemap1", timemap_content, {})
+        cm.addMemento("memento11", b"<html><body>mementotext</body></html>", {})
+        cm.addMementoError("memento12", b"", {}, b"ConnectionError")
+        cm.addMementoError("memento13", b"", {}, b"TooManyRedirects")
+
+        with self.assertRaises(collectionmodel.CollectionModelMementoErrorException):
+            cm.getMementoContent("memento12")
+
+        with self.assertRaises(collectionmodel.CollectionModelMementoErrorException):
+            cm.getMementoContentWithoutBoilerplate("memento12")
+
+        with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+            cm.getMementoContent("not-stored")
+
+        with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+            cm.getMementoErrorInformation("not-stored")
+
+        self.assertEqual(b"ConnectionError", cm.getMementoErrorInformation("memento12"))
+
+        tokens = [ "token{}".format(i % 300) for i in range(0, 1000) ]
+
+        self.assertIsNone(cm.getMementoTokens("memento11"))
+        cm.addMementoTokens("memento11", tokens)
+        self.assertEqual(tokens, cm.getMementoTokens("memento11"))
+        self.assertIsNone(cm.getMementoTokens("memento11", stemming=False))
+
+        with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+            cm.addMementoTokens("not-stored", tokens)
+
+
+        cm.clearMementoErrors(["memento12"])
+        cm.checkpoint({"acquired mementos": 3})
+
+        # everything survives into the next run
+        cm = create_collection_model("sqlite:{}".format(database_filename))
+
+        self.assertIsInstance(cm, SQLiteCollectionModel)
+        self.assertEqual(["memento11"], cm.getMementoURIList())
+        self.assertEqual(["memento13"], cm.getMementoErrorURIList())
+        self.assertEqual(tokens, cm.getMementoTokens("memento11"))
+        self.assertEqual(
+            datetime(2016, 1, 21, 15, 45, 6),
+            cm.getTimeMap("timemap1")["mementos"]["first"]["datetime"]
+        )
+
+        checkpoint = cm.getCheckpoint()
+
+        self.assertEqual(3, checkpoint["acquired mementos"])
+        self.assertEqual(1, checkpoint["mementos"])
+        self.assertEqual(1, checkpoint["memento errors"])
+
+        cm = get_collection_model("dir", ["sqlite:{}".format(database_filename)],
+            "unused")
+
+        self.assertEqual(["timemap1"], cm.getTimeMapURIList())
+
+    def test_compression(self):
+
+        working_directory = "{}/test_compression".format(self.test_directory)
+
+        cm = get_collection_model("dir", [working_directory], "unused",
+            compression="gzip")
+
+        self.assertEqual("gzip", cm.compression)
+
+        # the working directory remembers its compression
+        cm = create_collection_model(working_directory)
+
+        self.assertEqual("gzip", cm.compression)
+
+        with self.assertRaises(collectionmodel.CollectionModelException):
+            get_collection_model("dir", ["sqlite:{}/test_compression.sqlite".format(
+                self.test_directory)], "unused", compression="gzip")
+
+    def test_shared_content(self):
+
+        database_filename = "{}/test_shared_content.sqlite".format(self.test_directory)
+
+        cm = SQLiteCollectionModel(database_filename)
+
+        tokens = [ "mementotext" ]
+
+        cm.addMemento("memento11", b"<html><body>mementotext</body></html>", {})
+        cm.addMementoTokens("memento11", tokens)
+
+        # mementos with the same content share it and its tokens
+        cm.addMemento("memento12", b"<html><body>mementotext</body></html>", {})
+
+        self.assertEqual(cm.getMementoContentDigest("memento11"),
+            cm.getMementoContentDigest("memento12"))
+        self.assertEqual(tokens, cm.getMementoTokens("memento12"))
+        self.assertEqual(1, cm.read("SELECT COUNT(*) FROM memento_contents")[0])
+        self.assertEqual(b"mementotext\n", cm.getMementoContentWithoutBoilerplate("memento12"))
+        self.assertEqual(b"mementotext\n", cm.read(
+            "SELECT content_without_boilerplate FROM memento_contents")[0])
+
+        cm.addMemento("memento12", b"<html><body>other</body></html>", {})
+
+        self.assertIsNone(cm.getMementoTokens("memento12"))
+        self.assertEqual(tokens, cm.getMementoTokens("memento11"))
+
+        # boilerplate is precomputed once per content, recording failures
+        cm.addMemento("memento13", b"", {})
+
+        results = cm.precomputeBoilerplate(workers=2)
+
+        self.assertEqual(2, results["processed"])
+        self.assertEqual(1, results["failed"])
+        self.assertTrue(cm.hasMementoContentWithoutBoilerplate("memento12"))
+        self.assertFalse(cm.hasMementoContentWithoutBoilerplate("memento13"))
+        self.assertIsNotNone(cm.getBoilerplateRemovalFailure("memento13"))
+        self.assertIsNone(cm.getBoilerplateRemovalFailure("memento12"))
+
+        self.assertEqual(3, cm.precomputeBoilerplate(workers=1)["skipped"])
+
+        # failures met lazily are recorded and raised again from the record
+        cm.addMemento("memento14", b"   ", {})
+
+        with self.assertRaises(collectionmodel.CollectionModelBoilerPlateRemovalFailureException) as first:
+            cm.getMementoContentWithoutBoilerplate("memento14")
+
+        self.assertEqual(str(first.exception), cm.getBoilerplateRemovalFailure("memento14"))
+
+        cm.flush()
+
+        cm = SQLiteCollectionModel(database_filename)
+
+        for urim in [ "memento13", "memento14" ]:
+
+            with self.assertRaises(collectionmodel.CollectionModelBoilerPlateRemovalFailureException) as repeated:
+                cm.getMementoContentWithoutBoilerplate(urim)
+
+            self.assertEqual(cm.getBoilerplateRemovalFailure(urim), str(repeated.exception))
+
+        self.assertEqual({ "memento13", "memento14" }, set(cm.boilerplate_failures))
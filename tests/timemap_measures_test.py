@@ -13,7 +13,12 @@ from otmt import collectionmodel, compute_bytecount_across_TimeMap, \
     compute_levenshtein_across_TimeMap, compute_nlevenshtein_across_TimeMap, \
     compute_tfintersection_across_TimeMap, compute_tfsimhash_across_TimeMap, \
     compute_rawsimhash_across_TimeMap, compute_gensim_lsi_across_TimeMap, \
-    compute_gensim_lda_across_TimeMap, MeasureModel
+    compute_gensim_lda_across_TimeMap, compute_measures_across_TimeMap, \
+    MeasureModel
+from otmt.timemap_measures import compute_score_across_TimeMap, \
+    get_memento_data_for_measure, \
+    jaccard_scoredistance, sorensen_scoredistance, levenshtein_scoredistance, \
+    nlevenshtein_scoredistance, supported_timemap_measures
 
 import logging
 logging.basicConfig(level=logging.DEBUG)
@@ -1082,3 +1087,397 @@ class TestingTimeMapMeasures(unittest.TestCase):
         )
 
         shutil.rmtree(working_directory)
+
+    def test_single_pass_multiple_measures(self):
+
+        working_directory = "/tmp/test_single_pass_multiple_measures"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        class CountingCollectionModel(collectionmodel.CollectionModel):
+
+            content_requests = {}
+
+            def getMementoContent(self, urim):
+                self.content_requests.setdefault(urim, 0)
+                self.content_requests[urim] += 1
+                return super().getMementoContent(urim)
+
+        cm = CountingCollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+        cm.addMemento("memento11", b"<html><body>The quick brown fox</body></html>", headers)
+        cm.addMemento("memento12", b"<html><body>jumps over the lazy dog</body></html>", headers)
+        cm.addMemento("memento13", b"<html><body>etaoin shrdlu</body></html>", headers)
+
+        measures = ["bytecount", "raw_simhash"]
+
+        mm = compute_measures_across_TimeMap(cm, MeasureModel(), measures)
+
+        for urim in ["memento11", "memento12", "memento13"]:
+            self.assertEqual(cm.content_requests[urim], 1)
+
+        separate_mm = MeasureModel()
+        separate_mm = compute_bytecount_across_TimeMap(cm, separate_mm)
+        separate_mm = compute_rawsimhash_across_TimeMap(cm, separate_mm)
+
+        self.assertEqual(
+            [("timemap measures", "bytecount"), ("timemap measures", "raw_simhash")],
+            mm.get_Measures()
+        )
+
+        for urim in ["memento11", "memento12", "memento13"]:
+
+            for measure in measures:
+
+                self.assertEqual(
+                    separate_mm.get_score("timemap1", urim, "timemap measures", measure),
+                    mm.get_score("timemap1", urim, "timemap measures", measure)
+                )
+
+        shutil.rmtree(working_directory)
+
+    def test_memento_data_cache_errors(self):
+
+        working_directory = "/tmp/test_memento_data_cache_errors"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        class FailingCollectionModel(collectionmodel.CollectionModel):
+
+            content_requests = 0
+
+            def getMementoContent(self, urim):
+                self.content_requests += 1
+
+                if urim == "broken":
+                    raise TypeError("a programming error")
+
+                return super().getMementoContent(urim)
+
+        cm = FailingCollectionModel(working_directory=working_directory)
+        memento_data_cache = {}
+
+        # errors that the measures record for the memento are cached
+        for i in range(0, 2):
+            with self.assertRaises(collectionmodel.CollectionModelNoSuchMementoException):
+                get_memento_data_for_measure("missing", cm,
+                    tokenize=False, remove_boilerplate=False,
+                    memento_data_cache=memento_data_cache)
+
+        self.assertEqual(1, cm.content_requests)
+
+        # other errors propagate and are not cached
+        for i in range(0, 2):
+            with self.assertRaises(TypeError):
+                get_memento_data_for_measure("broken", cm,
+                    tokenize=False, remove_boilerplate=False,
+                    memento_data_cache=memento_data_cache)
+
+        self.assertEqual(3, cm.content_requests)
+
+        shutil.rmtree(working_directory)
+
+    def test_parallel_matches_sequential(self):
+
+        working_directory = "/tmp/test_parallel_matches_sequential"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        contents = [
+            b"<html><body>The quick brown fox</body></html>",
+            b"<html><body>jumps over the lazy dog</body></html>",
+            b"<html><body>etaoin shrdlu</body></html>"
+        ]
+
+        for i in range(1, 4):
+
+            timemap_content ="""<original{0}>; rel="original",
+<timemap{0}>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate{0}>; rel="timegate",
+<memento{0}1>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento{0}2>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento{0}3>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+""".format(i)
+
+            cm.addTimeMap("timemap{}".format(i), timemap_content, headers)
+
+            for j in range(1, 4):
+                cm.addMemento("memento{}{}".format(i, j), contents[(i + j) % 3], headers)
+
+        measures = ["bytecount", "raw_simhash"]
+
+        sequential_mm = compute_measures_across_TimeMap(cm, MeasureModel(), measures)
+        parallel_mm = compute_measures_across_TimeMap(cm, MeasureModel(), measures, workers=2)
+
+        self.assertEqual(sequential_mm.get_TimeMap_URIs(), parallel_mm.get_TimeMap_URIs())
+
+        for urit in sequential_mm.get_TimeMap_URIs():
+
+            self.assertEqual(
+                sequential_mm.get_Memento_URIs_in_TimeMap(urit),
+                parallel_mm.get_Memento_URIs_in_TimeMap(urit)
+            )
+
+            for urim in sequential_mm.get_Memento_URIs_in_TimeMap(urit):
+
+                for measure in measures:
+
+                    self.assertEqual(
+                        sequential_mm.get_score(urit, urim, "timemap measures", measure),
+                        parallel_mm.get_score(urit, urim, "timemap measures", measure)
+                    )
+
+                    self.assertEqual(
+                        sequential_mm.get_removed_boilerplate(urit, urim, "timemap measures", measure),
+                        parallel_mm.get_removed_boilerplate(urit, urim, "timemap measures", measure)
+                    )
+
+        parallel_mm = compute_bytecount_across_TimeMap(cm, MeasureModel(), workers=2)
+
+        self.assertEqual(
+            sequential_mm.get_score("timemap2", "memento22", "timemap measures", "bytecount"),
+            parallel_mm.get_score("timemap2", "memento22", "timemap measures", "bytecount")
+        )
+
+        shutil.rmtree(working_directory)
+
+    def test_set_distances_match_pairwise(self):
+
+        working_directory = "/tmp/test_set_distances_match_pairwise"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:07 GMT",
+<memento14>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:08 GMT",
+<memento15>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+        cm.addMemento("memento11", b"<html><body>The quick brown fox jumps over the lazy dog, the fox</body></html>", headers)
+        cm.addMemento("memento12", b"<html><body>The quick brown fox jumps over the sleeping cat</body></html>", headers)
+        cm.addMemento("memento13", b"", headers)
+        cm.addMemento("memento14", b"<html><body>etaoin shrdlu</body></html>", headers)
+        cm.addMementoError("memento15", b"", headers, b"ConnectionError")
+
+        for measure, scoredistance_function, compute_function in [
+            ("jaccard", jaccard_scoredistance, compute_jaccard_across_TimeMap),
+            ("sorensen", sorensen_scoredistance, compute_sorensen_across_TimeMap) ]:
+
+            pairwise_mm = compute_score_across_TimeMap(cm, MeasureModel(),
+                measure, scoredistance_function)
+
+            for mm in [ compute_function(cm, MeasureModel()),
+                compute_measures_across_TimeMap(cm, MeasureModel(), [ measure ]) ]:
+
+                self.assertEqual(pairwise_mm.generate_dict(), mm.generate_dict())
+
+            self.assertEqual(0, mm.get_score("timemap1", "memento11", "timemap measures", measure))
+            self.assertEqual(1, mm.get_score("timemap1", "memento14", "timemap measures", measure))
+            self.assertLess(0, mm.get_score("timemap1", "memento12", "timemap measures", measure))
+            self.assertIsNotNone(mm.get_Memento_measurement_error_message(
+                "memento13", "timemap measures", measure))
+
+        shutil.rmtree(working_directory)
+
+    def test_levenshtein_engines(self):
+
+        working_directory = "/tmp/test_levenshtein_engines"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:07 GMT",
+<memento14>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+        cm.addMemento("memento11", b"<html><body>The quick brown fox jumps over the lazy dog</body></html>", headers)
+        cm.addMemento("memento12", b"<html><body>The quick brown fox jumps over the sleeping cat</body></html>", headers)
+        cm.addMemento("memento13", b"<html><body>etaoin shrdlu</body></html>", headers)
+        cm.addMemento("memento14", b"", headers)
+
+        measures = [ "levenshtein", "nlevenshtein" ]
+
+        expected_mm = compute_levenshtein_across_TimeMap(cm, MeasureModel(),
+            levenshtein_engine="distance")
+        expected_mm = compute_nlevenshtein_across_TimeMap(cm, expected_mm,
+            levenshtein_engine="distance")
+
+        for mm in [
+            compute_nlevenshtein_across_TimeMap(cm,
+                compute_levenshtein_across_TimeMap(cm, MeasureModel()),
+                workers=2),
+            compute_measures_across_TimeMap(cm, MeasureModel(), measures),
+            compute_measures_across_TimeMap(cm, MeasureModel(), measures,
+                levenshtein_engine="distance") ]:
+
+            self.assertEqual(expected_mm.generate_dict(), mm.generate_dict())
+
+        self.assertEqual(0, mm.get_score("timemap1", "memento11", "timemap measures", "levenshtein"))
+        self.assertLess(0, mm.get_score("timemap1", "memento12", "timemap measures", "nlevenshtein"))
+
+        shutil.rmtree(working_directory)
+
+    def test_decision_mode(self):
+
+        working_directory = "/tmp/test_decision_mode"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:07 GMT",
+<memento14>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:08 GMT",
+<memento15>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        random.seed(1)
+
+        words = [ "".join(random.choice(string.ascii_lowercase) for i in range(0, 8))
+            for j in range(0, 60) ]
+
+        first_words = random.choices(words, k=120)
+        revised_words = list(first_words)
+        revised_words[10:20] = random.choices(words, k=10)
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+
+        for urim, memento_words in [
+            ("memento11", first_words),
+            ("memento12", revised_words),
+            ("memento13", first_words[0:60]),
+            ("memento14", random.choices(words, k=150)),
+            ("memento15", []) ]:
+
+            cm.addMemento(urim, bytes("<html><body><p>{}</p></body></html>".format(
+                " ".join(memento_words)), "utf8"), headers)
+
+        for measure, scoredistance_function, thresholds in [
+            ("levenshtein", levenshtein_scoredistance, [ 0.05, 5, 30, 100 ]),
+            ("nlevenshtein", nlevenshtein_scoredistance, [ 0.05, 0.2, 0.5, 0.9 ]) ]:
+
+            for threshold in thresholds:
+
+                comparison = supported_timemap_measures[measure]["comparison direction"]
+
+                expected_mm = compute_score_across_TimeMap(cm, MeasureModel(),
+                    measure, scoredistance_function)
+                expected_mm.calculate_offtopic_by_measure(
+                    "timemap measures", measure, threshold, comparison)
+
+                for mm in [
+                    compute_score_across_TimeMap(cm, MeasureModel(), measure,
+                        scoredistance_function, threshold=threshold),
+                    compute_measures_across_TimeMap(cm, MeasureModel(), [ measure ],
+                        thresholds={ measure: threshold }, workers=2) ]:
+
+                    for urim in [ "memento11", "memento12", "memento13", "memento14", "memento15" ]:
+
+                        with self.subTest(measure=measure, threshold=threshold, urim=urim):
+
+                            status = expected_mm.get_off_topic_status_by_measure(
+                                urim, "timemap measures", measure)
+                            exact = expected_mm.get_score("timemap1", urim,
+                                "timemap measures", measure)
+                            score = mm.get_score("timemap1", urim,
+                                "timemap measures", measure)
+
+                            self.assertEqual(status, mm.get_off_topic_status_by_measure(
+                                urim, "timemap measures", measure))
+
+                            # bounds stay on the side of the threshold of the exact score
+                            if status == "off-topic":
+                                self.assertLessEqual(score, exact)
+                            else:
+                                self.assertGreaterEqual(score, exact)
+
+                    mm.calculate_offtopic_by_measure(
+                        "timemap measures", measure, threshold, comparison)
+
+                    self.assertEqual(
+                        [ expected_mm.get_off_topic_status_by_measure(urim, "timemap measures", measure)
+                            for urim in mm.get_Memento_URIs_in_TimeMap("timemap1") ],
+                        [ mm.get_off_topic_status_by_measure(urim, "timemap measures", measure)
+                            for urim in mm.get_Memento_URIs_in_TimeMap("timemap1") ]
+                    )
+
+        # the distance of an off-topic memento is not computed in full
+        expected_mm = compute_levenshtein_across_TimeMap(cm, MeasureModel())
+        mm = compute_levenshtein_across_TimeMap(cm, MeasureModel(), threshold=5)
+
+        self.assertLess(
+            mm.get_score("timemap1", "memento14", "timemap measures", "levenshtein"),
+            expected_mm.get_score("timemap1", "memento14", "timemap measures", "levenshtein"))
+        self.assertEqual("off-topic", mm.get_off_topic_status_by_measure(
+            "memento14", "timemap measures", "levenshtein"))
+
+        # measures without decision mode are scored exactly
+        measures = [ "jaccard", "sorensen", "tf_simhash" ]
+
+        expected_mm = compute_measures_across_TimeMap(cm, MeasureModel(), measures)
+        mm = compute_measures_across_TimeMap(cm, MeasureModel(), measures,
+            thresholds={ "jaccard": 0.05, "sorensen": 0.05, "tf_simhash": 5 })
+
+        self.assertEqual(expected_mm.generate_dict(), mm.generate_dict())
+
+        shutil.rmtree(working_directory)
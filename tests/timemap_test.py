@@ -0,0 +1,126 @@
+import unittest
+
+from datetime import datetime
+
+from otmt.timemap import convert_LinkTimeMap_to_dict, \
+    convert_LinkTimeMap_to_dict_by_character, convert_RFC1123_to_datetime, \
+    iter_LinkTimeMap_links, process_local_dict, MalformedLinkFormatTimeMap
+
+timemap_text = """<http://example.com>; rel="original",
+<http://archive.example.org/timemap/link/http://example.com>; rel="self"; type="application/link-format"; from="Tue, 21 Jan 2016 15:45:06 GMT",
+<http://archive.example.org/timegate/http://example.com>; rel="timegate",
+<http://archive.example.org/20160121154506/http://example.com>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<http://archive.example.org/20170121154506/http://example.com>;rel="memento";  datetime = "Sat, 21 Jan 2017 15:45:06 GMT" ,
+<http://archive.example.org/20180121154506/http://example.com>; rel="last memento"; datetime="Sun, 21 Jan 2018 15:45:06 GMT"
+"""
+
+class TestingTimeMap(unittest.TestCase):
+
+    def assertSameAsByCharacter(self, text, skipErrors=False):
+
+        try:
+            expected = convert_LinkTimeMap_to_dict_by_character(text, skipErrors=skipErrors)
+        except Exception as e:
+            with self.assertRaises(type(e)):
+                convert_LinkTimeMap_to_dict(text, skipErrors=skipErrors)
+            return
+
+        self.assertEqual(expected, convert_LinkTimeMap_to_dict(text, skipErrors=skipErrors))
+
+    def test_convert_LinkTimeMap_to_dict(self):
+
+        timemap = convert_LinkTimeMap_to_dict(timemap_text)
+
+        self.assertEqual("http://example.com", timemap["original_uri"])
+        self.assertEqual("http://archive.example.org/timegate/http://example.com",
+            timemap["timegate_uri"])
+        self.assertEqual(3, len(timemap["mementos"]["list"]))
+        self.assertEqual(datetime(2017, 1, 21, 15, 45, 6),
+            timemap["mementos"]["list"][1]["datetime"])
+        self.assertEqual(datetime(2018, 1, 21, 15, 45, 6),
+            timemap["mementos"]["last"]["datetime"])
+
+        self.assertSameAsByCharacter(timemap_text)
+
+    def test_same_as_by_character(self):
+
+        texts = [
+            "",
+            "   \n",
+            timemap_text.strip(),
+            # the last link is processed twice if nothing follows its comma
+            timemap_text.strip() + ",",
+            timemap_text.strip() + ",\n",
+            # unusual spacing and characters within URIs and values
+            '  < http://example.com/a,b;c=d >\n\t;rel="original" ;  x = " y "',
+            '<http://example.com/a"b>; rel="memento"; datetime="Tue, 1 Jan 2016 15:45:06 GMT"',
+            # attributes without quotes, repeated quotes, and keys with quotes
+            '<http://example.com>; rel=original',
+            '<http://example.com>; rel="original" "extra"',
+            '<http://example.com>; r"el="original"',
+            '<http://example.com>; rel="original" junk',
+            'junk <http://example.com>; rel="original"',
+            # links without relations or attributes
+            '<http://example.com>; type="text/html"',
+            '<http://example.com>',
+            '<http://example.com>;',
+            # datetimes that are impossible or belong to non-mementos
+            '<http://example.com/m>; rel="memento"; datetime="Tue, 30 Feb 2016 15:45:06 GMT"',
+            '<http://example.com/m>; rel="memento"; datetime="Tue, 21 Jan 2016 24:45:06 GMT"',
+            '<http://example.com/m>; rel="memento"; datetime="tue, 21 jan 2016 15:45:06 GMT"',
+            '<http://example.com/m>; rel="memento"',
+            '<http://example.com/t>; rel="timegate"; datetime="Tue, 21 Jan 2016 15:45:06 GMT"',
+        ]
+
+        for text in texts:
+            for skipErrors in [ False, True ]:
+                with self.subTest(text=text, skipErrors=skipErrors):
+                    self.assertSameAsByCharacter(text, skipErrors=skipErrors)
+
+        with self.assertRaises(MalformedLinkFormatTimeMap):
+            convert_LinkTimeMap_to_dict('junk <http://example.com>; rel="original"')
+
+    def test_convert_RFC1123_to_datetime(self):
+
+        self.assertEqual(datetime(2016, 1, 21, 15, 45, 6),
+            convert_RFC1123_to_datetime("Tue, 21 Jan 2016 15:45:06 GMT"))
+
+        # strptime handles what the fixed format does not
+        self.assertEqual(datetime(2016, 1, 1, 15, 45, 6),
+            convert_RFC1123_to_datetime("Tue, 1 Jan 2016 15:45:06 GMT"))
+
+        with self.assertRaises(ValueError):
+            convert_RFC1123_to_datetime("Tue, 30 Feb 2016 15:45:06 GMT")
+
+        with self.assertRaises(ValueError):
+            convert_RFC1123_to_datetime("2016-01-21T15:45:06Z")
+
+    def test_iter_LinkTimeMap_links(self):
+
+        text = timemap_text.replace("http://example.com>", "http://exämple.com>")
+        content = text.encode("utf8")
+
+        for chunk_size in [ 1, 7, 64, len(content) ]:
+
+            chunks = [ content[i:i + chunk_size] for i in range(0, len(content), chunk_size) ]
+
+            links = list(iter_LinkTimeMap_links(chunks))
+
+            self.assertEqual(6, len(links))
+            self.assertEqual(("http://exämple.com", { "rel": "original" }), links[0])
+
+            timemap = {}
+
+            for uri, attributes in links:
+                process_local_dict({ uri: attributes }, timemap)
+
+            self.assertEqual(convert_LinkTimeMap_to_dict(text), timemap)
+
+        # links are read as they arrive, up to the first malformed character
+        first_link = timemap_text[0:timemap_text.index(",\n") + 2]
+        links = iter_LinkTimeMap_links([ first_link, "junk" ])
+
+        self.assertEqual("http://example.com", next(links)[0])
+
+        with self.assertRaises(MalformedLinkFormatTimeMap):
+            list(links)
@@ -0,0 +1,49 @@
+import unittest
+
+from otmt import TokenizationPipeline
+from otmt.timemap_measures import full_tokenize
+
+class TestingTokenization(unittest.TestCase):
+
+    def test_tokenize(self):
+
+        pipeline = TokenizationPipeline()
+
+        text = "The quick brown foxes were jumping over the lazy dogs."
+
+        self.assertEqual(
+            ["quick", "brown", "fox", "jump", "lazi", "dog"],
+            pipeline.tokenize(text)
+        )
+
+        self.assertEqual(
+            ["The", "quick", "brown", "foxes", "jumping", "lazy", "dogs"],
+            pipeline.tokenize(text, stemming=False)
+        )
+
+        self.assertEqual(
+            pipeline.tokenize(text),
+            pipeline.tokenize(bytes(text, "utf8"))
+        )
+
+        self.assertEqual(pipeline.tokenize(text), full_tokenize(text))
+
+    def test_tokenize_documents(self):
+
+        pipeline = TokenizationPipeline()
+
+        documents = [
+            "The quick brown foxes were jumping over the lazy dogs.",
+            b"Now is the time for all good men to come to the aid of their country",
+            ""
+        ]
+
+        self.assertEqual(
+            [ pipeline.tokenize(document) for document in documents ],
+            pipeline.tokenize_documents(documents)
+        )
+
+        self.assertEqual(
+            [ pipeline.tokenize(document, stemming=False) for document in documents ],
+            pipeline.tokenize_documents(documents, stemming=False)
+        )